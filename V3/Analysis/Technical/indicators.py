@@ -1,15 +1,19 @@
 import pandas as pd
 import cloudscraper
-import csv
 import datetime
 import time
 import numpy as np
 import sys
 import json
+from numpy.lib.stride_tricks import sliding_window_view
 
 # append the config file path to sys.path
 sys.path.append('Config Files')
 import config
+# Append the 'Database' folder to path and import the needed module
+sys.path.append('Database')
+import candleStore
+import priceBoard
 
 scraper = cloudscraper.create_scraper()
 
@@ -69,7 +73,7 @@ def price(asset, asset_type):
         config.log_error(json.dumps(error))
         return error
         
-def db_price(asset):
+def db_price(asset, asset_type):
     """
     Get the current price of the asset.
 
@@ -84,6 +88,10 @@ def db_price(asset):
             'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
     """
     while True:
+        # Read the price board first, without touching the database
+        price = priceBoard.read(asset, asset_type)
+        if price is not None:
+            return price
         try:
             return float(config.get_asset_price(asset)[0]['asset_price'])
         except:
@@ -92,7 +100,7 @@ def db_price(asset):
 
 def createLargerCandlesticks(df, output, timeframe):
     # convert timeframe to correct format
-    timeframe = config.timeframe_converter[timeframe]
+    timeframe = pd.Timedelta(config.timeframe_converter[timeframe])
     # Convert time column to datetime type
     df['datetime'] = pd.to_datetime(df['datetime'])
     # Group by desired timeframe
@@ -105,14 +113,44 @@ def createLargerCandlesticks(df, output, timeframe):
     # Create new dataframe with new data
     new_df = pd.DataFrame({'open':new_open, 'close':new_close, 'high':new_high, 'low':new_low})
     new_df = new_df.reset_index()
-    new_df["datetime"] = new_df["datetime"].dt.strftime('%Y-%m-%d %H:%M:%S')
     new_df = new_df.dropna()
-    new_df.to_csv(output, index=False)
+    candleStore.write(output, candleStore.from_dataframe(new_df))
     return new_df
 
-def update(initialized_asset, asset, asset_type, asset_price, timeframe):
+def updateLargerCandlesticks(output, asset_price, timeframe, now=None):
     """
-    Update the asset data stored in a CSV file.
+    Fold a new price into the candle file without regrouping its history.
+    The price updates the high, low and close of the open candle, or starts a new candle once the timeframe boundary is crossed.
+
+    Args:
+    output (str): The name of the candle file.
+    asset_price (float): The new price of the asset.
+    timeframe (str): The timeframe of the candles (a key of config.timeframe_converter).
+    now (datetime.datetime, optional): The time of the price. Defaults to the current time.
+
+    Returns:
+    numpy.ndarray: The updated or new candle record.
+    """
+    # Find the start of the candle the price belongs to
+    now = datetime.datetime.now() if now is None else now
+    bucket = candleStore.to_epoch(pd.Timestamp(now).floor(pd.Timedelta(config.timeframe_converter[timeframe])))
+    candles = candleStore.read(output)
+    # A price inside the open candle only moves its high, low and close
+    if len(candles) > 0 and bucket <= candles[-1]['datetime']:
+        candle = candles[-1:].copy()
+        candle['high'] = max(candle['high'][0], asset_price)
+        candle['low'] = min(candle['low'][0], asset_price)
+        candle['close'] = asset_price
+        candleStore.replace_last(output, candle)
+    # Otherwise the price opens a new candle
+    else:
+        candle = np.array([(bucket, asset_price, asset_price, asset_price, asset_price)], dtype=candleStore.candle_dtype)
+        candleStore.append(output, candle)
+    return candle
+
+def update(initialized_asset, asset, asset_type, asset_price, timeframe, history=None):
+    """
+    Update the asset data stored in a candle file.
     
     Parameters:
     initialized_asset (str): Indicate if an asset is being initialized for the first time.
@@ -120,6 +158,7 @@ def update(initialized_asset, asset, asset_type, asset_price, timeframe):
     asset_type (str): The type of the asset (e.g. 'currency', 'commodity', 'stock').
     asset_price (float): The current price of the asset.
     timeframe (str): The time frame for the data (e.g. '1d', '1h').
+    history (list, optional): The already downloaded historical values of the asset, newest first.
     
     Returns:
     dict: a dictionary containing the status of the operation and any relevant data.
@@ -129,60 +168,22 @@ def update(initialized_asset, asset, asset_type, asset_price, timeframe):
     """
     try:
         file_name = config.generate_file_name(asset, timeframe)['data']
-        columns = ['datetime', 'high', 'low', 'open', 'close']
         if initialized_asset == 'false':
-            while True:
+            data = history
+            while data is None:
                 try:
                     # Get the asset data from the API
-                    data = scraper.get(config.generate_historical_url(asset, asset_type, timeframe)['data'])
-                    data = data.json()['values']
-                    break
+                    data = scraper.get(config.generate_historical_url(asset, asset_type, timeframe)['data']).json()['values']
                 except:
                     time.sleep(30)
-            # Open the CSV file for writing
-            with open(file_name, 'w') as f:
-                # Create a CSV writer
-                writer = csv.writer(f)
-                # Write the columns to the CSV file
-                writer.writerow(columns)
-                # Write the values to the CSV file
-                for row in reversed(data):
-                    # Convert the time value to a time string
-                    date_time = datetime.datetime.fromisoformat(row['datetime'])
-                    date_formatted = date_time.strftime('%Y-%m-%d %H:%M:%S')
-                    row['datetime'] = date_formatted
-                    # Create a list of values for the specified columns
-                    values = [row[col] for col in columns]
-                    # Write the values to the CSV file
-                    writer.writerow(values)
-        # Get the current time in Rochester, NY
-        now = datetime.datetime.now()
-        # Format the time as a string in the desired format
-        time_str = now.strftime('%Y-%m-%d %H:%M:%S')
-        # Create a row of data for the current asset price
-        row = {
-            'datetime': time_str, 
-            'high': asset_price, 
-            'low': asset_price, 
-            'open': asset_price, 
-            'close': asset_price
-        }
-        # Open the CSV file for appending
-        with open(file_name, 'a') as f:
-            # Create a CSV writer for dictionaries
-            writer = csv.DictWriter(f, fieldnames=columns)
-            # Write the row to the CSV file
-            writer.writerow(row)
-        # Read the CSV file into a Pandas dataframe
-        df = config.read_dataframe(file_name)['data']
-        # Check if all the columns exist
-        if all(col in df.columns for col in row.keys()):
-            # Create larger candlesticks from the dataframe
-            createLargerCandlesticks(df, file_name, timeframe)
-        else:
-            raise AttributeError(f'The CSV file for {asset} on timeframe {timeframe} does not have all its columns')
+            # Write the values, oldest first, to the candle file
+            candleStore.write(file_name, candleStore.from_dataframe(pd.DataFrame(data[::-1])))
+            # Group the downloaded values into candles of the timeframe once
+            createLargerCandlesticks(config.read_dataframe(file_name)['data'], file_name, timeframe)
+        # Fold the current asset price into the last candle
+        updateLargerCandlesticks(file_name, float(asset_price), timeframe)
         return {
-            'data': f'The CSV file for {asset} on timeframe {timeframe} has been updated.',
+            'data': f'The candle file for {asset} on timeframe {timeframe} has been updated.',
             'msg': 'success'
         }
     except Exception as e:
@@ -222,30 +223,21 @@ def calculate_macd(df):
     turned = ''
     final_dir = ''
     values = []
-    # Iterate through the rows of the DataFrame
-    for _, row in df.iterrows():
-        # If the MACD is greater than or equal to the MACD signal
-        if row['macd'] >= row['macd_signal']:
-            # If the final direction is not positive
-            if final_dir != 'long':
-                # Reset the values and update the turned and final direction variables
-                values = []
-                turned = row['datetime']
-                final_dir = 'long'
-            else:
-                # Append the MACD value to the values list
-                values.append(row['macd'])
-        # If the MACD is less than the MACD signal
-        if row['macd'] < row['macd_signal']:
-            # If the final direction is not negative
-            if final_dir != 'short':
-                # Reset the values and update the turned and final direction variables
-                values = []
-                turned = row['datetime']
-                final_dir = 'short'
-            else:
-                # Append the MACD value to the values list
-                values.append(row['macd'])
+    # Flag the rows where the MACD is above / below the MACD signal
+    is_long = (df['macd'] >= df['macd_signal']).to_numpy()
+    is_short = (df['macd'] < df['macd_signal']).to_numpy()
+    # Rows that are neither (NaN values) never change the direction
+    positions = np.flatnonzero(is_long | is_short)
+    if positions.size > 0:
+        directions = is_long[positions]
+        # Find where the sign of macd - macd_signal flips and keep the latest run
+        flips = np.flatnonzero(directions[1:] != directions[:-1]) + 1
+        run_start = flips[-1] if flips.size > 0 else 0
+        # The turn happened on the first row of the latest run
+        turned = str(df['datetime'].iloc[positions[run_start]])
+        final_dir = 'long' if directions[-1] else 'short'
+        # The values are the MACD values of the latest run after the turn
+        values = df['macd'].to_numpy()[positions[run_start + 1:]].tolist()
     # Return the final MACD value, MACD signal, MACD histogram, direction of the MACD, time of the last turn, the period since the last turn, the number of crosses, and the values of the MACD
     return {
         'macd': df['macd'][num_rows - 1], 
@@ -282,35 +274,144 @@ def calculate_ema_dema(df):
         'df': df
     }
 
-def calculate_trend(df):
+def calculate_trend(df, ema=None):
     """
     Calculate the personal values for the given DataFrame.
 
     Args:
     df (pandas.DataFrame): The DataFrame to calculate the personal values for.
+    ema (pandas.Series, optional): An already calculated 200 period EMA of the opening price.
 
     Returns:
     dict: A dictionary containing the personal values.
     """
     # Calculate the EMA for the closing price
-    df['ema'] = df['open'].ewm(span=200).mean()
+    df['ema'] = df['open'].ewm(span=200).mean() if ema is None else ema
+    trend = find_trend_window((df['close'] > df['ema']).to_numpy(), (df['close'] < df['ema']).to_numpy())
+    trend['df'] = df
+    return trend
+
+def find_trend_window(above, below):
+    """
+    Find the most recent window in which the closes above or below the EMA clearly dominate.
+
+    Args:
+    above (numpy.ndarray): Boolean flags of the rows that closed above the EMA, oldest first.
+    below (numpy.ndarray): Boolean flags of the rows that closed below the EMA, oldest first.
+
+    Returns:
+    dict: A dictionary containing the window length and the number of rows above and below the EMA in it.
+    """
     greater_count = 0
     less_count = 0
-    dft = 0
-    for x in range(1, len(df)):
-        dft = df.tail(x)
-        greater_count = dft.loc[dft['close'] > dft['ema']].shape[0]
-        less_count = dft.loc[dft['close'] < dft['ema']].shape[0]
-        if greater_count > 0 and less_count > 0:
-            if (abs(greater_count - less_count) / greater_count) * 100.0 >= 50 and x >= 200:
-                break
+    dft_len = 0
+    # Window sizes that are checked, from the last row backwards
+    windows = np.arange(1, len(above))
+    if windows.size > 0:
+        # Count the rows above / below the EMA in the last x rows for every x at once
+        greater_counts = np.cumsum(above[::-1])[:windows.size]
+        less_counts = np.cumsum(below[::-1])[:windows.size]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            imbalance = (np.abs(greater_counts - less_counts) / greater_counts) * 100.0
+        # Stop at the first window of at least 200 rows where one side clearly dominates
+        stops = np.flatnonzero((greater_counts > 0) & (less_counts > 0) & (imbalance >= 50) & (windows >= 200))
+        stop = stops[0] if stops.size > 0 else windows.size - 1
+        dft_len = int(windows[stop])
+        greater_count = int(greater_counts[stop])
+        less_count = int(less_counts[stop])
     return {
-        'dftLen': len(dft), 
-        'greaterCount': greater_count, 
-        'lessCount': less_count,
-        'df': df
+        'dftLen': dft_len,
+        'greaterCount': greater_count,
+        'lessCount': less_count
+    }
+
+def last_at_least(values, limits, targets):
+    """
+    Find, for every query, the last position j in [1, limit] whose value is at least the target.
+
+    Args:
+    values (numpy.ndarray): The values searched.
+    limits (numpy.ndarray): The last position each query may return.
+    targets (numpy.ndarray): The value each query looks for.
+
+    Returns:
+    numpy.ndarray: The position found by each query, 0 if there is none.
+    """
+    # Maximum of the 2^t values ending at each position
+    levels = [values]
+    while (1 << len(levels)) <= len(values):
+        step = 1 << (len(levels) - 1)
+        level = levels[-1].copy()
+        level[step:] = np.maximum(levels[-1][step:], levels[-1][:-step])
+        levels.append(level)
+    positions = np.clip(limits, 0, None)
+    # Walk back over the blocks in which every value is below the target, largest blocks first
+    for t in reversed(range(len(levels))):
+        size = 1 << t
+        skip = (positions - size + 1 >= 1) & (levels[t][positions] < targets)
+        positions = np.where(skip, positions - size, positions)
+    return np.where((positions >= 1) & (values[positions] >= targets), positions, 0)
+
+def find_trend_windows(above, below, minimum_window=200):
+    """
+    Calculate find_trend_window for every prefix of the rows at once, as if the rows ended at each row.
+
+    Args:
+    above (numpy.ndarray): Boolean flags of the rows that closed above the EMA, oldest first.
+    below (numpy.ndarray): Boolean flags of the rows that closed below the EMA, oldest first.
+    minimum_window (int, optional): The smallest window that can stop the search. Defaults to 200.
+
+    Returns:
+    dict: The window length and the number of rows above and below the EMA in it, as arrays with one value per row.
+    """
+    rows = len(above)
+    # Running counts: the last k rows of the prefix ending at e (exclusive) hold greater[e] - greater[e - k] rows above the EMA
+    greater = np.concatenate(([0], np.cumsum(above, dtype=np.int64)))
+    less = np.concatenate(([0], np.cumsum(below, dtype=np.int64)))
+    ends = np.arange(1, rows + 1)
+    # A window starting at j dominates when both counts are positive and less <= greater / 2 or less >= 1.5 * greater,
+    # which is 2 * less - greater (or 2 * less - 3 * greater) not increasing (or not decreasing) from j to the end
+    lower_side = 2 * less - greater
+    upper_side = 2 * less - 3 * greater
+    # Both counts are positive only for the starts before the last change of either running count
+    first_start = np.minimum(np.searchsorted(greater, greater[ends]), np.searchsorted(less, less[ends]))
+    limits = np.minimum(ends - minimum_window, first_start - 1)
+    # The smallest window is the one with the latest start
+    starts = np.maximum(
+        last_at_least(lower_side, limits, lower_side[ends]),
+        last_at_least(-upper_side, limits, -upper_side[ends])
+    )
+    # Without a dominant window, the whole prefix but its first row is used
+    dft_len = np.where(starts > 0, ends - starts, np.maximum(ends - 1, 0))
+    return {
+        'dftLen': dft_len,
+        'greaterCount': greater[ends] - greater[ends - dft_len],
+        'lessCount': less[ends] - less[ends - dft_len]
     }
 
+def rolling_std(series, window, ddof=1):
+    """
+    Calculate the standard deviation of every full window of a Series without calling back into Python per window.
+    Each window is computed with the two-pass np.std, so the values are identical to
+    series.rolling(window).apply(lambda x: np.std(x, ddof=ddof), raw=True), also for very small prices
+    where the running sums of pandas' rolling().std() lose precision.
+
+    Args:
+    series (pandas.Series or pandas.DataFrame): The values (a DataFrame is handled column by column).
+    window (int): The number of values in each window.
+    ddof (int, optional): The delta degrees of freedom. Defaults to 1 (sample standard deviation).
+
+    Returns:
+    pandas.Series or pandas.DataFrame: The standard deviation of the window ending at each row, NaN for the first window - 1 rows.
+    """
+    values = series.to_numpy(dtype=np.float64)
+    deviations = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        deviations[window - 1:] = np.std(sliding_window_view(values, window, axis=0), axis=-1, ddof=ddof)
+    if isinstance(series, pd.DataFrame):
+        return pd.DataFrame(deviations, index=series.index, columns=series.columns)
+    return pd.Series(deviations, index=series.index)
+
 def calculate_cci(df):
     """
     Calculate the Commodity Channel Index (CCI) for the given DataFrame.
@@ -325,12 +426,38 @@ def calculate_cci(df):
     num_rows = df.shape[0]
     # calculate the simple moving average and CCI
     df['sma'] = df['close'].rolling(window=20).mean()
-    df['cci'] = (df['close'] - df['sma']) / (0.015 * df['close'].rolling(window=20).apply(lambda x: np.std(x, ddof=1), raw=True))
+    df['cci'] = (df['close'] - df['sma']) / (0.015 * rolling_std(df['close'], 20))
     return {
         'cci': float(df['cci'][num_rows - 1]),
         'df': df
     }
 
+def calculate_true_range(df, wilder=None):
+    """
+    Calculate the true range of every candle of the given DataFrame.
+
+    Args:
+    df (pandas.DataFrame or dict): The DataFrame containing the high, low and close columns
+        (or one 2-D array per column, one column per asset).
+    wilder (bool, optional): Use the Wilder true range, which extends the range of each candle to the previous close.
+        Defaults to config.indicator_settings['wilder_true_range'].
+
+    Returns:
+    numpy.ndarray: The true range of each candle, with the shape of the columns.
+    """
+    if wilder is None:
+        wilder = config.indicator_settings['wilder_true_range']
+    high = np.asarray(df['high'], dtype=np.float64)
+    low = np.asarray(df['low'], dtype=np.float64)
+    close = np.asarray(df['close'], dtype=np.float64)
+    if not wilder:
+        # Range of the high, low and close of each candle
+        return np.maximum(np.maximum(high, low), close) - np.minimum(np.minimum(high, low), close)
+    # The first candle has no previous close, so its true range is its high - low
+    previous_close = np.full_like(close, np.nan)
+    previous_close[1:] = close[:-1]
+    return np.fmax(high, previous_close) - np.fmin(low, previous_close)
+
 def calculate_atr(df):
     """
     Calculate the Average True Range (ATR) for the given DataFrame.
@@ -344,7 +471,7 @@ def calculate_atr(df):
     # get the number of rows in the DataFrame
     num_rows = df.shape[0]
     # Calculate the true range of each row
-    df['true_range'] = df[['high', 'low', 'close']].apply(lambda x: max(x) - min(x), axis=1)
+    df['true_range'] = calculate_true_range(df)
     # Calculate the average true range using the specified window
     df['avg_true_range'] = df['true_range'].rolling(window=12).mean().iloc[-1]
     return {
@@ -487,12 +614,12 @@ def calculate_adx(df):
     df['down'] = df['low'].diff()
     df['plusDM'] = np.where((df['up'] > df['down']) & (df['up'] > 0), df['up'], 0)
     df['minusDM'] = np.where((df['down'] > df['up']) & (df['down'] > 0), df['down'], 0)
-    df['truerange'] = df[['high', 'low', 'close']].apply(lambda x: x.max() - x.min(), axis=1)
+    df['truerange'] = calculate_true_range(df)
     df['plus'] = 100 * df['plusDM'].rolling(dilen).mean() / df['truerange'].rolling(dilen).mean()
     df['minus'] = 100 * df['minusDM'].rolling(dilen).mean() / df['truerange'].rolling(dilen).mean()
     # calculate ADX
     df['sum'] = df['plus'] + df['minus']
-    df['adx'] = 100 * np.abs(df['plus'] - df['minus']).rolling(adxlen).mean() / df['sum'].apply(lambda x: 1 if x == 0 else x).rolling(adxlen).mean()
+    df['adx'] = 100 * np.abs(df['plus'] - df['minus']).rolling(adxlen).mean() / df['sum'].mask(df['sum'] == 0, 1).rolling(adxlen).mean()
     return df['adx'][num_rows - 1]
 
 def calculate_momentum(df):
@@ -538,4 +665,121 @@ def calculate_vortex(df):
         'VIP': df['VIP'][num_rows - 1],
         'VIM': df['VIM'][num_rows - 1],
         'df': df
-    }
\ No newline at end of file
+    }
+
+class IndicatorContext:
+    """
+    Lazily calculate and memoize the indicators of one DataFrame so that every gate
+    evaluated on the same tick shares a single calculation per indicator.
+
+    Args:
+    df (pandas.DataFrame): The DataFrame containing the asset data.
+    """
+    def __init__(self, df):
+        self.df = df
+        self.cache = {}
+
+    @classmethod
+    def wrap(cls, df):
+        """
+        Return the given object if it already is an indicator context, otherwise build one for it.
+
+        Args:
+        df (pandas.DataFrame or IndicatorContext): The DataFrame or the context to wrap.
+
+        Returns:
+        IndicatorContext: The indicator context of the data.
+        """
+        return df if isinstance(df, IndicatorContext) else cls(df)
+
+    def memoize(self, key, function, *args):
+        """
+        Calculate a value the first time it is requested and return the stored value afterwards.
+
+        Args:
+        key (str): The name the value is stored under.
+        function (function): The function calculating the value.
+        *args: The arguments passed to the function.
+
+        Returns:
+        The calculated value.
+        """
+        if key not in self.cache:
+            self.cache[key] = function(*args)
+        return self.cache[key]
+
+    def macd(self):
+        return self.memoize('macd', calculate_macd, self.df)
+
+    def ema_dema(self):
+        return self.memoize('ema_dema', calculate_ema_dema, self.df)
+
+    def trend(self):
+        # Reuse the 200 period EMA of the EMA / DEMA calculation
+        return self.memoize('trend', calculate_trend, self.df, self.ema_dema()['df']['ema'])
+
+    def cci(self):
+        return self.memoize('cci', calculate_cci, self.df)
+
+    def atr(self):
+        return self.memoize('atr', calculate_atr, self.df)
+
+    def ichimoku(self):
+        return self.memoize('ichimoku', calculate_ichimoku, self.df)
+
+    def rsi(self):
+        return self.memoize('rsi', calculate_rsi, self.df)
+
+    def bollinger_bands(self):
+        return self.memoize('bollinger_bands', calculate_bollinger_bands, self.df)
+
+    def adx(self):
+        return self.memoize('adx', calculate_adx, self.df)
+
+    def momentum(self):
+        return self.memoize('momentum', calculate_momentum, self.df)
+
+    def vortex(self):
+        return self.memoize('vortex', calculate_vortex, self.df)
+
+    def average_magnitude(self, column, periods):
+        """
+        Calculate the mean absolute value of the last periods values of a calculated column.
+
+        Args:
+        column (str): The name of the column (e.g. 'macd', 'macd_hist', 'mom').
+        periods (int): The number of most recent rows to average.
+
+        Returns:
+        float: The mean absolute value.
+        """
+        return self.memoize(f'average_magnitude_{column}_{periods}', lambda: self.df[column].tail(periods).abs().mean())
+
+    def extremes(self, periods):
+        """
+        Find the rows holding the lowest and highest close of the last periods rows.
+
+        Args:
+        periods (int): The number of most recent rows to look at.
+
+        Returns:
+        dict: A dictionary containing the index of the minimum, the maximum and the most recent row.
+        """
+        def find_extremes():
+            period = self.df.tail(periods)
+            return {
+                'minIndex': period['close'].idxmin(),
+                'maxIndex': period['close'].idxmax(),
+                'currentIndex': self.df.iloc[-1].name
+            }
+        return self.memoize(f'extremes_{periods}', find_extremes)
+
+    def mark(self, column, value):
+        """
+        Record the output of a gate on the underlying DataFrame.
+
+        Args:
+        column (str): The name of the column.
+        value: The value stored in the column.
+        """
+        self.df[column] = value
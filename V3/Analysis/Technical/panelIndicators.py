@@ -0,0 +1,280 @@
+import sys
+import numpy as np
+import pandas as pd
+
+# Append the 'Analysis/Technical' folder to path and import the needed module
+sys.path.append('Analysis/Technical')
+import indicators
+
+def stack(frames):
+    """
+    Stack the candles of many assets into one 2-D array per column, one column per asset.
+    The candles are aligned on their last row: every asset keeps its own rows, shorter histories are
+    padded with NaN at the top, so each column holds exactly the candles its asset would be evaluated on alone.
+
+    Args:
+    frames (dict): The candles of each asset (pandas.DataFrame with open, high, low and close columns), keyed by asset.
+
+    Returns:
+    dict: The 2-D arrays (rows x assets) of the open, high, low and close prices.
+    """
+    rows = max((len(df) for df in frames.values()), default=0)
+    values = np.full((4, rows, len(frames)), np.nan)
+    for position, df in enumerate(frames.values()):
+        if len(df):
+            values[:, rows - len(df):, position] = df[['open', 'high', 'low', 'close']].to_numpy(dtype=np.float64).T
+    return dict(zip(('open', 'high', 'low', 'close'), values))
+
+def window(values, size, shift=0):
+    """
+    Get the last window of a 2-D array, as pandas' rolling(size) sees it on the last row after shift(shift).
+
+    Args:
+    values (numpy.ndarray): The 2-D array (rows x assets).
+    size (int): The number of rows in the window.
+    shift (int, optional): The number of rows the window is moved back. Defaults to 0.
+
+    Returns:
+    numpy.ndarray: The window (size x assets), padded with NaN where it starts before the first row.
+    """
+    stop = len(values) - shift
+    start = stop - size
+    if start >= 0:
+        return values[start:stop]
+    padded = np.full((size, values.shape[1]), np.nan)
+    if stop > 0:
+        padded[-stop:] = values[:stop]
+    return padded
+
+def last(values):
+    """
+    Get the last row of a 2-D array.
+
+    Args:
+    values (numpy.ndarray): The 2-D array (rows x assets).
+
+    Returns:
+    numpy.ndarray: The value of each asset on the last row.
+    """
+    return values[-1] if len(values) else np.full(values.shape[1], np.nan)
+
+def ewm(values, span):
+    """
+    Calculate the exponential moving average of every column, like pandas.Series.ewm(span=span).mean().
+
+    Args:
+    values (numpy.ndarray): The 2-D array (rows x assets).
+    span (int): The span of the average.
+
+    Returns:
+    numpy.ndarray: The averages (rows x assets).
+    """
+    return pd.DataFrame(values).ewm(span=span).mean().to_numpy()
+
+def flat_mean(windows):
+    """
+    Calculate the mean of every window like pandas' rolling().mean(): NaN values are left out,
+    and a window of equal values averages to exactly that value.
+
+    Args:
+    windows (numpy.ndarray): One window per row (assets x window size).
+
+    Returns:
+    numpy.ndarray: The mean of each window, NaN for a window without values.
+    """
+    count = np.sum(~np.isnan(windows), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.nansum(windows, axis=1) / np.where(count > 0, count, np.nan)
+    first = windows[np.arange(len(windows)), np.argmax(~np.isnan(windows), axis=1)] if windows.shape[1] else means
+    flat = np.nanmax(windows, axis=1, initial=-np.inf) == np.nanmin(windows, axis=1, initial=np.inf)
+    return np.where(flat & (count > 0), first, means)
+
+def column(values, position):
+    """
+    Pick the value of one asset out of (nested dictionaries of) per-asset arrays.
+
+    Args:
+    values: A per-asset array, or a dictionary of them.
+    position (int): The position of the asset in the panel.
+
+    Returns:
+    The value(s) of the asset, with the same nesting.
+    """
+    if isinstance(values, dict):
+        return {key: column(value, position) for key, value in values.items()}
+    value = values[position]
+    return value.item() if isinstance(value, np.generic) else value
+
+class PanelIndicators:
+    """
+    Batch equivalent of indicators.IndicatorContext: calculate every indicator used by the buy side gates
+    for all assets at once over the stacked candles, and return the latest value of each asset.
+    The exponential averages are calculated over the whole history of every column, the rolling indicators
+    only over their last window, since the gates only read the last row.
+
+    Args:
+    frames (dict): The candles of each asset (pandas.DataFrame), keyed by asset.
+    """
+    def __init__(self, frames):
+        self.keys = list(frames)
+        # Number of candles of each asset
+        self.lengths = np.array([len(df) for df in frames.values()], dtype=np.int64)
+        self.panel = stack(frames)
+        self.cache = {}
+
+    def memoize(self, key, function):
+        """
+        Calculate a value the first time it is requested and return the stored value afterwards.
+
+        Args:
+        key (str): The name the value is stored under.
+        function (function): The function calculating the value.
+
+        Returns:
+        The calculated value.
+        """
+        if key not in self.cache:
+            self.cache[key] = function()
+        return self.cache[key]
+
+    def macd_series(self):
+        def calculate():
+            close = self.panel['close']
+            macd = ewm(close, 12) - ewm(close, 26)
+            signal = ewm(macd, 9)
+            return {'macd': macd, 'macd_signal': signal, 'macd_hist': macd - signal}
+        return self.memoize('macd_series', calculate)
+
+    def macd(self):
+        def calculate():
+            series = self.macd_series()
+            macd = last(series['macd'])
+            signal = last(series['macd_signal'])
+            return {
+                'macd': macd,
+                'macdSignal': signal,
+                'histogram': last(series['macd_hist']),
+                'macdDirection': np.where(macd >= signal, 'long', 'short')
+            }
+        return self.memoize('macd', calculate)
+
+    def ema_dema(self):
+        def calculate():
+            ema1 = ewm(self.panel['open'], 200)
+            ema2 = ewm(ema1, 200)
+            return {'ema': last(ema1), 'dema': last(2 * ema1 - ema2), 'ema_series': ema1}
+        return self.memoize('ema_dema', calculate)
+
+    def trend(self):
+        def calculate():
+            ema = self.ema_dema()['ema_series']
+            close = self.panel['close']
+            rows = len(close)
+            if rows == 0:
+                zero = np.zeros(len(self.keys), dtype=np.int64)
+                return {'dftLen': zero, 'greaterCount': zero, 'lessCount': zero}
+            # Count the closes above / below the EMA in the last x rows for every x and every asset at once
+            greater_counts = np.cumsum((close > ema)[::-1], axis=0)
+            less_counts = np.cumsum((close < ema)[::-1], axis=0)
+            windows = np.arange(1, rows + 1)[:, None]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                imbalance = (np.abs(greater_counts - less_counts) / greater_counts) * 100.0
+            # Only the windows that fit in the asset's own history are checked, like find_trend_window
+            stops = (greater_counts > 0) & (less_counts > 0) & (imbalance >= 50) & (windows >= 200) & (windows < self.lengths[None, :])
+            has_window = self.lengths >= 2
+            stop = np.where(has_window, np.where(stops.any(axis=0), stops.argmax(axis=0), self.lengths - 2), 0)
+            assets = np.arange(len(self.keys))
+            return {
+                'dftLen': np.where(has_window, stop + 1, 0),
+                'greaterCount': np.where(has_window, greater_counts[stop, assets], 0),
+                'lessCount': np.where(has_window, less_counts[stop, assets], 0)
+            }
+        return self.memoize('trend', calculate)
+
+    def cci(self):
+        def calculate():
+            # One contiguous row per asset, so that np.std runs exactly like indicators.rolling_std
+            closes = np.ascontiguousarray(window(self.panel['close'], 20).T)
+            sma = flat_mean(closes)
+            return {'cci': (closes[:, -1] - sma) / (0.015 * np.std(closes, axis=1, ddof=1))}
+        return self.memoize('cci', calculate)
+
+    def atr(self):
+        def calculate():
+            # The Wilder true range of the first row of the window needs the close before it
+            candles = {column: window(self.panel[column], 13) for column in ('high', 'low', 'close')}
+            return {'atr': indicators.calculate_true_range(candles)[1:].mean(axis=0)}
+        return self.memoize('atr', calculate)
+
+    def ichimoku(self):
+        def calculate():
+            high = self.panel['high']
+            low = self.panel['low']
+            # The spans are shifted forward by 26 rows, so the last row shows the ranges ending 26 rows earlier
+            tenkan_sen = (window(high, 9, 26).max(axis=0) + window(low, 9, 26).min(axis=0)) / 2
+            kijun_sen = (window(high, 26, 26).max(axis=0) + window(low, 26, 26).min(axis=0)) / 2
+            senkou_span_a = (tenkan_sen + kijun_sen) / 2
+            senkou_span_b = (window(high, 52, 26).max(axis=0) + window(low, 52, 26).min(axis=0)) / 2
+            return {
+                'current': {
+                    'senkou_span_a': senkou_span_a,
+                    'senkou_span_b': senkou_span_b,
+                    'cloud_size': np.abs(senkou_span_a - senkou_span_b)
+                }
+            }
+        return self.memoize('ichimoku', calculate)
+
+    def rsi(self):
+        def calculate():
+            closes = window(self.panel['close'], 15)
+            change = closes[1:] - closes[:-1]
+            gain = np.where(change < 0, 0, change)
+            loss = np.abs(np.where(change > 0, 0, change))
+            # A window without any change has no RSI, like in pandas
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rs = gain.mean(axis=0) / loss.mean(axis=0)
+            return {'rsi': 100 - (100 / (1 + rs))}
+        return self.memoize('rsi', calculate)
+
+    def bollinger_bands(self):
+        def calculate():
+            # rolling(window=20, min_periods=0) uses whatever closes the asset has in the window
+            closes = np.ascontiguousarray(window(self.panel['close'], 20).T)
+            count = np.sum(~np.isnan(closes), axis=1)
+            basis = flat_mean(closes)
+            dev = np.sqrt(np.nansum((closes - basis[:, None]) ** 2, axis=1) / np.where(count > 1, count - 1, np.nan))
+            # pandas reports no deviation at all for a window of equal values (of at least two values, one value has no deviation)
+            dev = np.where((count > 1) & (np.nanmax(closes, axis=1, initial=-np.inf) == np.nanmin(closes, axis=1, initial=np.inf)), 0.0, dev)
+            return {
+                'basis': basis,
+                'upper': basis + 2 * dev,
+                'lower': basis - 2 * dev
+            }
+        return self.memoize('bollinger_bands', calculate)
+
+    def momentum(self):
+        def calculate():
+            close = self.panel['close']
+            mom = np.full(close.shape, np.nan)
+            mom[10:] = close[:-10] - close[10:]
+            return {'mom': last(mom), 'mom_series': mom}
+        return self.memoize('momentum', calculate)
+
+    def average_magnitude(self, column, periods):
+        """
+        Calculate the mean absolute value of the last periods values of a calculated column, for every asset.
+
+        Args:
+        column (str): The name of the column ('macd', 'macd_hist' or 'mom').
+        periods (int): The number of most recent rows to average.
+
+        Returns:
+        numpy.ndarray: The mean absolute value of each asset.
+        """
+        def calculate():
+            series = self.momentum()['mom_series'] if column == 'mom' else self.macd_series()[column]
+            # One contiguous row per asset, summed like a single Series
+            magnitudes = np.ascontiguousarray(np.abs(series[-periods:]).T)
+            count = np.sum(~np.isnan(magnitudes), axis=1)
+            return np.nansum(magnitudes, axis=1) / np.where(count > 0, count, np.nan)
+        return self.memoize(f'average_magnitude_{column}_{periods}', calculate)
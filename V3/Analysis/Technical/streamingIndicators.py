@@ -0,0 +1,444 @@
+import collections
+import math
+import sys
+import numpy as np
+
+# Append the 'Analysis/Technical' folder to path and import the needed module
+sys.path.append('Analysis/Technical')
+import indicators
+# append the config file path to sys.path
+sys.path.append('Config Files')
+import config
+
+def divide(numerator, denominator):
+    """
+    Divide two floats the way pandas does, returning inf / nan instead of raising on a zero denominator.
+
+    Args:
+    numerator (float): The numerator.
+    denominator (float): The denominator.
+
+    Returns:
+    float: The quotient.
+    """
+    try:
+        return numerator / denominator
+    except ZeroDivisionError:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator) * math.copysign(1, denominator)
+
+class ExponentialMean:
+    """
+    Streaming equivalent of pandas.Series.ewm(span=span).mean() (adjusted weights).
+
+    Args:
+    span (int): The span of the exponential moving average.
+    """
+    def __init__(self, span):
+        self.decay = 1 - 2 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+        self.value = math.nan
+
+    def update(self, value):
+        # Older observations keep decaying when a value is missing
+        self.numerator *= self.decay
+        self.denominator *= self.decay
+        if not math.isnan(value):
+            self.numerator += value
+            self.denominator += 1
+            self.value = self.numerator / self.denominator
+        return self.value
+
+class RollingWindow:
+    """
+    Streaming equivalent of pandas.Series.rolling(window=size, min_periods=min_periods).
+
+    Args:
+    size (int): The number of values in the window.
+    min_periods (int, optional): The number of valid values needed for a result. Defaults to size.
+    """
+    def __init__(self, size, min_periods=None):
+        self.size = size
+        self.min_periods = size if min_periods is None else min_periods
+        self.values = collections.deque(maxlen=size)
+        self.total = 0.0
+        self.count = 0
+        self.updates = 0
+        # The latest valid value and how many times in a row it was added, like pandas' rolling mean
+        self.same_value = math.nan
+        self.same_count = 0
+
+    def update(self, value):
+        # Drop the value leaving the window
+        if len(self.values) == self.size:
+            oldest = self.values[0]
+            if not math.isnan(oldest):
+                self.total -= oldest
+                self.count -= 1
+        self.values.append(value)
+        if not math.isnan(value):
+            self.total += value
+            self.count += 1
+            self.same_count = self.same_count + 1 if value == self.same_value else 1
+            self.same_value = value
+        # Re-sum the window once per cycle so the running total never drifts
+        self.updates += 1
+        if self.updates % self.size == 0:
+            self.total = math.fsum(x for x in self.values if not math.isnan(x))
+
+    def valid(self):
+        return self.count >= max(self.min_periods, 1)
+
+    def sum(self):
+        return self.total if self.valid() else math.nan
+
+    def mean(self):
+        if not self.valid():
+            return math.nan
+        # A window holding one value repeated is exactly that value, as in pandas
+        if self.same_count >= self.count:
+            return self.same_value
+        return self.total / self.count
+
+    def std(self):
+        # Sample standard deviation (ddof=1) computed like indicators.rolling_std
+        if not self.valid() or self.count < 2:
+            return math.nan
+        return float(np.std([x for x in self.values if not math.isnan(x)], ddof=1))
+
+class RollingExtreme:
+    """
+    Streaming rolling maximum or minimum backed by a monotonic deque.
+
+    Args:
+    size (int): The number of values in the window.
+    maximum (bool): Track the maximum if True, otherwise the minimum.
+    """
+    def __init__(self, size, maximum):
+        self.size = size
+        self.maximum = maximum
+        self.candidates = collections.deque()
+        self.missing = collections.deque()
+        self.position = -1
+
+    def update(self, value):
+        self.position += 1
+        # Forget the values that left the window
+        while self.candidates and self.candidates[0][0] <= self.position - self.size:
+            self.candidates.popleft()
+        while self.missing and self.missing[0] <= self.position - self.size:
+            self.missing.popleft()
+        if math.isnan(value):
+            self.missing.append(self.position)
+            return
+        # Values that can never be the extreme again are dropped, ties keep the oldest position
+        while self.candidates and (self.candidates[-1][1] < value if self.maximum else self.candidates[-1][1] > value):
+            self.candidates.pop()
+        self.candidates.append((self.position, value))
+
+    def count(self):
+        return min(self.position + 1, self.size) - len(self.missing)
+
+    def value(self, min_periods=None):
+        if self.count() < (self.size if min_periods is None else min_periods) or not self.candidates:
+            return math.nan
+        return self.candidates[0][1]
+
+    def index(self):
+        return self.candidates[0][0] if self.candidates else math.nan
+
+class Lag:
+    """
+    Streaming equivalent of pandas.Series.shift(periods).
+
+    Args:
+    periods (int): The number of candles to look back.
+    """
+    def __init__(self, periods):
+        self.values = collections.deque(maxlen=periods + 1)
+
+    def update(self, value):
+        self.values.append(value)
+        return self.value()
+
+    def value(self):
+        return self.values[0] if len(self.values) == self.values.maxlen else math.nan
+
+class StreamingIndicators(indicators.IndicatorContext):
+    """
+    Keep the state of every indicator used by the gates and update it in place for each new candle.
+    The latest values match the batch functions in indicators.py calculated over the same candles,
+    so the streaming state can be passed to any gate in place of a DataFrame. The one difference is that the MACD
+    values since the last turn are kept as their count and mean ('valuesCount', 'valuesMean') instead of the list
+    'values', so that the state does not grow with the length of a MACD run.
+
+    Args:
+    magnitude_periods (int, optional): The number of candles averaged by average_magnitude. Defaults to 200.
+    """
+    def __init__(self, magnitude_periods=200):
+        self.df = None
+        self.cache = {}
+        self.marks = {}
+        self.magnitude_periods = magnitude_periods
+        self.length = 0
+        self.candle = None
+        self.previous = None
+        # MACD
+        self.ema12 = ExponentialMean(12)
+        self.ema26 = ExponentialMean(26)
+        self.macd_signal = ExponentialMean(9)
+        self.macd_value = math.nan
+        self.macd_direction = ''
+        self.turn_time = ''
+        self.macd_run_count = 0
+        self.macd_run_sum = 0.0
+        # EMA / DEMA and trend
+        self.ema1 = ExponentialMean(200)
+        self.ema2 = ExponentialMean(200)
+        self.above_ema = bytearray()
+        self.below_ema = bytearray()
+        # CCI and Bollinger Bands
+        self.close20 = RollingWindow(20)
+        self.bollinger20 = RollingWindow(20, min_periods=0)
+        # ATR
+        self.true_range12 = RollingWindow(12)
+        # Ichimoku
+        self.high9 = RollingExtreme(9, True)
+        self.low9 = RollingExtreme(9, False)
+        self.high26 = RollingExtreme(26, True)
+        self.low26 = RollingExtreme(26, False)
+        self.high52 = RollingExtreme(52, True)
+        self.low52 = RollingExtreme(52, False)
+        self.span_a = Lag(26)
+        self.span_b = Lag(26)
+        # RSI
+        self.gain14 = RollingWindow(14)
+        self.loss14 = RollingWindow(14)
+        # ADX
+        self.plus_dm14 = RollingWindow(14)
+        self.minus_dm14 = RollingWindow(14)
+        self.true_range14 = RollingWindow(14)
+        self.spread14 = RollingWindow(14)
+        self.sum14 = RollingWindow(14)
+        # Momentum
+        self.close_lag10 = Lag(10)
+        self.momentum_value = math.nan
+        # Vortex
+        self.vmp7 = RollingWindow(7)
+        self.vmm7 = RollingWindow(7)
+        self.str7 = RollingWindow(7)
+        # Extremes and average magnitudes
+        self.close_high30 = RollingExtreme(30, True)
+        self.close_low30 = RollingExtreme(30, False)
+        self.magnitudes = {
+            'macd': RollingWindow(magnitude_periods, min_periods=1),
+            'macd_hist': RollingWindow(magnitude_periods, min_periods=1),
+            'mom': RollingWindow(magnitude_periods, min_periods=1)
+        }
+
+    @classmethod
+    def from_dataframe(cls, df, magnitude_periods=200):
+        """
+        Build the streaming state by replaying every candle of a DataFrame.
+
+        Args:
+        df (pandas.DataFrame): The DataFrame containing the datetime, open, high, low and close columns.
+        magnitude_periods (int, optional): The number of candles averaged by average_magnitude. Defaults to 200.
+
+        Returns:
+        StreamingIndicators: The streaming state after the last candle.
+        """
+        stream = cls(magnitude_periods)
+        for row in df[['datetime', 'open', 'high', 'low', 'close']].itertuples(index=False):
+            stream.append({'datetime': row.datetime, 'open': row.open, 'high': row.high, 'low': row.low, 'close': row.close})
+        return stream
+
+    def append(self, candle):
+        """
+        Update every indicator with a new candle.
+
+        Args:
+        candle (dict): The candle with the keys 'datetime', 'open', 'high', 'low' and 'close'.
+        """
+        open_price, high, low, close = (float(candle[key]) for key in ('open', 'high', 'low', 'close'))
+        previous = self.previous
+        previous_high = previous['high'] if previous else math.nan
+        previous_low = previous['low'] if previous else math.nan
+        previous_close = previous['close'] if previous else math.nan
+        # MACD and its direction since the last turn
+        macd = self.ema12.update(close) - self.ema26.update(close)
+        signal = self.macd_signal.update(macd)
+        self.macd_value = macd
+        if macd >= signal:
+            if self.macd_direction != 'long':
+                self.macd_run_count = 0
+                self.macd_run_sum = 0.0
+                self.turn_time = str(candle['datetime'])
+                self.macd_direction = 'long'
+            else:
+                self.macd_run_count += 1
+                self.macd_run_sum += macd
+        if macd < signal:
+            if self.macd_direction != 'short':
+                self.macd_run_count = 0
+                self.macd_run_sum = 0.0
+                self.turn_time = str(candle['datetime'])
+                self.macd_direction = 'short'
+            else:
+                self.macd_run_count += 1
+                self.macd_run_sum += macd
+        self.magnitudes['macd'].update(abs(macd))
+        self.magnitudes['macd_hist'].update(abs(macd - signal))
+        # EMA / DEMA of the open and the closes above / below it
+        ema = self.ema1.update(open_price)
+        self.ema2.update(ema)
+        self.above_ema.append(close > ema)
+        self.below_ema.append(close < ema)
+        # CCI and Bollinger Bands
+        self.close20.update(close)
+        self.bollinger20.update(close)
+        # True range shared by the ATR and the ADX
+        if config.indicator_settings['wilder_true_range']:
+            true_range = (high if math.isnan(previous_close) else max(high, previous_close)) - (low if math.isnan(previous_close) else min(low, previous_close))
+        else:
+            true_range = max(high, low, close) - min(high, low, close)
+        self.true_range12.update(true_range)
+        self.true_range14.update(true_range)
+        # Ichimoku
+        for window in (self.high9, self.high26, self.high52):
+            window.update(high)
+        for window in (self.low9, self.low26, self.low52):
+            window.update(low)
+        tenkan_sen = (self.high9.value() + self.low9.value()) / 2
+        kijun_sen = (self.high26.value() + self.low26.value()) / 2
+        self.span_a.update((tenkan_sen + kijun_sen) / 2)
+        self.span_b.update((self.high52.value() + self.low52.value()) / 2)
+        # RSI
+        change = close - previous_close
+        self.gain14.update(0.0 if change < 0 else change)
+        self.loss14.update(0.0 if change > 0 else abs(change))
+        # ADX
+        up = high - previous_high
+        down = low - previous_low
+        self.plus_dm14.update(up if up > down and up > 0 else 0.0)
+        self.minus_dm14.update(down if down > up and down > 0 else 0.0)
+        average_true_range = self.true_range14.mean()
+        plus = divide(100 * self.plus_dm14.mean(), average_true_range)
+        minus = divide(100 * self.minus_dm14.mean(), average_true_range)
+        self.spread14.update(abs(plus - minus))
+        self.sum14.update(1.0 if plus + minus == 0 else plus + minus)
+        # Momentum
+        self.momentum_value = self.close_lag10.update(close) - close
+        self.magnitudes['mom'].update(abs(self.momentum_value))
+        # Vortex, missing previous values count as 0 in the true range like add(fill_value=0)
+        self.vmp7.update(abs(high - previous_low))
+        self.vmm7.update(abs(low - previous_high))
+        close_high = abs(close - previous_high)
+        close_low = abs(close - previous_low)
+        self.str7.update(abs(high - low) + (0.0 if math.isnan(close_high) else close_high) + (0.0 if math.isnan(close_low) else close_low))
+        # Recent extremes of the close
+        self.close_high30.update(close)
+        self.close_low30.update(close)
+        self.previous = {'high': high, 'low': low, 'close': close}
+        self.candle = candle
+        self.length += 1
+        # The previous results no longer describe the latest candle
+        self.cache = {}
+        self.marks = {}
+
+    def macd(self):
+        return self.memoize('macd', lambda: {
+            'macd': self.macd_value,
+            'macdSignal': self.macd_signal.value,
+            'histogram': self.macd_value - self.macd_signal.value,
+            'macdDirection': self.macd_direction,
+            'turnTime': self.turn_time,
+            'periodSinceTurn': config.string_to_epoch(self.turn_time),
+            'valuesCount': self.macd_run_count,
+            'valuesMean': self.macd_run_sum / self.macd_run_count if self.macd_run_count else math.nan
+        })
+
+    def ema_dema(self):
+        return self.memoize('ema_dema', lambda: {
+            'ema': float(self.ema1.value),
+            'dema': float(2 * self.ema1.value - self.ema2.value)
+        })
+
+    def trend(self):
+        return self.memoize('trend', lambda: indicators.find_trend_window(
+            np.frombuffer(self.above_ema, dtype=np.bool_),
+            np.frombuffer(self.below_ema, dtype=np.bool_)
+        ))
+
+    def cci(self):
+        return self.memoize('cci', lambda: {
+            'cci': float(divide(self.previous['close'] - self.close20.mean(), 0.015 * self.close20.std()))
+        })
+
+    def atr(self):
+        return self.memoize('atr', lambda: {
+            'atr': float(self.true_range12.mean())
+        })
+
+    def ichimoku(self):
+        def current():
+            senkou_span_a = self.span_a.value()
+            senkou_span_b = self.span_b.value()
+            return {
+                'current': {
+                    'senkou_span_a': senkou_span_a,
+                    'senkou_span_b': senkou_span_b,
+                    'cloud_size': abs(senkou_span_a - senkou_span_b)
+                }
+            }
+        return self.memoize('ichimoku', current)
+
+    def rsi(self):
+        return self.memoize('rsi', lambda: {
+            'rsi': 100 - divide(100, 1 + divide(self.gain14.mean(), self.loss14.mean()))
+        })
+
+    def bollinger_bands(self):
+        def bands():
+            basis = self.bollinger20.mean()
+            dev = self.bollinger20.std()
+            return {
+                'basis': basis,
+                'upper': basis + 2 * dev,
+                'lower': basis - 2 * dev
+            }
+        return self.memoize('bollinger_bands', bands)
+
+    def adx(self):
+        return self.memoize('adx', lambda: divide(100 * self.spread14.mean(), self.sum14.mean()))
+
+    def momentum(self):
+        return self.memoize('momentum', lambda: {
+            'mom': self.momentum_value
+        })
+
+    def vortex(self):
+        return self.memoize('vortex', lambda: {
+            'VIP': divide(self.vmp7.sum(), self.str7.mean()),
+            'VIM': divide(self.vmm7.sum(), self.str7.mean())
+        })
+
+    def average_magnitude(self, column, periods):
+        if column not in self.magnitudes or periods != self.magnitude_periods:
+            raise ValueError(f'The streaming state only averages {list(self.magnitudes)} over {self.magnitude_periods} candles.')
+        return self.magnitudes[column].mean()
+
+    def extremes(self, periods):
+        if periods != self.close_high30.size:
+            raise ValueError(f'The streaming state only tracks the extremes of the last {self.close_high30.size} candles.')
+        # Candles are indexed by their position, like a DataFrame read from a CSV file
+        return {
+            'minIndex': self.close_low30.index(),
+            'maxIndex': self.close_high30.index(),
+            'currentIndex': self.length - 1
+        }
+
+    def mark(self, column, value):
+        self.marks[column] = value
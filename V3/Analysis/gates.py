@@ -1,6 +1,8 @@
 import json
 import cloudscraper
 import sys
+import numpy as np
+import pandas as pd
 
 # Append the 'Config Files' folder to path and import the needed module
 sys.path.append('Config Files')
@@ -8,6 +10,7 @@ import config
 # Append the 'Analysis/Technical' folder to path and import the needed module
 sys.path.append('Analysis/Technical')
 import indicators
+import panelIndicators
 
 scraper = cloudscraper.create_scraper()
 
@@ -16,26 +19,28 @@ def ema_gate(df, asset_price, data):
     Check if conditions for long or short trade based on EMA and DEMA are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with keys 'long' and 'short' and values indicating 
           whether conditions for long and short trades, respectively, are met.
     """
+    # Share the indicator calculations with the other gates
+    context = indicators.IndicatorContext.wrap(df)
     # Check if atr should be included
     if data['long_criteria']:
         # get current asset price and ATR
-        longATR = indicators.calculate_atr(df)['atr']
+        longATR = context.atr()['atr']
     else:
         longATR = 0
     # Check if atr should be included
     if data['short_criteria']:
         # get current asset price and ATR
-        shortATR = indicators.calculate_atr(df)['atr']
+        shortATR = context.atr()['atr']
     else:
         shortATR = 0
     # calculate EMA and DEMA
-    assetEMA = indicators.calculate_ema_dema(df)
+    assetEMA = context.ema_dema()
     # assume that conditions for long and short trades are not met
     emaLong = False
     emaShort = False
@@ -45,8 +50,8 @@ def ema_gate(df, asset_price, data):
     # check if conditions for short trade are met
     if asset_price < assetEMA['ema'] - shortATR:
         emaShort = True
-    df['EMA Long'] = emaLong
-    df['EMA Short'] = emaShort
+    context.mark('EMA Long', emaLong)
+    context.mark('EMA Short', emaShort)
     # return results as a dictionary
     return {
         'long': emaLong, 
@@ -65,14 +70,15 @@ def ichimoku_gate(df, asset_price, data=None):
     Check if conditions for long or short trade based on Ichimoku Cloud are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with keys 'long' and 'short' and values indicating 
           whether conditions for long and short trades, respectively, are met.
     """
     # calculate Ichimoku Cloud values
-    assetICHIMOKU = indicators.calculate_ichimoku(df)
+    context = indicators.IndicatorContext.wrap(df)
+    assetICHIMOKU = context.ichimoku()
     # assume that conditions for long and short trades are not met
     ichimokuLong = False
     ichimokuShort = False
@@ -82,8 +88,8 @@ def ichimoku_gate(df, asset_price, data=None):
     # check if conditions for short trade are met
     if asset_price < assetICHIMOKU['current']['senkou_span_a'] and asset_price < assetICHIMOKU['current']['senkou_span_b']:
         ichimokuShort = True
-    df['ICHIMOKU Long'] = ichimokuLong
-    df['ICHIMOKU Short'] = ichimokuShort
+    context.mark('ICHIMOKU Long', ichimokuLong)
+    context.mark('ICHIMOKU Short', ichimokuShort)
     # return results as a dictionary
     return {
         'long': ichimokuLong, 
@@ -101,14 +107,15 @@ def cci_gate(df, data):
     Check if conditions for long or short trade based on CCI are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with keys 'long' and 'short' and values indicating 
           whether conditions for long and short trades, respectively, are met.
     """
     # calculate CCI
-    assetCCI = indicators.calculate_cci(df)
+    context = indicators.IndicatorContext.wrap(df)
+    assetCCI = context.cci()
     # assume that conditions for long and short trades are not met
     cciShort = False
     cciLong = False
@@ -117,8 +124,8 @@ def cci_gate(df, data):
         cciShort = True
     if assetCCI['cci'] > data['long_criteria']:
         cciLong = True
-    df['CCI Long'] = cciLong
-    df['CCI Short'] = cciShort
+    context.mark('CCI Long', cciLong)
+    context.mark('CCI Short', cciShort)
     # return results as a dictionary
     return {
         'long': cciLong, 
@@ -133,14 +140,15 @@ def rsi_gate(df, data):
     Check if conditions for long or short trade based on RSI are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with keys 'long' and 'short' and values indicating 
           whether conditions for long and short trades, respectively, are met.
     """
     # calculate RSI
-    assetRSI = indicators.calculate_rsi(df)
+    context = indicators.IndicatorContext.wrap(df)
+    assetRSI = context.rsi()
     # assume that conditions for long and short trades are not met
     rsiLong = False
     rsiShort = False
@@ -150,8 +158,8 @@ def rsi_gate(df, data):
     # check if conditions for short trade are met
     if assetRSI['rsi'] < data['short_criteria']:
         rsiShort = True
-    df['RSI Long'] = rsiLong
-    df['RSI Short'] = rsiShort
+    context.mark('RSI Long', rsiLong)
+    context.mark('RSI Short', rsiShort)
     # return results as a dictionary
     return {
         'long': rsiLong, 
@@ -166,14 +174,15 @@ def trend_gate(df, data):
     Check if conditions for long or short trade based on custom criteria are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with keys 'long' and 'short' and values indicating 
           whether conditions for long and short trades, respectively, are met.
     """
     # calculate custom criteria
-    assetTrend = indicators.calculate_trend(df)
+    context = indicators.IndicatorContext.wrap(df)
+    assetTrend = context.trend()
     # assume that conditions for long and short trades are not met
     trendLong = False
     trendShort = False
@@ -183,8 +192,8 @@ def trend_gate(df, data):
     # check if conditions for short trade are met
     if assetTrend['lessCount'] * data['short_criteria'] / 10 >= assetTrend['greaterCount']:
         trendShort = True
-    df['TREND Long'] = trendLong
-    df['TREND Short'] = trendShort
+    context.mark('TREND Long', trendLong)
+    context.mark('TREND Short', trendShort)
     # return results as a dictionary
     return {
         'long': trendLong, 
@@ -200,19 +209,20 @@ def direction_gate(df):
     Determine the direction to trade based on MACD direction.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with key 'attempting' and value indicating the trade direction.
     """
     # calculate MACD
-    assetMACD = indicators.calculate_macd(df)
+    context = indicators.IndicatorContext.wrap(df)
+    assetMACD = context.macd()
     # determine the trade direction
     if assetMACD['macdDirection'] == 'long':
         attempting = 'long'
     if assetMACD['macdDirection'] == 'short':
         attempting = 'short'
-    df['attempting'] = attempting
+    context.mark('attempting', attempting)
     # return the trade direction
     return {'attempting': attempting}
 
@@ -221,15 +231,16 @@ def momentum_gate(df, data=None):
     Check if conditions for long or short trades based on momentum are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with keys 'long' and 'short' and values indicating 
           whether conditions for long and short trades, respectively, are met.
     """
     # calculate momentum for the asset
-    assetMomentum = indicators.calculate_momentum(df)
-    avgMomentum = df['mom'].tail(200).abs().mean()
+    context = indicators.IndicatorContext.wrap(df)
+    assetMomentum = context.momentum()
+    avgMomentum = context.average_magnitude('mom', 200)
     # assume that conditions for long and short trades are not met
     momLong = False
     momShort = False
@@ -237,8 +248,8 @@ def momentum_gate(df, data=None):
     if abs(assetMomentum['mom']) > avgMomentum:
         momLong = True
         momShort = True
-    df['MOM Long'] = momLong
-    df['MOM Short'] = momShort
+    context.mark('MOM Long', momLong)
+    context.mark('MOM Short', momShort)
     # return results as a dictionary
     return {
         'long': momLong,
@@ -253,16 +264,17 @@ def macd_gate(df, data=None):
     Check if conditions for long or short trade based on MACD are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with keys 'long' and 'short' and values indicating 
           whether conditions for long and short trades, respectively, are met.
     """
     # calculate MACD
-    assetMACD = indicators.calculate_macd(df)
-    avgMACD = df['macd'].tail(200).abs().mean()
-    avgHist = df['macd_hist'].tail(200).abs().mean()
+    context = indicators.IndicatorContext.wrap(df)
+    assetMACD = context.macd()
+    avgMACD = context.average_magnitude('macd', 200)
+    avgHist = context.average_magnitude('macd_hist', 200)
     # assume that conditions for long and short trades are not met
     macdLong = False
     macdShort = False
@@ -272,10 +284,10 @@ def macd_gate(df, data=None):
     # check if conditions for short trade are met
     if assetMACD['histogram'] < 0 and abs(assetMACD['histogram']) > avgHist and abs(assetMACD['macd']) >= avgMACD:
         macdShort = True
-    df['AVG MACD'] = avgMACD
-    df['AVG HIST'] = avgHist
-    df['MACD Long'] = macdLong
-    df['MACD Short'] = macdShort
+    context.mark('AVG MACD', avgMACD)
+    context.mark('AVG HIST', avgHist)
+    context.mark('MACD Long', macdLong)
+    context.mark('MACD Short', macdShort)
     # return results as a dictionary
     return {
         'long': macdLong, 
@@ -293,31 +305,30 @@ def extreme_gate(df, data=None):
     Check if conditions for long or short trades based on recent extremum are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with keys 'long' and 'short' and values indicating 
           whether conditions for long and short trades, respectively, are met.
     """
-    # get the most recent 30 days of data
-    period = df.tail(30)
-    # get the index of the minimum close price in the period
-    minIndex = period['close'].idxmin()
-    # get the index of the maximum close price in the period
-    maxIndex = period['close'].idxmax()
-    # get the most recent data point
-    mostRecent = df.iloc[-1]
+    # get the index of the minimum and maximum close price of the most recent 30 days of data
+    context = indicators.IndicatorContext.wrap(df)
+    assetExtremes = context.extremes(30)
+    minIndex = assetExtremes['minIndex']
+    maxIndex = assetExtremes['maxIndex']
+    # get the index of the most recent data point
+    currentIndex = assetExtremes['currentIndex']
     # assume that conditions for long and short trades are not met
     extremeLong = False
     extremeShort = False
     # check if the most recent data point is a new low
-    if minIndex == mostRecent.name:
+    if minIndex == currentIndex:
         extremeShort = True
     # check if the most recent data point is a new high
-    if maxIndex == mostRecent.name:
+    if maxIndex == currentIndex:
         extremeLong = True
-    df['EXTREME Long'] = extremeLong
-    df['EXTREME Short'] = extremeShort
+    context.mark('EXTREME Long', extremeLong)
+    context.mark('EXTREME Short', extremeShort)
     # return results as a dictionary
     return {
         'long': extremeLong,
@@ -325,7 +336,7 @@ def extreme_gate(df, data=None):
         'data': {
             'minIndex': minIndex,
             'maxIndex': maxIndex,
-            'currentIndex': mostRecent.name
+            'currentIndex': currentIndex
         }
     }
 
@@ -334,14 +345,15 @@ def adx_gate(df, data=None):
     Check if conditions for long or short trades based on ADX are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
 
     Returns:
     dict: A dictionary with keys 'long' and 'short' and values indicating 
           whether conditions for long and short trades, respectively, are met.
     """
     # calculate ADX for the asset
-    adx = indicators.calculate_adx(df)
+    context = indicators.IndicatorContext.wrap(df)
+    adx = context.adx()
     # assume that conditions for long and short trades are not met
     adxLong = False
     adxShort = False
@@ -349,8 +361,8 @@ def adx_gate(df, data=None):
     if adx >= 25:
         adxLong = True
         adxShort = True
-    df['ADX Long'] = adxLong
-    df['ADX Short'] = adxShort
+    context.mark('ADX Long', adxLong)
+    context.mark('ADX Short', adxShort)
     # return results as a dictionary
     return {
         'long': adxLong, 
@@ -365,7 +377,7 @@ def bollinger_gate(df, asset_price, data=None):
     Check if conditions for long or short trades based on Bollinger Bands are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
     asset_price (float): Current price of the asset.
 
     Returns:
@@ -373,7 +385,8 @@ def bollinger_gate(df, asset_price, data=None):
           whether conditions for long and short trades, respectively, are met.
     """
     # calculate Bollinger Bands for the asset
-    assetBollinger = indicators.calculate_bollinger_bands(df)
+    context = indicators.IndicatorContext.wrap(df)
+    assetBollinger = context.bollinger_bands()
     # assume that conditions for long and short trades are not met
     bollingerLong = False
     bollingerShort = False
@@ -382,8 +395,8 @@ def bollinger_gate(df, asset_price, data=None):
         bollingerLong = True
     if asset_price < assetBollinger['lower'] and asset_price < assetBollinger['upper']:
         bollingerShort = True    
-    df['BOLLINGER Long'] = bollingerLong
-    df['BOLLINGER Short'] = bollingerShort
+    context.mark('BOLLINGER Long', bollingerLong)
+    context.mark('BOLLINGER Short', bollingerShort)
     # return results as a dictionary
     return {
         'long': bollingerLong, 
@@ -399,7 +412,7 @@ def vortex_gate(df, data=None):
     Check if conditions for long or short trade based on Vortex Indicator values are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
     data (dict, optional): Additional data used to calculate the Vortex Indicator.
                            Defaults to None.
 
@@ -408,7 +421,8 @@ def vortex_gate(df, data=None):
           whether conditions for long and short trades, respectively, are met.
     """
     # Calculate Vortex Indicator values
-    assetVortex = indicators.calculate_vortex(df)
+    context = indicators.IndicatorContext.wrap(df)
+    assetVortex = context.vortex()
     # Assume that conditions for long and short trades are not met
     vortexLong = False
     vortexShort = False
@@ -417,8 +431,8 @@ def vortex_gate(df, data=None):
         vortexLong = True
     if assetVortex['VIP'] < assetVortex['VIM']:
         vortexShort = True
-    df['VORTEX Long'] = vortexLong
-    df['VORTEX Short'] = vortexShort
+    context.mark('VORTEX Long', vortexLong)
+    context.mark('VORTEX Short', vortexShort)
     # Return the results as a dictionary
     return {
         'long': vortexLong, 
@@ -434,7 +448,7 @@ def cloud_gate(df, asset_price, data):
     Check if conditions for long or short trade based on Ichimoku Cloud size are met.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing asset data.
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
     asset_price (float): The current price of the asset.
 
     Returns:
@@ -442,7 +456,8 @@ def cloud_gate(df, asset_price, data):
           whether conditions for long and short trades, respectively, are met.
     """
     # Calculate Ichimoku Cloud values
-    assetICHIMOKU = indicators.calculate_ichimoku(df)
+    context = indicators.IndicatorContext.wrap(df)
+    assetICHIMOKU = context.ichimoku()
     # Assume that conditions for long and short trades are not met
     cloudLong = False
     cloudShort = False
@@ -451,8 +466,8 @@ def cloud_gate(df, asset_price, data):
         cloudLong = True
     if assetICHIMOKU['current']['cloud_size'] > (data['short_criteria'] * asset_price) / 100.0:
         cloudShort = True
-    df['CLOUD Long'] = cloudLong
-    df['CLOUD Short'] = cloudShort
+    context.mark('CLOUD Long', cloudLong)
+    context.mark('CLOUD Short', cloudShort)
     # Return the results as a dictionary
     return {
         'long': cloudLong, 
@@ -464,6 +479,234 @@ def cloud_gate(df, asset_price, data):
         }
     }
 
+# The gates checked by buySide.make_decision, in order. The first set only reads the candles,
+# the second also compares the current price of the asset
+gate_set1 = [macd_gate, rsi_gate, cci_gate, trend_gate, momentum_gate]
+gate_set2 = [ichimoku_gate, ema_gate, bollinger_gate, cloud_gate]
+
+def evaluate(df, asset_data, gate_criteria):
+    """
+    Check every buy side gate for the direction given by the direction gate.
+
+    Parameters:
+    df (pandas.DataFrame or indicators.IndicatorContext): DataFrame containing asset data, or its indicator context.
+    asset_data (dict): The data of the asset, with its 'asset_price' and 'gate_bypass'.
+    gate_criteria (dict): The gate settings (config.gate_settings).
+
+    Returns:
+    dict: A dictionary with the keys 'order_type' (the direction), 'decision' (True if no gate failed)
+          and 'gates' (the output and data of every gate that was not bypassed).
+    """
+    context = indicators.IndicatorContext.wrap(df)
+    # Get direction of trade attempt
+    order_type = direction_gate(context)['attempting']
+    # Assume that buy is true until proven otherwise
+    buy = True
+    # Initialize the gates dictionary which will be filled with gate outputs
+    gates_dictionary = {}
+    # Check if any of the gate functions return false for the specified order type
+    for gate in gate_set1 + gate_set2:
+        if gate.__name__ not in asset_data['gate_bypass']:
+            if gate in gate_set1:
+                gate_data = gate(context, gate_criteria[gate.__name__])
+            else:
+                gate_data = gate(context, asset_data['asset_price'], gate_criteria[gate.__name__])
+            buy = False if gate_data[order_type] == False else buy
+            gates_dictionary[gate.__name__] = {
+                'output': gate_data[order_type],
+                'data': gate_data['data']
+            }
+    return {
+        'order_type': order_type,
+        'decision': buy,
+        'gates': gates_dictionary
+    }
+
+def gate_conditions(values, price, gate_criteria):
+    """
+    Check the conditions of the buy side gates on arrays of indicator values, one comparison per gate and direction.
+    The comparisons against NaN are False, like in the gate functions.
+
+    Parameters:
+    values (dict): The arrays of the indicator values: macd, histogram, avgMACD, avgHist, rsi, cci, greaterCount, lessCount,
+                   mom, avgMom, senkou_span_a, senkou_span_b, ema, dema and atr, lower and upper (Bollinger Bands).
+    price (numpy.ndarray): The price compared to the indicators.
+    gate_criteria (dict): The gate settings (config.gate_settings).
+
+    Returns:
+    dict: The 'long' and 'short' flags and the 'data' of every gate, as arrays.
+    """
+    with np.errstate(invalid='ignore'):
+        strong_macd = (np.abs(values['histogram']) > values['avgHist']) & (np.abs(values['macd']) >= values['avgMACD'])
+        mom = np.abs(values['mom'])
+        cloud_size = np.abs(values['senkou_span_a'] - values['senkou_span_b'])
+        zero = np.zeros(len(price))
+        long_atr = values['atr'] if gate_criteria['ema_gate']['long_criteria'] else zero
+        short_atr = values['atr'] if gate_criteria['ema_gate']['short_criteria'] else zero
+        return {
+            'macd_gate': {
+                'long': (values['histogram'] > 0) & strong_macd,
+                'short': (values['histogram'] < 0) & strong_macd,
+                'data': {'macd': values['macd'], 'histogram': values['histogram'], 'avgMACD': values['avgMACD'], 'avgHist': values['avgHist']}
+            },
+            'rsi_gate': {
+                'long': values['rsi'] > gate_criteria['rsi_gate']['long_criteria'],
+                'short': values['rsi'] < gate_criteria['rsi_gate']['short_criteria'],
+                'data': {'rsi': values['rsi']}
+            },
+            'cci_gate': {
+                'long': values['cci'] > gate_criteria['cci_gate']['long_criteria'],
+                'short': values['cci'] < gate_criteria['cci_gate']['short_criteria'],
+                'data': {'cci': values['cci']}
+            },
+            'trend_gate': {
+                'long': values['greaterCount'] * gate_criteria['trend_gate']['long_criteria'] / 10 >= values['lessCount'],
+                'short': values['lessCount'] * gate_criteria['trend_gate']['short_criteria'] / 10 >= values['greaterCount'],
+                'data': {'greaterCount': values['greaterCount'], 'lessCount': values['lessCount']}
+            },
+            'momentum_gate': {
+                'long': mom > values['avgMom'],
+                'short': mom > values['avgMom'],
+                'data': {'assetMomentum': mom}
+            },
+            'ichimoku_gate': {
+                'long': (price > values['senkou_span_a']) & (price > values['senkou_span_b']),
+                'short': (price < values['senkou_span_a']) & (price < values['senkou_span_b']),
+                'data': {'current': {'senkou_span_a': values['senkou_span_a'], 'senkou_span_b': values['senkou_span_b']}}
+            },
+            'ema_gate': {
+                'long': price > values['ema'] + long_atr,
+                'short': price < values['ema'] - short_atr,
+                'data': {'ema': values['ema'], 'dema': values['dema'], 'longATR': long_atr, 'shortATR': short_atr}
+            },
+            'bollinger_gate': {
+                'long': (price > values['lower']) & (price > values['upper']),
+                'short': (price < values['lower']) & (price < values['upper']),
+                'data': {'lower': values['lower'], 'upper': values['upper']}
+            },
+            'cloud_gate': {
+                'long': cloud_size > (gate_criteria['cloud_gate']['long_criteria'] * price) / 100.0,
+                'short': cloud_size > (gate_criteria['cloud_gate']['short_criteria'] * price) / 100.0,
+                'data': {'cloud_size': {'current': cloud_size}}
+            }
+        }
+
+def evaluate_panel(frames, asset_prices, gate_criteria):
+    """
+    Evaluate the gates of buySide.make_decision for many assets at once.
+    The indicators are calculated column by column over the stacked candles of all the assets
+    and every gate condition is checked with one array comparison, with the same outcome as calling the gates per asset.
+
+    Parameters:
+    frames (dict): The candles of each asset (pandas.DataFrame), keyed by asset.
+    asset_prices (dict): The current price of each asset, with the same keys.
+    gate_criteria (dict): The gate settings (config.gate_settings).
+
+    Returns:
+    dict: A dictionary with the keys 'keys' (the assets, in the order of the arrays), 'attempting' (the direction of each asset)
+          and 'gates', which holds for every gate the 'long' and 'short' flags of each asset and the 'data' of each asset as arrays.
+    """
+    context = panelIndicators.PanelIndicators(frames)
+    price = np.array([asset_prices[key] for key in context.keys], dtype=np.float64)
+    macd = context.macd()
+    trend = context.trend()
+    ichimoku = context.ichimoku()['current']
+    ema = context.ema_dema()
+    bollinger = context.bollinger_bands()
+    values = {
+        'macd': macd['macd'],
+        'histogram': macd['histogram'],
+        'avgMACD': context.average_magnitude('macd', 200),
+        'avgHist': context.average_magnitude('macd_hist', 200),
+        'rsi': context.rsi()['rsi'],
+        'cci': context.cci()['cci'],
+        'greaterCount': trend['greaterCount'],
+        'lessCount': trend['lessCount'],
+        'mom': context.momentum()['mom'],
+        'avgMom': context.average_magnitude('mom', 200),
+        'senkou_span_a': ichimoku['senkou_span_a'],
+        'senkou_span_b': ichimoku['senkou_span_b'],
+        'ema': ema['ema'],
+        'dema': ema['dema'],
+        'atr': context.atr()['atr'],
+        'lower': bollinger['lower'],
+        'upper': bollinger['upper']
+    }
+    return {
+        'keys': context.keys,
+        'attempting': macd['macdDirection'],
+        'gates': gate_conditions(values, price, gate_criteria)
+    }
+
+def indicator_series(df):
+    """
+    Calculate the indicator values read by the buy side gates on every row of a DataFrame, as if the candles ended at that row.
+    Every indicator only looks back, so one pass over the DataFrame gives the same values as recalculating them after each new candle.
+
+    Parameters:
+    df (pandas.DataFrame): DataFrame containing asset data.
+
+    Returns:
+    dict: A dictionary with the keys 'values' (the arrays of the indicator values, see gate_conditions), 'long'
+          (True on the rows where the MACD attempts a long) and 'close' (the close of each row).
+    """
+    df = df[['datetime', 'open', 'high', 'low', 'close']].reset_index(drop=True)
+    indicators.calculate_macd(df)
+    indicators.calculate_ema_dema(df)
+    indicators.calculate_rsi(df)
+    indicators.calculate_cci(df)
+    indicators.calculate_ichimoku(df)
+    indicators.calculate_bollinger_bands(df)
+    indicators.calculate_momentum(df)
+    close = df['close'].to_numpy()
+    ema = df['ema'].to_numpy()
+    trend = indicators.find_trend_windows(close > ema, close < ema)
+    # The average magnitudes of the gates cover the last 200 rows of each prefix
+    average = lambda column: df[column].abs().rolling(window=200, min_periods=1).mean().to_numpy()
+    values = {
+        'macd': df['macd'].to_numpy(),
+        'histogram': df['macd_hist'].to_numpy(),
+        'avgMACD': average('macd'),
+        'avgHist': average('macd_hist'),
+        'rsi': df['rsi'].to_numpy(),
+        'cci': df['cci'].to_numpy(),
+        'greaterCount': trend['greaterCount'],
+        'lessCount': trend['lessCount'],
+        'mom': df['mom'].to_numpy(),
+        'avgMom': average('mom'),
+        'senkou_span_a': df['senkou_span_a'].to_numpy(),
+        'senkou_span_b': df['senkou_span_b'].to_numpy(),
+        'ema': ema,
+        'dema': df['dema'].to_numpy(),
+        'atr': pd.Series(indicators.calculate_true_range(df)).rolling(window=12).mean().to_numpy(),
+        'lower': df['lower'].to_numpy(),
+        'upper': df['upper'].to_numpy()
+    }
+    return {
+        'values': values,
+        'long': (df['macd'] >= df['macd_signal']).to_numpy(),
+        'close': close
+    }
+
+def evaluate_series(df, gate_criteria):
+    """
+    Evaluate the gates of buySide.make_decision on every row of a DataFrame, as if the candles ended at that row
+    and the price of the asset was its close.
+
+    Parameters:
+    df (pandas.DataFrame): DataFrame containing asset data.
+    gate_criteria (dict): The gate settings (config.gate_settings).
+
+    Returns:
+    dict: A dictionary with the keys 'attempting' (the direction on each row) and 'gates', which holds
+          for every gate the 'long' and 'short' flags and the 'data' of each row as arrays.
+    """
+    series = indicator_series(df)
+    return {
+        'attempting': np.where(series['long'], 'long', 'short'),
+        'gates': gate_conditions(series['values'], series['close'], gate_criteria)
+    }
+
 def fundamental_gate(asset_type, data):
     """
     This function checks if the current value classification of crypto market is within the allowed range specified by the user,
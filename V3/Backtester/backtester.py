@@ -0,0 +1,310 @@
+import json
+import os
+import sys
+import time
+import numpy as np
+
+# Append the 'Analysis' folder to path and import the needed module
+sys.path.append('Analysis')
+import gates
+# Append the 'Analysis/Technical' folder to path and import the needed module
+sys.path.append('Analysis/Technical')
+import streamingIndicators
+# Append the 'Config Files' folder to path and import the needed module
+sys.path.append('Config Files')
+import config
+# Append the 'Brokers/Simulated' folder to path and import the needed module
+sys.path.append('Brokers/Simulated')
+import simBroker
+# Append the 'Market Monitor' folder to path and import the needed module
+sys.path.append('Market Monitor')
+import sellSide
+
+def backtest_asset(asset_name, asset_type, timeframe):
+    """
+    Build the asset data of a backtested asset from the backtest settings.
+
+    Parameters:
+    asset_name (str): The name of the asset.
+    asset_type (str): The type of the asset ('crypto' or 'stock').
+    timeframe (str): The timeframe of the candles.
+
+    Returns:
+    dict: The asset data, with the fields read by the gates, the exit rules and the broker.
+    """
+    return {
+        'id': f'backtest-backtest-{asset_name}{timeframe}',
+        'asset_name': asset_name,
+        'asset_type': asset_type,
+        'timeframe': timeframe,
+        'asset_price': None,
+        'amount': config.backtest['amount'],
+        'multiplier': config.backtest['multiplier'],
+        'slippage_percent': config.backtest['slippage_percent'],
+        'take_profit_percent': config.backtest['take_profit_percent'],
+        'gate_bypass': config.backtest['gate_bypass'],
+        'fundamental_gate': config.backtest['fundamental_gate'],
+        'last_action_order_type': 'None',
+        'last_action_price': None
+    }
+
+class Replay:
+    """
+    Replay candles bar by bar through the buy side gates and the sell side exit rules,
+    sending the orders to a simulated broker. Every bar is one price tick at the close of the candle.
+
+    Parameters:
+    asset_data (dict): The asset data (see backtest_asset).
+    broker (simBroker.SimulatedBroker): The broker the orders are sent to.
+    gate_criteria (dict): The gate settings (config.gate_settings).
+    """
+    def __init__(self, asset_data, broker, gate_criteria):
+        self.asset_data = asset_data
+        self.broker = broker
+        self.gate_criteria = gate_criteria
+        self.gate_names = [gate.__name__ for gate in gates.gate_set1 + gates.gate_set2 if gate.__name__ not in asset_data['gate_bypass']]
+        # 'buy' while looking for an entry, 'sell' while a position is open, 'reset' until the MACD turns after an exit
+        self.side = 'buy'
+        self.position = None
+
+    def tick(self, bar_time, asset_price, histogram, ema, entry):
+        """
+        Process one bar.
+
+        Parameters:
+        bar_time (str): The time of the bar.
+        asset_price (float): The close of the bar.
+        histogram (float): The MACD histogram on the bar.
+        ema (float): The EMA of the exit rules on the bar.
+        entry (function): Returns the order type and the decision of the gates on the bar.
+
+        Returns:
+        bool: True if the gates were evaluated on the bar.
+        """
+        if self.side == 'sell':
+            if self.position.on_tick(asset_price, ema):
+                self.close(bar_time, asset_price)
+            return False
+        if self.side == 'reset':
+            # Like config.reset, wait for the MACD histogram to leave the direction of the last order
+            order_type = self.asset_data['last_action_order_type']
+            if (order_type == 'long' and histogram > 0) or (order_type == 'short' and histogram < 0):
+                return False
+            self.side = 'buy'
+        order_type, decision = entry()
+        # Confirm that position can be opened (long crypto, short crypto, long stock)
+        if decision and not (order_type == 'short' and self.asset_data['asset_type'] == 'stock'):
+            self.open(bar_time, asset_price, order_type)
+        return True
+
+    def open(self, bar_time, asset_price, order_type):
+        """
+        Open a position at the close of the bar and start applying the exit rules to it.
+        """
+        asset_data = dict(self.asset_data, asset_price=asset_price)
+        data_log = {'asset_data': asset_data, 'flag': 'buy', 'order_type': order_type, 'check_time': bar_time}
+        self.broker.handle_order(data_log)
+        self.asset_data = dict(asset_data, last_action_order_type=order_type, last_action_price=asset_price)
+        self.position = sellSide.Position(self.asset_data)
+        self.side = 'sell'
+
+    def close(self, bar_time, asset_price):
+        """
+        Close the position at the close of the bar and wait for the MACD to turn before the next entry.
+        """
+        data_log = self.position.data_log
+        data_log['asset_data'] = dict(self.asset_data, asset_price=asset_price)
+        data_log['asset_price'] = asset_price
+        data_log['check_time'] = bar_time
+        self.broker.handle_order(data_log)
+        self.position = None
+        self.side = 'reset'
+
+def replay_series(replay, df):
+    """
+    Replay the candles with the gate outputs of every bar calculated in one pass (gates.evaluate_series).
+
+    Parameters:
+    replay (Replay): The replay state.
+    df (pandas.DataFrame): The candles.
+
+    Returns:
+    tuple: The gate outputs of every bar (see gates.evaluate_series) and the flags of the bars on which the gates were evaluated.
+    """
+    evaluation = gates.evaluate_series(df, replay.gate_criteria)
+    return evaluation, replay_evaluation(replay, evaluation, df['close'].to_numpy(), df['datetime'].astype(str).to_numpy())
+
+def replay_evaluation(replay, evaluation, closes, times):
+    """
+    Replay bars whose gate outputs are already calculated.
+
+    Parameters:
+    replay (Replay): The replay state.
+    evaluation (dict): The gate outputs of every bar (see gates.evaluate_series).
+    closes (numpy.ndarray): The close of every bar.
+    times (numpy.ndarray): The time of every bar.
+
+    Returns:
+    numpy.ndarray: The flags of the bars on which the gates were evaluated.
+    """
+    attempting = evaluation['attempting'].tolist()
+    long_entries = np.logical_and.reduce([evaluation['gates'][name]['long'] for name in replay.gate_names] + [evaluation['attempting'] == 'long']).tolist()
+    short_entries = np.logical_and.reduce([evaluation['gates'][name]['short'] for name in replay.gate_names] + [evaluation['attempting'] == 'short']).tolist()
+    histogram = evaluation['gates']['macd_gate']['data']['histogram'].tolist()
+    ema = evaluation['gates']['ema_gate']['data']['ema'].tolist()
+    closes = closes.tolist()
+    times = times.tolist()
+    evaluated = np.zeros(len(closes), dtype=bool)
+    for i in range(len(closes)):
+        entry = lambda: (attempting[i], long_entries[i] or short_entries[i])
+        evaluated[i] = replay.tick(times[i], closes[i], histogram[i], ema[i], entry)
+    return evaluated
+
+def replay_streaming(replay, df):
+    """
+    Replay the candles through the streaming indicators, calling the gate functions of buySide on every bar.
+    Much slower than replay_series, it serves as a reference for it.
+
+    Parameters:
+    replay (Replay): The replay state.
+    df (pandas.DataFrame): The candles.
+
+    Returns:
+    tuple: The gate outputs of the evaluated bars, in the direction attempted, and the flags of the bars on which the gates were evaluated.
+    """
+    stream = streamingIndicators.StreamingIndicators()
+    outputs = {name: np.zeros(len(df), dtype=bool) for name in replay.gate_names}
+    attempting = np.empty(len(df), dtype=object)
+    evaluated = np.zeros(len(df), dtype=bool)
+    for i, row in enumerate(df[['datetime', 'open', 'high', 'low', 'close']].itertuples(index=False)):
+        candle = {'datetime': row.datetime, 'open': row.open, 'high': row.high, 'low': row.low, 'close': row.close}
+        stream.append(candle)
+        def entry():
+            evaluation = gates.evaluate(stream, dict(replay.asset_data, asset_price=row.close), replay.gate_criteria)
+            attempting[i] = evaluation['order_type']
+            for name, gate in evaluation['gates'].items():
+                outputs[name][i] = gate['output'] == True
+            return evaluation['order_type'], evaluation['decision']
+        evaluated[i] = replay.tick(str(row.datetime), row.close, stream.macd()['histogram'], stream.ema_dema()['ema'], entry)
+    gate_outputs = {name: {'long': outputs[name], 'short': outputs[name]} for name in replay.gate_names}
+    return {'attempting': attempting, 'gates': gate_outputs}, evaluated
+
+def backtest(df, asset_data, gate_criteria=None, broker=None, streaming=False):
+    """
+    Backtest the buy side gates and the sell side exit rules on historical candles.
+
+    Parameters:
+    df (pandas.DataFrame): The candles, oldest first.
+    asset_data (dict): The asset data (see backtest_asset).
+    gate_criteria (dict, optional): The gate settings. Defaults to config.gate_settings.
+    broker (simBroker.SimulatedBroker, optional): The broker the orders are sent to. Defaults to a new one with the backtest fee.
+    streaming (bool, optional): Replay through the streaming indicators and the gate functions instead of
+                                the gate outputs calculated in one pass. Defaults to False.
+
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': the report: the trades, the PnL, the win rate, the hit rate of every gate and the throughput.
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    try:
+        gate_criteria = config.gate_settings if gate_criteria is None else gate_criteria
+        broker = simBroker.SimulatedBroker(config.backtest['fee_percent']) if broker is None else broker
+        df = df.reset_index(drop=True)
+        replay = Replay(asset_data, broker, gate_criteria)
+        started = time.perf_counter()
+        evaluation, evaluated = (replay_streaming if streaming else replay_series)(replay, df)
+        elapsed = time.perf_counter() - started
+        # Hit rate of every gate: how often it passed, in the direction attempted, on the bars the gates were evaluated
+        is_long = evaluation['attempting'] == 'long'
+        gate_report = {}
+        for name in replay.gate_names:
+            passed = np.where(is_long, evaluation['gates'][name]['long'], evaluation['gates'][name]['short']) & evaluated
+            gate_report[name] = {
+                'evaluations': int(evaluated.sum()),
+                'passes': int(passed.sum()),
+                'hit_rate': float(passed.sum() / evaluated.sum()) if evaluated.any() else 0.0
+            }
+        trades = broker.trades
+        return {
+            'data': {
+                'asset': asset_data['asset_name'],
+                'timeframe': asset_data['timeframe'],
+                'bars': len(df),
+                'seconds': elapsed,
+                'bars_per_second': len(df) / elapsed if elapsed > 0 else float('inf'),
+                'trades': trades,
+                'open_position': broker.entry,
+                'pnl': sum(trade['pnl'] for trade in trades),
+                'win_rate': sum(trade['pnl'] > 0 for trade in trades) / len(trades) if trades else 0.0,
+                'gates': gate_report
+            },
+            'msg': 'success'
+        }
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'backtester.py',
+                'function': 'backtest',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        config.log_error(json.dumps(error))
+        return error
+
+def print_report(report):
+    """
+    Print a backtest report.
+
+    Parameters:
+    report (dict): The report returned by backtest.
+    """
+    print(f"{report['asset']} {report['timeframe']}: {report['bars']} bars in {report['seconds']:.2f}s ({report['bars_per_second']:,.0f} bars/s)")
+    print(f"{len(report['trades'])} trades, PnL {report['pnl']:.2f}, win rate {report['win_rate'] * 100:.1f}%")
+    for trade in report['trades']:
+        print(f"  {trade['order_type']:<5} {trade['entry_time']} @ {trade['entry_price']} -> {trade['exit_time']} @ {trade['exit_price']}  {trade['return_percent']:+.2f}%  {trade['pnl']:+.2f}")
+    print('Gate hit rates:')
+    for name, gate in report['gates'].items():
+        print(f"  {name:<15} {gate['passes']:>8} / {gate['evaluations']:<8} {gate['hit_rate'] * 100:6.2f}%")
+
+def parse_file_name(file_name):
+    """
+    Get the asset and the timeframe of a candle file, which is named after them (e.g. 'BTC1h.candles').
+
+    Parameters:
+    file_name (str): The path of the candle file.
+
+    Returns:
+    tuple: The name of the asset and the timeframe.
+    """
+    name = os.path.splitext(os.path.basename(file_name))[0]
+    timeframe = next((timeframe for timeframe in sorted(config.timeframe_converter, key=len, reverse=True) if name.endswith(timeframe)), '')
+    return name[:len(name) - len(timeframe)], timeframe
+
+def asset_type(asset_name):
+    """
+    Get the type of a backtested asset: the crypto assets of the config are 'crypto', any other asset is a 'stock'.
+
+    Parameters:
+    asset_name (str): The name of the asset.
+
+    Returns:
+    str: The type of the asset.
+    """
+    return 'crypto' if asset_name in config.leveragable_crypto + config.non_leveragable_crypto else 'stock'
+
+def main():
+    # Backtest every candle file given on the command line, e.g. 'Program Files/CSV Files/BTC1h.candles'
+    for file_name in sys.argv[1:]:
+        df = config.read_dataframe(file_name)
+        if df['msg'] != 'success':
+            print(f'Could not read {file_name}')
+            continue
+        asset_name, timeframe = parse_file_name(file_name)
+        report = backtest(df['data'], backtest_asset(asset_name, asset_type(asset_name), timeframe))
+        if report['msg'] == 'success':
+            print_report(report['data'])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+import copy
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+# Append the 'Analysis' folder to path and import the needed module
+sys.path.append('Analysis')
+import gates
+# Append the 'Config Files' folder to path and import the needed module
+sys.path.append('Config Files')
+import config
+# Append the 'Brokers/Simulated' folder to path and import the needed module
+sys.path.append('Brokers/Simulated')
+import simBroker
+# Append the 'Backtester' folder to path and import the needed module
+sys.path.append('Backtester')
+import backtester
+
+# Indicator series of the swept candles, attached by each worker: (asset data, arrays by name) per candle file
+datasets = []
+# Shared memory segments the arrays of the datasets live in
+segments = []
+
+def grid_variants(grid, samples=None, seed=None):
+    """
+    List the variants of the gate settings in a grid, or a random sample of them.
+
+    Parameters:
+    grid (dict): The values tried for each setting, keyed by '<gate>.<criteria>' (e.g. 'rsi_gate.long_criteria').
+    samples (int, optional): The number of variants drawn at random from the grid. Defaults to the whole grid.
+    seed (int, optional): The seed of the random sample. Defaults to None.
+
+    Returns:
+    list: The variants, each a dictionary of one value per setting.
+    """
+    keys = list(grid)
+    sizes = [len(grid[key]) for key in keys]
+    total = int(np.prod(sizes))
+    if samples is None or samples >= total:
+        return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+    # Draw positions in the grid and decode them, instead of listing every combination of a large grid
+    variants = []
+    for position in random.Random(seed).sample(range(total), samples):
+        variant = {}
+        for key, size in zip(reversed(keys), reversed(sizes)):
+            position, index = divmod(position, size)
+            variant[key] = grid[key][index]
+        variants.append({key: variant[key] for key in keys})
+    return variants
+
+def apply_variant(gate_criteria, variant):
+    """
+    Apply a variant to the gate settings.
+
+    Parameters:
+    gate_criteria (dict): The gate settings (config.gate_settings).
+    variant (dict): The values of the swept settings, keyed by '<gate>.<criteria>'.
+
+    Returns:
+    dict: A copy of the gate settings with the values of the variant.
+    """
+    gate_criteria = copy.deepcopy(gate_criteria)
+    for key, value in variant.items():
+        gate, criteria = key.split('.')
+        gate_criteria[gate][criteria] = value
+    return gate_criteria
+
+def share(frames):
+    """
+    Calculate the indicator series of every candle file once and copy them into shared memory.
+
+    Parameters:
+    frames (list): The (asset data, candles) of every candle file.
+
+    Returns:
+    list: The description of every dataset, to attach it with attach: (asset data, segment name, array names, number of rows).
+    """
+    descriptions = []
+    for asset_data, df in frames:
+        series = gates.indicator_series(df)
+        arrays = dict(series['values'], long=series['long'], close=series['close'])
+        # The times are only kept to date the trades, as seconds since the epoch
+        arrays['time'] = (pd.to_datetime(df['datetime']) - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+        names = list(arrays)
+        memory = shared_memory.SharedMemory(create=True, size=max(1, len(names) * len(df) * 8))
+        segments.append(memory)
+        np.ndarray((len(names), len(df)), dtype=np.float64, buffer=memory.buf)[:] = [np.asarray(arrays[name], dtype=np.float64) for name in names]
+        descriptions.append((asset_data, memory.name, names, len(df)))
+    return descriptions
+
+def attach(descriptions):
+    """
+    Attach the shared indicator series in a worker, read-only.
+
+    Parameters:
+    descriptions (list): The descriptions returned by share.
+    """
+    for asset_data, name, names, rows in descriptions:
+        # The segments are removed by the process that created them (see release), never by a worker when it exits
+        if sys.version_info >= (3, 13):
+            memory = shared_memory.SharedMemory(name, track=False)
+        else:
+            memory = shared_memory.SharedMemory(name)
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        segments.append(memory)
+        arrays = np.ndarray((len(names), rows), dtype=np.float64, buffer=memory.buf)
+        arrays.flags.writeable = False
+        datasets.append((asset_data, dict(zip(names, arrays))))
+
+def release():
+    """
+    Remove the shared memory segments created by share.
+    """
+    while segments:
+        memory = segments.pop()
+        memory.close()
+        if sys.version_info < (3, 13):
+            # A worker sharing our resource tracker unregistered the segment when it attached, register it again so that unlink finds it
+            resource_tracker.register(memory._name, 'shared_memory')
+        memory.unlink()
+    datasets.clear()
+
+def run_variant(variant):
+    """
+    Backtest one variant of the gate settings on every attached dataset. Only the threshold comparisons
+    of the gates are made per variant, the indicator series are the shared ones.
+
+    Parameters:
+    variant (dict): The values of the swept settings, keyed by '<gate>.<criteria>'.
+
+    Returns:
+    dict: The variant and its results over all the datasets: trades, pnl, win_rate and max_drawdown (the largest fall of the cumulative PnL, as a negative number).
+    """
+    gate_criteria = apply_variant(config.gate_settings, variant)
+    trades = []
+    for asset_data, arrays in datasets:
+        evaluation = {
+            'attempting': np.where(arrays['long'] == 1, 'long', 'short'),
+            'gates': gates.gate_conditions(arrays, arrays['close'], gate_criteria)
+        }
+        broker = simBroker.SimulatedBroker(config.backtest['fee_percent'])
+        backtester.replay_evaluation(backtester.Replay(asset_data, broker, gate_criteria), evaluation, arrays['close'], arrays['time'])
+        trades += broker.trades
+    pnl = np.cumsum([trade['pnl'] for trade in sorted(trades, key=lambda trade: trade['exit_time'])])
+    return dict(
+        variant,
+        trades=len(trades),
+        pnl=float(pnl[-1]) if len(trades) else 0.0,
+        win_rate=sum(trade['pnl'] > 0 for trade in trades) / len(trades) if trades else 0.0,
+        max_drawdown=float(np.min(pnl - np.maximum.accumulate(np.maximum(pnl, 0)))) if len(trades) else 0.0
+    )
+
+def sweep(frames, grid, samples=None, seed=None, workers=None, metric='pnl'):
+    """
+    Backtest variants of the gate settings in parallel and rank them.
+    The indicator series are calculated once and shared read-only with the worker processes.
+
+    Parameters:
+    frames (list): The (asset data, candles) of every candle file (see backtester.backtest_asset).
+    grid (dict): The values tried for each setting, keyed by '<gate>.<criteria>'.
+    samples (int, optional): The number of variants drawn at random from the grid. Defaults to the whole grid.
+    seed (int, optional): The seed of the random sample. Defaults to None.
+    workers (int, optional): The number of worker processes. Defaults to the number of CPUs.
+    metric (str, optional): The result the variants are ranked by, highest first. Defaults to 'pnl'.
+
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': the ranked results (pandas.DataFrame), one row per variant.
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    try:
+        variants = grid_variants(grid, samples, seed)
+        workers = workers or os.cpu_count()
+        try:
+            descriptions = share(frames)
+            with ProcessPoolExecutor(max_workers=workers, initializer=attach, initargs=(descriptions,)) as executor:
+                results = list(executor.map(run_variant, variants, chunksize=max(1, len(variants) // (workers * 4))))
+        finally:
+            release()
+        results = pd.DataFrame(results).sort_values(metric, ascending=False, kind='stable').reset_index(drop=True)
+        return {
+            'data': results,
+            'msg': 'success'
+        }
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'sweep.py',
+                'function': 'sweep',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        config.log_error(json.dumps(error))
+        return error
+
+def main():
+    # Sweep the gate settings over every candle file given on the command line, e.g. 'Program Files/CSV Files/BTC1h.candles'
+    frames = []
+    for file_name in sys.argv[1:]:
+        df = config.read_dataframe(file_name)
+        if df['msg'] != 'success':
+            print(f'Could not read {file_name}')
+            continue
+        asset_name, timeframe = backtester.parse_file_name(file_name)
+        frames.append((backtester.backtest_asset(asset_name, backtester.asset_type(asset_name), timeframe), df['data']))
+    if not frames:
+        return
+    started = time.perf_counter()
+    results = sweep(frames, config.backtest['sweep_grid'], config.backtest['sweep_samples'], workers=config.backtest['sweep_workers'], metric=config.backtest['sweep_metric'])
+    if results['msg'] == 'success':
+        results['data'].to_csv(config.backtest['sweep_results'], index=False)
+        print(f"{len(results['data'])} variants in {time.perf_counter() - started:.1f}s, results written to {config.backtest['sweep_results']}")
+        print(results['data'].head(10).to_string())
+
+if __name__ == '__main__':
+    main()
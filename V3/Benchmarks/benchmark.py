@@ -0,0 +1,49 @@
+import time
+
+def best_time(function, repeat=3):
+    """
+    Time a function, keeping the fastest of a few runs.
+
+    Parameters:
+    function (function): The function to time, called without arguments.
+    repeat (int, optional): The number of runs. Defaults to 3.
+
+    Returns:
+    float: The fastest run, in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def format_time(seconds):
+    """
+    Format a duration with a readable unit.
+
+    Parameters:
+    seconds (float): The duration, in seconds.
+
+    Returns:
+    str: The duration in µs, ms or s.
+    """
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.1f} µs'
+    if seconds < 1:
+        return f'{seconds * 1e3:.1f} ms'
+    return f'{seconds:.2f} s'
+
+def print_table(header, rows):
+    """
+    Print the results of a benchmark as an aligned table.
+
+    Parameters:
+    header (list): The column names.
+    rows (list): The rows, one list of values per row.
+    """
+    rows = [[str(value) for value in row] for row in rows]
+    widths = [max(len(str(name)), *(len(row[column]) for row in rows)) for column, name in enumerate(header)]
+    print('  '.join(str(name).rjust(width) for name, width in zip(header, widths)))
+    for row in rows:
+        print('  '.join(value.rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,24 @@
+import sys
+
+# Run from the V3 folder: python3 Benchmarks/macdBenchmark.py
+# Append the 'Analysis/Technical' folder to path and import the needed module
+sys.path.append('Analysis/Technical')
+import indicators
+# Append the 'Tests' folder to path and import the needed modules
+sys.path.append('Tests')
+import baseline
+from candles import random_candles
+from benchmark import best_time, format_time, print_table
+
+def main():
+    # Time calculate_macd against the row by row implementation it replaced
+    rows = []
+    for size in (500, 10_000, 100_000):
+        df = random_candles(size)
+        before = best_time(lambda: baseline.calculate_macd(df.copy()), repeat=1 if size > 10_000 else 3)
+        after = best_time(lambda: indicators.calculate_macd(df.copy()))
+        rows.append([f'{size:,}', format_time(before), format_time(after), f'{before / after:.0f}x'])
+    print_table(['rows', 'iterrows', 'vectorized', 'speedup'], rows)
+
+if __name__ == '__main__':
+    main()
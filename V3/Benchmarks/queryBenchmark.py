@@ -0,0 +1,133 @@
+import os
+import sys
+import tempfile
+import time
+
+# Run from the V3 folder: python3 Benchmarks/queryBenchmark.py [assets] [signals]
+# Append the 'Config Files' folder to path and import the needed module
+sys.path.append('Config Files')
+import config
+# Append the 'Database' folder to path and import the needed module
+sys.path.append('Database')
+import database
+from benchmark import format_time, print_table
+
+def use_database(file_name):
+    """
+    Point the database module at an empty database with the current schema.
+
+    Parameters:
+    file_name (str): The path of the database file.
+    """
+    database.databaseFile = file_name
+    # Open a new connection on the next query
+    database.local.pid = None
+    for table_name, columns in database.tables.items():
+        database.create_table(table_name, columns)
+        database.create_indexes(table_name)
+
+def fill(assets, signals, users):
+    """
+    Insert generated assets, users and signals.
+
+    Parameters:
+    assets (int): The number of assets.
+    signals (int): The number of signals.
+    users (int): The number of users the assets and signals are spread over.
+    """
+    api_keys = [f'{number:032x}' for number in range(users)]
+    cursor = database.get_cursor()
+    with cursor.connection:
+        cursor.executemany("INSERT INTO users VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+            (f'user{number}@mail.com', f'user{number}', 'password', '', api_key, '1', '', '')
+            for number, api_key in enumerate(api_keys)
+        ])
+        cursor.executemany(f"INSERT INTO assets VALUES ({', '.join('?' * 18)})", [
+            (f'A{number}1h-{api_keys[number % users]}', f'A{number}', 1.0, 'buy', 'true', f'A{number}1h', 'crypto', 100, 1, '1h', 0.025, 0.25, '', 'None', 'long', 'None', 'false', 'mux')
+            for number in range(assets)
+        ])
+        cursor.executemany(f"INSERT INTO signals VALUES ({', '.join('?' * 14)})", (
+            (None, api_keys[number % users], f'A{number % assets}1h', f'A{number % assets}', 'crypto', 'buy', 'long', 1.0, 100, 1, 1, 0, '2023-01-01 00:00:00', '{}')
+            for number in range(signals)
+        ))
+    return api_keys
+
+def measure(function, *args):
+    """
+    Run a function once, counting the SELECT statements it sends to the database.
+
+    Parameters:
+    function (function): The function to run.
+    *args: The arguments of the function.
+
+    Returns:
+    tuple: The number of queries and the time taken, in seconds.
+    """
+    queries = [0]
+    connection = database.get_cursor().connection
+    connection.set_trace_callback(lambda statement: queries.__setitem__(0, queries[0] + statement.lstrip().upper().startswith('SELECT')))
+    started = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - started
+    connection.set_trace_callback(None)
+    return queries[0], elapsed
+
+# The getters as they were before, reading the table once and then every record again by its key
+
+def old_get_assets():
+    return {asset_id: config.asset_from_row(database.select_by_value('assets', 'id', asset_id)[0]) for asset_id in [asset['id'] for asset in database.select_all('assets')]}
+
+def old_get_asset(api_key):
+    return_dict = {}
+    for asset_name in [asset['asset'] for asset in database.select_all('assets')]:
+        for asset in database.select_by_value('assets', 'asset', asset_name):
+            if api_key in asset['id']:
+                return_dict[asset_name] = config.asset_from_row(asset)
+    return return_dict
+
+def old_get_users():
+    return {api_key: database.select_by_value('users', 'api_key', api_key) for api_key in [user['api_key'] for user in database.select_all('users')]}
+
+def old_get_signals():
+    return {signal_id: database.select_by_value('signals', 'id', signal_id) for signal_id in [signal['id'] for signal in database.select_all('signals')]}
+
+def old_get_signal(api_key):
+    return_dict = {}
+    for signal_id in [signal['id'] for signal in database.select_all('signals')]:
+        signal = database.select_by_value('signals', 'id', signal_id)
+        if api_key in signal[0]['api_key']:
+            return_dict[signal_id] = signal
+    return return_dict
+
+def main():
+    assets = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    signals = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    users = 1_000
+    with tempfile.TemporaryDirectory() as directory:
+        use_database(os.path.join(directory, 'database.db'))
+        started = time.perf_counter()
+        api_keys = fill(assets, signals, users)
+        print(f'{assets:,} assets, {users:,} users and {signals:,} signals inserted in {time.perf_counter() - started:.1f}s')
+        rows = []
+        for name, before, after, args in (
+            ('get_assets', old_get_assets, config.get_assets, ()),
+            ('get_asset', old_get_asset, config.get_asset, (api_keys[7],)),
+            ('get_users', old_get_users, config.get_users, ()),
+            ('get_signals', old_get_signals, config.get_signals, ()),
+            ('get_signal', old_get_signal, config.get_signal, (api_keys[7],)),
+            ('get_signals page', None, config.get_signals, (signals // 2, config.api_server['page_limit'])),
+            ('get_signal page', None, config.get_signal, (api_keys[7], signals // 2, config.api_server['page_limit']))
+        ):
+            before_queries, before_time = measure(before, *args) if before else (None, None)
+            after_queries, after_time = measure(after, *args)
+            rows.append([
+                name,
+                f'{before_queries:,}' if before else '-',
+                format_time(before_time) if before else '-',
+                f'{after_queries:,}',
+                format_time(after_time)
+            ])
+        print_table(['getter', 'queries before', 'time before', 'queries after', 'time after'], rows)
+
+if __name__ == '__main__':
+    main()
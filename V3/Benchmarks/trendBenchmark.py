@@ -0,0 +1,30 @@
+import sys
+
+# Run from the V3 folder: python3 Benchmarks/trendBenchmark.py
+# Append the 'Analysis/Technical' folder to path and import the needed module
+sys.path.append('Analysis/Technical')
+import indicators
+# Append the 'Tests' folder to path and import the needed modules
+sys.path.append('Tests')
+import baseline
+from candles import balanced_candles
+from benchmark import best_time, format_time, print_table
+
+def main():
+    # Time calculate_trend against the tail scan it replaced as the history grows. The candles have no
+    # dominant window, which is the worst case of both: every window size is checked
+    rows = []
+    for size in (500, 1_000, 2_000, 5_000, 10_000, 100_000):
+        df = balanced_candles(size)
+        before = best_time(lambda: baseline.calculate_trend(df.copy()), repeat=1) if size <= 10_000 else None
+        after = best_time(lambda: indicators.calculate_trend(df.copy()))
+        rows.append([
+            f'{size:,}',
+            format_time(before) if before else '-',
+            format_time(after),
+            f'{before / after:.0f}x' if before else '-'
+        ])
+    print_table(['rows', 'tail scan', 'cumulative counts', 'speedup'], rows)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+import sys
+
+# Run from the V3 folder: python3 Benchmarks/trueRangeBenchmark.py
+# Append the 'Analysis/Technical' folder to path and import the needed module
+sys.path.append('Analysis/Technical')
+import indicators
+# Append the 'Tests' folder to path and import the needed modules
+sys.path.append('Tests')
+import baseline
+from candles import random_candles
+from benchmark import best_time, format_time, print_table
+
+def main():
+    # Time calculate_atr and calculate_adx, with both true range modes, against the row by row implementations they replaced
+    default = indicators.config.indicator_settings['wilder_true_range']
+    rows = []
+    for size in (500, 10_000, 100_000):
+        df = random_candles(size)
+        repeat = 1 if size > 10_000 else 3
+        for name, before_function, after_function in (
+            ('atr', baseline.calculate_atr, indicators.calculate_atr),
+            ('adx', baseline.calculate_adx, indicators.calculate_adx)
+        ):
+            before = best_time(lambda: before_function(df.copy()), repeat=repeat)
+            timings = []
+            for wilder in (False, True):
+                indicators.config.indicator_settings['wilder_true_range'] = wilder
+                timings.append(best_time(lambda: after_function(df.copy())))
+            indicators.config.indicator_settings['wilder_true_range'] = default
+            rows.append([name, f'{size:,}', format_time(before), format_time(timings[0]), f'{before / timings[0]:.0f}x', format_time(timings[1])])
+    print_table(['indicator', 'rows', 'apply', 'numpy', 'speedup', 'numpy wilder'], rows)
+
+if __name__ == '__main__':
+    main()
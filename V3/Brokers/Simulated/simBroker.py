@@ -0,0 +1,60 @@
+class SimulatedBroker:
+    """
+    Stand-in for orderManager.handle_order that fills every order at once, at the asset price moved by the slippage
+    the way orderManager prices its orders, and keeps the fills and the closed trades.
+
+    Parameters:
+    fee_percent (float, optional): The fee charged on the traded value of each fill, in percent. Defaults to 0.
+    """
+    def __init__(self, fee_percent=0.0):
+        self.fee_percent = fee_percent
+        self.fills = []
+        self.trades = []
+        # Fill of the entry of the open position
+        self.entry = None
+
+    def handle_order(self, data_log):
+        """
+        Fill an order.
+
+        Parameters:
+        data_log (dict): The order information, as sent to orderManager.handle_order.
+
+        Returns:
+        dict: a dictionary containing the status of the operation and any relevant data.
+            The dictionary has the following keys:
+                'data': the fill of the order.
+                'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+        """
+        asset_data = data_log['asset_data']
+        # Account for slippage in asset_price like orderManager
+        slippage_percent = asset_data['slippage_percent'] if (data_log['order_type'] == 'long' and data_log['flag'] == 'buy') or (data_log['order_type'] == 'short' and data_log['flag'] == 'sell') else asset_data['slippage_percent'] - (asset_data['slippage_percent'] * 2)
+        asset_price = round(((100 + slippage_percent) * asset_data['asset_price']) / 100.0, 5)
+        size = asset_data['amount'] * asset_data['multiplier']
+        fill = {
+            'time': data_log['check_time'],
+            'flag': data_log['flag'],
+            'order_type': data_log['order_type'],
+            'price': asset_price,
+            'fee': size * self.fee_percent / 100.0
+        }
+        self.fills.append(fill)
+        if data_log['flag'] == 'buy':
+            self.entry = fill
+        elif self.entry is not None:
+            direction = 1 if self.entry['order_type'] == 'long' else -1
+            return_percent = direction * (asset_price - self.entry['price']) / self.entry['price'] * 100.0
+            self.trades.append({
+                'order_type': self.entry['order_type'],
+                'entry_time': self.entry['time'],
+                'exit_time': fill['time'],
+                'entry_price': self.entry['price'],
+                'exit_price': asset_price,
+                'return_percent': return_percent,
+                'pnl': size * return_percent / 100.0 - self.entry['fee'] - fill['fee']
+            })
+            self.entry = None
+        return {
+            'data': fill,
+            'msg': 'success'
+        }
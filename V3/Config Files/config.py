@@ -14,6 +14,8 @@ from eth_utils import to_checksum_address
 sys.path.append('Database')
 import database
 import recommendations
+import candleStore
+import authCache
 # Append the 'Analysis' folder to path and import the needed module
 sys.path.append('Analysis')
 import gates
@@ -35,37 +37,6 @@ stock_market_hours = {
 }
 
 # Gate settings
-gate_settings = {
-    'ema_gate': {
-        # Determine if atr should be included
-        'long_criteria': True,
-        'short_criteria': True
-    },
-    'cci_gate': {
-        # Values to compare CCI to
-        'long_criteria': 100,
-        'short_criteria': -100
-    },
-    'rsi_gate': {
-        # Values to compare RSI to
-        'long_criteria': 65,
-        'short_criteria': 35
-    },
-    'trend_gate': {
-        # Ratio minimum for long / shorts in last 200 periods
-        'long_criteria': 30,
-        'short_criteria': 30
-    },
-    'cloud_gate': {
-        # Percent minimum for size of current ichimoku cloud
-        'long_criteria': .1,
-        'short_criteria': .1
-    },
-    'fundamental_gate': {
-        'crypto': {
-            'allowed_fear_and_greed': ['Fear', 'Extreme Fear', 'Neutral']
-        }, 
-        'stocks': {
 gate_settings = {
     'ema_gate': {
         # Determine if atr should be included
@@ -197,6 +168,146 @@ crypto = {
     'price_url': 'https://app.mux.network/api/liquidityAsset'
 }
 
+# Price snapshot settings
+price_snapshot = {
+    # Minimum number of seconds between two downloads of the same upstream source
+    'refresh_interval': 5,
+    # Number of seconds after which a snapshot price is no longer served
+    'stale_after': 30,
+    # Number of stocks requested per quote call
+    'stock_batch_size': 50
+}
+
+# Asynchronous fetch settings
+async_fetch = {
+    # Maximum number of open connections in the shared HTTP pool
+    'connection_limit': 100,
+    # Default maximum number of concurrent requests to one host
+    'per_host_limit': 10,
+    # Hosts with a stricter concurrency limit
+    'host_limits': {
+        'api.twelvedata.com': 4
+    },
+    # Number of attempts per request
+    'retries': 5,
+    # Backoff before retry n is a random delay up to min(backoff_cap, backoff_base * 2^n) seconds
+    'backoff_base': 0.5,
+    'backoff_cap': 30,
+    # Number of seconds before a request times out
+    'timeout': 15
+}
+
+# Shared memory price board written by dataManager and read by the monitors
+price_board = {
+    # Name of the shared memory segment
+    'name': 'proffitable_price_board',
+    # Number of asset slots
+    'slots': 4096
+}
+
+# Number of long-lived worker processes evaluating the buy side gates
+worker_pools = {
+    'buySide': 8
+}
+
+# Market monitor settings
+market_monitor = {
+    # Number of seconds between two data refreshes (prices, candles and the asset table)
+    'refresh_interval': 5,
+    # Number of seconds between two rounds of entry evaluations
+    'entry_interval': 10,
+    # Number of seconds an entry evaluation may run before its worker is replaced
+    'entry_job_timeout': 300,
+    # Evaluate the buy side gates of all the assets of a timeframe in one batch instead of one job per asset
+    'panel_entries': False,
+    # Number of seconds between two syncs of the open positions
+    'exit_sync_interval': 10,
+    # Number of threads running the database and candle file work
+    'io_workers': 16
+}
+
+# Indicator settings
+indicator_settings = {
+    # Use the Wilder true range (including the gap from the previous close) in the ATR and the ADX
+    # instead of the range of the high, low and close of each candle
+    'wilder_true_range': False
+}
+
+# Backtest settings, used for the assets replayed by the backtester
+backtest = {
+    'amount': 100,
+    'multiplier': 1,
+    'slippage_percent': .025,
+    'take_profit_percent': .25,
+    'gate_bypass': '',
+    'fundamental_gate': 'false',
+    # Fee charged on the traded value of each fill, in percent
+    'fee_percent': 0.0,
+    # Values tried for each gate setting by the sweep, keyed by '<gate>.<criteria>'
+    'sweep_grid': {
+        'rsi_gate.long_criteria': [55, 60, 65, 70, 75],
+        'rsi_gate.short_criteria': [25, 30, 35, 40, 45],
+        'cci_gate.long_criteria': [0, 50, 100, 150, 200],
+        'cci_gate.short_criteria': [0, -50, -100, -150, -200],
+        'trend_gate.long_criteria': [10, 20, 30, 40, 50],
+        'trend_gate.short_criteria': [10, 20, 30, 40, 50],
+        'cloud_gate.long_criteria': [0, .05, .1, .2, .4],
+        'cloud_gate.short_criteria': [0, .05, .1, .2, .4],
+        'ema_gate.long_criteria': [True, False],
+        'ema_gate.short_criteria': [True, False]
+    },
+    # Number of variants drawn at random from the grid (None sweeps the whole grid)
+    'sweep_samples': 500,
+    # Number of processes running the variants
+    'sweep_workers': os.cpu_count(),
+    # Result the variants are ranked by, highest first ('pnl', 'win_rate', 'max_drawdown' or 'trades')
+    'sweep_metric': 'pnl',
+    # File the ranked results are written to
+    'sweep_results': 'Program Files/sweepResults.csv'
+}
+
+# API authentication settings
+api_auth = {
+    # Number of seconds the admin API keys are cached by the API before they are read again
+    # (the cache is also cleared whenever a user is added or removed)
+    'admin_key_ttl': 60
+}
+
+# API server settings
+api_server = {
+    # Number of threads running the database work of the API handlers
+    'db_workers': 8,
+    # Number of seconds the Nasdaq stock list is kept by the API before it is downloaded again
+    'stock_list_ttl': 3600,
+    # Default and maximum number of rows in a page of the table endpoints
+    'page_limit': 100,
+    'page_limit_max': 1000,
+    # Number of rows read per query while streaming a table as NDJSON
+    'stream_batch': 500
+}
+
+# Discord notifier settings
+discord_notifier = {
+    # Number of seconds between two checks for new signals
+    'poll_interval': 5,
+    # Number of signals read per query
+    'batch_size': 500,
+    # Number of seconds the map of API keys to Discord channels is kept before the users are read again
+    'channel_ttl': 60,
+    # Maximum number of embeds sent in one message (Discord allows 10)
+    'embeds_per_message': 10,
+    # Maximum number of messages sent per second, across all channels
+    'messages_per_second': 2
+}
+
+# Local price feed published by dataManager and subscribed to by the sell side exit engine
+price_feed = {
+    'port': 9100,
+    'authkey': b'proffitable-price-feed',
+    # Number of batches queued for a subscriber before it is considered stuck and dropped
+    'max_pending': 10
+}
+
 # Useful variables
 fastapi_port = 9000
 js_server_port = 8080
@@ -253,7 +364,7 @@ def generate_historical_url(asset, asset_type, timeframe):
 
 def generate_file_name(asset, timeframe):
     """
-    Generate the file name for storing data for the given asset.
+    Generate the file name for storing the candles of the given asset.
     
     Parameters:
     asset (str): The name of the asset.
@@ -266,7 +377,7 @@ def generate_file_name(asset, timeframe):
             'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
     """
     try:
-        file_name = f'{csv_file_directory}{asset}{timeframe}.csv'
+        file_name = f'{csv_file_directory}{asset}{timeframe}{candleStore.extension}'
         return {
             'data': file_name,
             'msg': 'success'
@@ -382,37 +493,119 @@ def update_robinhood_config(api_key, robinhood_username, robinhood_password):
         log_error(json.dumps(error))
         return error
 
-def get_assets():
+def asset_from_row(asset):
+    """
+    Convert a row of the assets table to the asset dictionary used by the program.
+
+    Parameters:
+    asset (dict): The row of the assets table.
+
+    Returns:
+    dict: The asset dictionary.
+    """
+    return {
+        'asset_name': asset['asset'],
+        'asset_price': 0 if asset['asset_price'] == '' else float(asset['asset_price']),
+        'asset_side': asset['asset_side'],
+        'initialized_asset': asset['initialized_asset'],
+        'asset_id': asset['asset_id'],
+        'id': asset['id'],
+        'asset_type': asset['asset_type'],
+        'amount': float(asset['amount']),
+        'multiplier': float(asset['multiplier']),
+        'timeframe': asset['timeframe'],
+        'slippage_percent': float(asset['slippage_percent']),
+        'take_profit_percent': float(asset['take_profit_percent']),
+        'gate_bypass': asset['gate_bypass'].split(','),
+        'last_iteration': asset['last_iteration'],
+        'last_action_order_type': asset['last_action_order_type'],
+        'last_action_price': 0 if asset['last_action_price'] == 'None' else float(asset['last_action_price']),
+        'fundamental_gate': asset['fundamental_gate'],
+        'broker_direction': asset['broker_direction']
+    }
+
+def group_rows(rows, column):
+    """
+    Group table rows by the value of one of their columns.
+
+    Parameters:
+    rows (list): The rows of the table.
+    column (str): The column to group the rows by.
+
+    Returns:
+    dict: The list of rows of each value, in table order.
+    """
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[column], []).append(row)
+    return groups
+
+def signal_from_row(signal):
+    """
+    Convert a row of the signals table to the signal dictionary used by the program.
+
+    Parameters:
+    signal (dict): The row of the signals table.
+
+    Returns:
+    dict: The signal dictionary, with the gate details decoded and the rowid kept under 'row_id' if it was read.
+    """
+    converted = {
+        'id': int(signal['id']),
+        'api_key': signal['api_key'],
+        'asset_id': signal['asset_id'],
+        'asset_name': signal['asset_name'],
+        'asset_type': signal['asset_type'],
+        'flag': signal['flag'],
+        'order_type': signal['order_type'],
+        'price': None if signal['price'] is None else float(signal['price']),
+        'amount': None if signal['amount'] is None else float(signal['amount']),
+        'multiplier': None if signal['multiplier'] is None else float(signal['multiplier']),
+        'decision': None if signal['decision'] is None else bool(signal['decision']),
+        'status': None if signal['status'] is None else int(signal['status']),
+        'check_time': signal['check_time'],
+        'gates': None if signal['gates'] is None else json.loads(signal['gates'])
+    }
+    if 'row_id' in signal:
+        converted['row_id'] = signal['row_id']
+    return converted
+
+def page_of(rows, limit):
+    """
+    Build a page of table rows read with database.select_page.
+
+    Parameters:
+    rows (list): The rows of the page, with their rowid under 'row_id'.
+    limit (int): The number of rows asked for.
+
+    Returns:
+    dict: The rows under 'items' and the rowid to read the next page after under 'next_after_id' (None after the last page).
+    """
+    return {
+        'items': rows,
+        'next_after_id': rows[-1]['row_id'] if rows and len(rows) == limit else None
+    }
+
+def get_assets(after_id=None, limit=None):
     """
-    Retrieve all assets from the database.
+    Retrieve all assets from the database, or one page of them.
+
+    Parameters:
+    after_id (int, optional): The rowid after which the page starts. Defaults to the start of the table.
+    limit (int, optional): The number of assets in the page. Defaults to None, which returns every asset keyed by id.
     """
     try:
-        return_dict = {}
-        # get list of asset ids
-        asset_ids = [asset['id'] for asset in database.select_all('assets')]
-        # iterate over asset ids and retrieve asset data for each id
-        for asset_id in asset_ids:
-            asset = database.select_by_value('assets', 'id', asset_id)[0]
-            return_dict[asset_id] = {
-                'asset_name': asset['asset'],
-                'asset_price': 0 if asset['asset_price'] == '' else float(asset['asset_price']),
-                'asset_side': asset['asset_side'],
-                'initialized_asset': asset['initialized_asset'],
-                'asset_id': asset['asset_id'],
-                'id': asset_id,
-                'asset_type': asset['asset_type'],
-                'amount': float(asset['amount']),
-                'multiplier': float(asset['multiplier']),
-                'timeframe': asset['timeframe'],
-                'slippage_percent': float(asset['slippage_percent']),
-                'take_profit_percent': float(asset['take_profit_percent']),
-                'gate_bypass': asset['gate_bypass'].split(','),
-                'last_iteration': asset['last_iteration'],
-                'last_action_order_type': asset['last_action_order_type'],
-                'last_action_price': 0 if asset['last_action_price'] == 'None' else float(asset['last_action_price']),
-                'fundamental_gate': asset['fundamental_gate'],
-                'broker_direction': asset['broker_direction']
+        if limit is not None:
+            rows = database.select_page('assets', after_id or 0, limit)
+            return {
+                'data': page_of([dict(asset_from_row(row), row_id=row['row_id']) for row in rows], limit),
+                'msg': 'success'
             }
+        return_dict = {}
+        # Read the whole table once; the first row of a duplicated id wins
+        for asset in database.select_all('assets'):
+            if asset['id'] not in return_dict:
+                return_dict[asset['id']] = asset_from_row(asset)
         return {
             'data': return_dict,
             'msg': 'success'
@@ -447,35 +640,10 @@ def get_asset(api_key):
     """
     try:
         return_dict = {}
-        # Get a list of all asset names in the database
-        asset_names = [data['asset'] for data in database.select_all('assets')]
-        # Iterate over each asset name
-        for asset_name in asset_names:
-            # Select all data for the current asset
-            assets = database.select_by_value('assets', 'asset', asset_name)
-            # Iterate over each asset data record
-            for asset in assets:
-                if api_key in asset['id']:
-                    # Add the asset data to the return dictionary
-                    return_dict[asset_name] = {
-                        'asset_name': asset_name,
-                        'asset_price': 0 if asset['asset_price'] == '' else float(asset['asset_price']),
-                        'initialized_asset': asset['initialized_asset'],
-                        'asset_id': asset['asset_id'],
-                        'id': asset['id'],
-                        'asset_type': asset['asset_type'],
-                        'amount': float(asset['amount']),
-                        'multiplier': float(asset['multiplier']),
-                        'timeframe': asset['timeframe'],
-                        'slippage_percent': float(asset['slippage_percent']),
-                        'take_profit_percent': float(asset['take_profit_percent']),
-                        'gate_bypass': asset['gate_bypass'].split(','),
-                        'last_iteration': asset['last_iteration'],
-                        'last_action_order_type': asset['last_action_order_type'],
-                        'last_action_price': 0 if asset['last_action_price'] == 'None' else float(asset['last_action_price']),
-                        'fundamental_gate': asset['fundamental_gate'],
-                        'broker_direction': asset['broker_direction']
-                    }
+        # Select the assets of the user in one query
+        for asset in database.select_containing('assets', 'id', api_key):
+            # Add the asset data to the return dictionary
+            return_dict[asset['asset']] = asset_from_row(asset)
         return {
             'data': return_dict,
             'msg': 'success'
@@ -617,6 +785,7 @@ def add_user(email, username, password, priviledge, discord_channel='', wss_node
             # Add the user to the database
             values = [email, username, password, discord_channel, api_key, priviledge, json.dumps(defi_config), json.dumps(robinhood_config)]
             database.insert_record('users', values)
+            authCache.invalidate()
         return {
             'data': {
                 'username': username,
@@ -657,6 +826,7 @@ def remove_user(api_key):
         else:
             # Remove the user from the database
             database.delete_record_by_value('users', 'api_key', api_key)
+            authCache.invalidate()
             return {
                 'data': f'User with api_key {api_key} has been removed.',
                 'msg': 'success'
@@ -683,14 +853,8 @@ def get_users():
             'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
     """
     try:
-        # Initialize the return dictionary
-        return_dict = {}
-        # Get a list of all user API keys
-        users_api_keys = [user['api_key'] for user in database.select_all('users')]
-        # Iterate over the API keys and retrieve the user data for each key
-        for users_api_key in users_api_keys:
-            user = database.select_by_value('users', 'api_key', users_api_key)
-            return_dict[users_api_key] = user
+        # Read the users once and group them by API key
+        return_dict = group_rows(database.select_all('users'), 'api_key')
         return {
             'data': return_dict,
             'msg': 'success'
@@ -720,16 +884,8 @@ def get_user(api_key):
             'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
     """
     try:
-        # Initialize the return dictionary
-        return_dict = {}
-        # Get a list of all user API keys
-        users_api_keys = [user['api_key'] for user in database.select_all('users')]
-        # Iterate over the API keys and retrieve the user data for each key
-        for users_api_key in users_api_keys:
-            if users_api_key == api_key:
-                user = database.select_by_value('users', 'api_key', users_api_key)
-                return_dict[users_api_key] = user
-                break
+        # Select the user in one query
+        return_dict = group_rows(database.select_by_value('users', 'api_key', api_key), 'api_key')
         if len(return_dict) == 0:
             raise ValueError('User does not exist.')
         return {
@@ -748,8 +904,12 @@ def get_user(api_key):
         log_error(json.dumps(error))
         return error
 
-def get_errors():
-    """Retrieves all errors from the database.
+def get_errors(after_id=None, limit=None):
+    """Retrieves all errors from the database, or one page of them.
+    
+    Parameters:
+    after_id (int, optional): The rowid after which the page starts. Defaults to the start of the table.
+    limit (int, optional): The number of errors in the page. Defaults to None, which returns every error grouped by datetime.
     
     Returns:
     dict: a dictionary containing the status of the operation and any relevant data.
@@ -758,14 +918,13 @@ def get_errors():
             'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
     """
     try:
-        # Initialize the return dictionary
-        return_dict = {}
-        # Get a list of all user API keys
-        error_datetimes = [error['datetime'] for error in database.select_all('errors')]
-        # Iterate over the API keys and retrieve the user data for each key
-        for error_datetime in error_datetimes:
-            error = database.select_by_value('errors', 'datetime', error_datetime)
-            return_dict[error_datetime] = error
+        if limit is not None:
+            return {
+                'data': page_of(database.select_page('errors', after_id or 0, limit), limit),
+                'msg': 'success'
+            }
+        # Read the errors once and group them by datetime
+        return_dict = group_rows(database.select_all('errors'), 'datetime')
         return {
             'data': return_dict,
             'msg': 'success'
@@ -782,8 +941,12 @@ def get_errors():
         log_error(json.dumps(error))
         return error
 
-def get_signals():
-    """Retrieves all signals from the database.
+def get_signals(after_id=None, limit=None):
+    """Retrieves all signals from the database, or one page of them.
+    
+    Parameters:
+    after_id (int, optional): The id after which the page starts. Defaults to the start of the table.
+    limit (int, optional): The number of signals in the page. Defaults to None, which returns every signal grouped by id.
     
     Returns:
     dict: a dictionary containing the status of the operation and any relevant data.
@@ -792,14 +955,13 @@ def get_signals():
             'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
     """
     try:
-        # Initialize the return dictionary
-        return_dict = {}
-        # Get a list of all signal IDs
-        signal_ids = [signal['id'] for signal in database.select_all('signals')]
-        # Iterate over the signal IDs and retrieve the signal data for each ID
-        for signal_id in signal_ids:
-            signal = database.select_by_value('signals', 'id', signal_id)
-            return_dict[signal_id] = signal
+        if limit is not None:
+            return {
+                'data': page_of([signal_from_row(row) for row in database.select_page('signals', after_id or 0, limit)], limit),
+                'msg': 'success'
+            }
+        # Read the signals once and group them by ID
+        return_dict = group_rows([signal_from_row(row) for row in database.select_all('signals')], 'id')
         return {
             'data': return_dict,
             'msg': 'success'
@@ -816,11 +978,13 @@ def get_signals():
         log_error(json.dumps(error))
         return error
 
-def get_signal(api_key):
-    """Retrieves all signals from the database for the given API key.
+def get_signal(api_key, after_id=None, limit=None):
+    """Retrieves all signals from the database for the given API key, or one page of them.
     
     Parameters:
     api_key (str): the API key.
+    after_id (int, optional): The id after which the page starts. Defaults to the start of the table.
+    limit (int, optional): The number of signals in the page. Defaults to None, which returns every signal grouped by id.
     
     Returns:
     dict: a dictionary containing the status of the operation and any relevant data.
@@ -829,16 +993,13 @@ def get_signal(api_key):
             'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
     """
     try:
-        # Initialize the return dictionary
-        return_dict = {}
-        # Get a list of all signal IDs
-        signal_ids = [signal['id'] for signal in database.select_all('signals')]
-        # Iterate over the signal IDs and retrieve the signal data for each ID
-        for signal_id in signal_ids:
-            signal = database.select_by_value('signals', 'id', signal_id)
-            # If the API key matches the signal's API key, add the signal to the return dictionary
-            if api_key in signal[0]['api_key']:
-                return_dict[signal_id] = signal
+        if limit is not None:
+            return {
+                'data': page_of([signal_from_row(row) for row in database.select_page('signals', after_id or 0, limit, 'api_key', api_key)], limit),
+                'msg': 'success'
+            }
+        # Select the signals of the API key in one query, read in id order from the signals_api_key_id index
+        return_dict = group_rows([signal_from_row(row) for row in database.select_by_value('signals', 'api_key', api_key)], 'id')
         return {
             'data': return_dict,
             'msg': 'success'
@@ -867,13 +1028,14 @@ def initialize_assets_table():
     try:
         # Set the name and columns of the table
         table = "assets"
-        columns = ["id TEXT", 'asset TEXT', 'asset_price TEXT', 'asset_side', 'initialized_asset TEXT', 'asset_id TEXT', "asset_type TEXT", 'amount TEXT', 'multiplier TEXT', 'timeframe TEXT', 'slippage_percent TEXT', 'take_profit_percent TEXT', "gate_bypass TEXT", "last_iteration TEXT", 'last_action_order_type TEXT', 'last_action_price TEXT', 'fundamental_gate TEXT', 'broker_direction TEXT']
+        columns = database.tables[table]
         # Create the table if it does not exist or if hard_reset is True
         try:
             database.delete_table(table)
         except:
             pass
         database.create_table(table, columns)
+        database.create_indexes(table)
         return {
             'data': f'Table {table} initialized.',
             'msg': 'success'
@@ -902,13 +1064,14 @@ def initialize_errors_table():
     try:
         # Set the name and columns of the table
         table = "errors"
-        columns = ["datetime TEXT", 'log TEXT']
+        columns = database.tables[table]
         # Create the table if it does not exist or if hard_reset is True
         try:
             database.delete_table(table)
         except:
             pass
         database.create_table(table, columns)
+        database.create_indexes(table)
         return {
             'data': f'Table {table} initialized.',
             'msg': 'success'
@@ -925,6 +1088,32 @@ def initialize_errors_table():
         log_error(json.dumps(error))
         return error
 
+def get_last_signal_id():
+    """Retrieves the id of the latest signal.
+    
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': the id of the latest signal (0 if there is none).
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    try:
+        return {
+            'data': database.last_rowid('signals'),
+            'msg': 'success'
+        }
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'config.py',
+                'function': 'get_last_signal_id',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        log_error(json.dumps(error))
+        return error
+
 def initialize_signals_table():
     """Initializes the 'signals' table in the database.
     
@@ -937,13 +1126,14 @@ def initialize_signals_table():
     try:
         # Set the name and columns of the table
         table = "signals"
-        columns = ["id INTEGER PRIMARY KEY", 'api_key TEXT', 'signal TEXT']
+        columns = database.tables[table]
         # Create the table if it does not exist or if hard_reset is True
         try:
             database.delete_table(table)
         except:
             pass
         database.create_table(table, columns)
+        database.create_indexes(table)
         return {
             'data': f'Table {table} initialized.',
             'msg': 'success'
@@ -972,13 +1162,14 @@ def initialize_users_table():
     try:
         # Set the name and columns of the table
         table = "users"
-        columns = ['email TEXT', 'username TEXT', 'password TEXT', 'discord_channels TEXT', 'api_key TEXT', 'priviledge TEXT', 'defi_config TEXT', 'robinhood_config TEXT']
+        columns = database.tables[table]
         # Create the table if it does not exist or if hard_reset is True
         try:
             database.delete_table(table)
         except:
             pass
         database.create_table(table, columns)
+        database.create_indexes(table)
         return {
             'data': f'Table {table} initialized.',
             'msg': 'success'
@@ -1091,10 +1282,10 @@ def string_to_epoch(timeInput):
         return error
 
 def read_dataframe(filename):
-    """Reads a CSV file and returns the contents as a Pandas DataFrame.
+    """Reads a candle file (or a CSV file) and returns the contents as a Pandas DataFrame.
     
     Parameters:
-    filename (str): the name of the CSV file to read.
+    filename (str): the name of the candle or CSV file to read.
     
     Returns:
     dict: a dictionary containing the DataFrame and the status of the operation.
@@ -1106,14 +1297,17 @@ def read_dataframe(filename):
     try:
         for x in range(30):
             try:
-                df = pd.read_csv(filename)
+                if filename.endswith(candleStore.extension):
+                    df = candleStore.to_dataframe(candleStore.read(filename))
+                else:
+                    df = pd.read_csv(filename)
                 return {
                     'data': df,
                     'msg': 'success'
                 }
             except:
                 time.sleep(1)
-        raise ValueError('Error retrieving CSV file information.')
+        raise ValueError('Error retrieving candle file information.')
     except Exception as e:
         error = {
             'data': {
@@ -1126,6 +1320,43 @@ def read_dataframe(filename):
         log_error(json.dumps(error))
         return error
 
+def convert_csv_files():
+    """Converts the CSV files of the assets initialized before the candle files to candle files, once.
+    The CSV files are kept (they are part of the repository), a CSV file that already has a candle file is skipped.
+
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': the names of the candle files written.
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    try:
+        converted = []
+        for file_name in sorted(os.listdir(csv_file_directory)):
+            if not file_name.endswith('.csv'):
+                continue
+            csv_file = os.path.join(csv_file_directory, file_name)
+            candle_file = f'{csv_file[:-len(".csv")]}{candleStore.extension}'
+            if os.path.exists(candle_file):
+                continue
+            candleStore.write(candle_file, candleStore.from_dataframe(pd.read_csv(csv_file)))
+            converted.append(candle_file)
+        return {
+            'data': converted,
+            'msg': 'success'
+        }
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'config.py',
+                'function': 'convert_csv_files',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        log_error(json.dumps(error))
+        return error
+
 def delete_csv_file(file):
     """Deletes the specified file from the 'CSV Files' directory.
 
@@ -1305,7 +1536,7 @@ def sanitize_inputs(
     # Sanitize and validate 'broker_direction' parameter
     if broker_direction:
         broker_direction = broker_direction.lower()
-        if timeframe in brokers:
+        if broker_direction in brokers:
             return_dictionary['data']['broker_direction'] = broker_direction.lower()
         else:
             return_dictionary['msg'] = 'error'
@@ -0,0 +1,47 @@
+import asyncio
+import functools
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Append the 'Config Files' folder to path and import the needed module
+sys.path.append('Config Files')
+import config
+
+# Threads running the database work of the event loop. Each thread keeps its own connection (database.get_cursor),
+# and the pool is separate from the threads running blocking upstream calls, so a slow upstream never holds up the database
+executor = None
+
+def get_executor():
+    """
+    Get the database threads, starting them on first use.
+
+    Returns:
+    concurrent.futures.ThreadPoolExecutor: The database threads.
+    """
+    global executor
+    if executor is None:
+        executor = ThreadPoolExecutor(max_workers=config.api_server['db_workers'], thread_name_prefix='database')
+    return executor
+
+async def call(function, *args, **kwargs):
+    """
+    Run a blocking database function (e.g. config.get_assets) on the database threads without blocking the event loop.
+
+    Parameters:
+    function (function): The function to run.
+    *args: The positional arguments of the function.
+    **kwargs: The keyword arguments of the function.
+
+    Returns:
+    The value returned by the function.
+    """
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), functools.partial(function, *args, **kwargs))
+
+def shutdown():
+    """
+    Stop the database threads once their current work is done.
+    """
+    global executor
+    if executor is not None:
+        executor.shutdown(wait=True)
+    executor = None
@@ -0,0 +1,115 @@
+import aiohttp
+import asyncio
+import random
+import sys
+from urllib.parse import urlparse
+
+# append the config file path to sys.path
+sys.path.append('Config Files')
+import config
+
+# Pooled HTTP session and per-host semaphores, bound to the event loop that created them
+session = None
+semaphores = {}
+session_loop = None
+
+headers = {
+    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.141 Safari/537.36',
+    'accept': 'application/json, text/plain, */*'
+}
+
+async def get_session():
+    """
+    Get the pooled HTTP session of the running event loop, creating it on first use.
+    A session left open by another event loop is closed before it is replaced. The event loops should still
+    call close before they end, as the connections of a loop that is already closed can not be shut down cleanly.
+
+    Returns:
+    aiohttp.ClientSession: The shared session.
+    """
+    global session, semaphores, session_loop
+    loop = asyncio.get_running_loop()
+    if session is not None and not session.closed and session_loop is not loop:
+        if session_loop.is_running():
+            # The loop of the session runs in another thread, which closes it
+            asyncio.run_coroutine_threadsafe(session.close(), session_loop)
+        else:
+            await session.close()
+    if session is None or session.closed or session_loop is not loop:
+        connector = aiohttp.TCPConnector(limit=config.async_fetch['connection_limit'], ttl_dns_cache=300)
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=config.async_fetch['timeout'])
+        )
+        semaphores = {}
+        session_loop = loop
+    return session
+
+def host_semaphore(url):
+    """
+    Get the semaphore limiting the number of concurrent requests to the host of the URL.
+
+    Parameters:
+    url (str): The URL being requested.
+
+    Returns:
+    asyncio.Semaphore: The semaphore of the host.
+    """
+    host = urlparse(url).netloc
+    if host not in semaphores:
+        limit = config.async_fetch['host_limits'].get(host, config.async_fetch['per_host_limit'])
+        semaphores[host] = asyncio.Semaphore(limit)
+    return semaphores[host]
+
+def backoff(attempt):
+    """
+    Get the jittered exponential delay before the next attempt ("full jitter").
+
+    Parameters:
+    attempt (int): The number of the attempt that just failed, starting at 0.
+
+    Returns:
+    float: The number of seconds to wait.
+    """
+    return random.uniform(0, min(config.async_fetch['backoff_cap'], config.async_fetch['backoff_base'] * 2 ** attempt))
+
+async def fetch_json(url, required_key=None, retries=None, request_headers=None):
+    """
+    Download and decode a JSON document, retrying with jittered exponential backoff.
+
+    Parameters:
+    url (str): The URL to download.
+    required_key (str, optional): A key the decoded document must contain, otherwise the attempt is retried.
+    retries (int, optional): The number of attempts. Defaults to config.async_fetch['retries'].
+    request_headers (dict, optional): Headers added to the default headers of the session. Defaults to None.
+
+    Returns:
+    The decoded JSON document.
+    """
+    retries = config.async_fetch['retries'] if retries is None else retries
+    client = await get_session()
+    error = None
+    for attempt in range(retries):
+        try:
+            async with host_semaphore(url):
+                async with client.get(url, headers=request_headers) as response:
+                    response.raise_for_status()
+                    data = await response.json(content_type=None)
+            if required_key is not None and required_key not in data:
+                raise KeyError(f'{required_key} missing from the response of {urlparse(url).netloc}')
+            return data
+        except Exception as e:
+            error = e
+        if attempt < retries - 1:
+            await asyncio.sleep(backoff(attempt))
+    raise error
+
+async def close():
+    """
+    Close the pooled HTTP session. Called by the owner of the event loop before the loop ends.
+    """
+    global session
+    if session is not None and not session.closed:
+        await session.close()
+    session = None
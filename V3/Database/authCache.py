@@ -0,0 +1,93 @@
+import hashlib
+import json
+import sys
+import threading
+import time
+
+# Append the 'Config Files' folder to path and import the needed module
+sys.path.append('Config Files')
+import config
+# Append the 'Database' folder to path and import the needed module
+sys.path.append('Database')
+import database
+
+# SHA-256 digests of the admin API keys of this process, and the time they were read from the database
+admin_digests = None
+loaded_at = 0.0
+# Number of invalidations, so that keys read while the users table changed are not kept
+generation = 0
+# Only one thread reloads the keys when they expire
+lock = threading.Lock()
+
+def digest(api_key):
+    """
+    Hash an API key, so that the keys themselves are not kept in memory.
+
+    Parameters:
+    api_key (str): The API key.
+
+    Returns:
+    bytes: The SHA-256 digest of the key.
+    """
+    return hashlib.sha256(str(api_key).encode()).digest()
+
+def load():
+    """
+    Read the API keys of the users with admin priviledge ('0') from the database in one query.
+
+    Returns:
+    set: The digests of the admin API keys.
+    """
+    return {digest(user['api_key']) for user in database.select_by_value('users', 'priviledge', '0')}
+
+def admin_keys():
+    """
+    Get the digests of the admin API keys, reading them from the database only when they expired or were invalidated.
+
+    Returns:
+    set: The digests of the admin API keys.
+    """
+    global admin_digests, loaded_at
+    digests = admin_digests
+    if digests is not None and time.monotonic() - loaded_at < config.api_auth['admin_key_ttl']:
+        return digests
+    with lock:
+        # Another thread may have reloaded the keys while this one waited
+        if admin_digests is None or time.monotonic() - loaded_at >= config.api_auth['admin_key_ttl']:
+            read_generation = generation
+            admin_digests = load()
+            # Keys read during an invalidation are read again on the next check
+            loaded_at = time.monotonic() if read_generation == generation else 0.0
+        return admin_digests
+
+def is_admin(api_key):
+    """
+    Check if an API key belongs to a user with admin priviledge.
+
+    Parameters:
+    api_key (str): The API key.
+
+    Returns:
+    bool: True if the key is an admin key. False if it is not, or if the keys could not be read.
+    """
+    try:
+        return digest(api_key) in admin_keys()
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'authCache.py',
+                'function': 'is_admin',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        config.log_error(json.dumps(error))
+        return False
+
+def invalidate():
+    """
+    Forget the admin API keys, so that the next check reads them again. Called when the users table changes.
+    """
+    global admin_digests, generation
+    generation += 1
+    admin_digests = None
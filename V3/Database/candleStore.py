@@ -0,0 +1,117 @@
+import os
+import numpy as np
+import pandas as pd
+
+# One fixed-width record per candle: the wall-clock time as int64 epoch seconds, followed by the float64 prices
+candle_dtype = np.dtype([('datetime', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8')])
+# Extension of the candle files
+extension = '.candles'
+
+def to_epoch(values):
+    """
+    Convert wall-clock times to epoch seconds. The times are encoded as if they were UTC so that no timezone is involved.
+
+    Parameters:
+    values: A time string in '%Y-%m-%d %H:%M:%S' format, a datetime, or a sequence of them.
+
+    Returns:
+    The epoch seconds, as an int64 array (or a single int for a single value).
+    """
+    epochs = pd.to_datetime(values).to_numpy().astype('datetime64[s]').astype(np.int64)
+    return int(epochs) if np.ndim(epochs) == 0 else epochs
+
+def from_dataframe(df):
+    """
+    Convert a DataFrame with datetime, open, high, low and close columns to candle records.
+
+    Parameters:
+    df: The DataFrame to convert.
+
+    Returns:
+    numpy.ndarray: The candle records.
+    """
+    candles = np.empty(len(df), dtype=candle_dtype)
+    candles['datetime'] = to_epoch(df['datetime'])
+    for column in ('open', 'high', 'low', 'close'):
+        candles[column] = df[column].to_numpy(dtype=np.float64)
+    return candles
+
+def to_dataframe(candles):
+    """
+    Convert candle records to a DataFrame with the same columns as the former CSV files.
+    The datetime column holds datetime64 values, which print in the former '%Y-%m-%d %H:%M:%S' format.
+    The columns are copied out of the records (one copy per column): read is zero-copy, but the last record of a candle file
+    is rewritten in place on every tick (replace_last), so a DataFrame backed by the mapped file would change under its readers.
+
+    Parameters:
+    candles: The candle records.
+
+    Returns:
+    pandas.DataFrame: The candles.
+    """
+    return pd.DataFrame({
+        'datetime': candles['datetime'].astype('datetime64[s]'),
+        'open': candles['open'],
+        'close': candles['close'],
+        'high': candles['high'],
+        'low': candles['low']
+    })
+
+def read(file_name):
+    """
+    Map the candle file into memory without copying it.
+
+    Parameters:
+    file_name: The path of the candle file.
+
+    Returns:
+    numpy.ndarray: A read-only view of the candle records.
+    """
+    # A record that is still being appended is left out
+    count = os.path.getsize(file_name) // candle_dtype.itemsize
+    if count == 0:
+        return np.empty(0, dtype=candle_dtype)
+    return np.memmap(file_name, dtype=candle_dtype, mode='r', shape=(count,))
+
+def write(file_name, candles):
+    """
+    Replace the content of the candle file. The file is swapped in at once, so readers never see a partial file.
+
+    Parameters:
+    file_name: The path of the candle file.
+    candles: The candle records.
+    """
+    temporary_file = f'{file_name}.{os.getpid()}.tmp'
+    with open(temporary_file, 'wb') as f:
+        f.write(np.ascontiguousarray(candles, dtype=candle_dtype).tobytes())
+    os.replace(temporary_file, file_name)
+
+def append(file_name, candles):
+    """
+    Append candle records to the end of the candle file.
+
+    Parameters:
+    file_name: The path of the candle file.
+    candles: The candle records.
+    """
+    with open(file_name, 'ab') as f:
+        # Drop the partial record of an interrupted append, which would shift every record written after it
+        size = f.seek(0, os.SEEK_END)
+        if size % candle_dtype.itemsize:
+            f.truncate(size - size % candle_dtype.itemsize)
+        f.write(np.ascontiguousarray(candles, dtype=candle_dtype).tobytes())
+
+def replace_last(file_name, candle):
+    """
+    Overwrite the last candle record of the candle file in place.
+
+    Parameters:
+    file_name: The path of the candle file.
+    candle: The new candle record.
+    """
+    with open(file_name, 'r+b') as f:
+        # The last whole record, ignoring the partial record of an interrupted append
+        size = f.seek(0, os.SEEK_END)
+        f.seek(size - size % candle_dtype.itemsize - candle_dtype.itemsize)
+        f.write(np.asarray(candle, dtype=candle_dtype).tobytes())
+        f.truncate()
@@ -1,7 +1,6 @@
-import time
 import sys
+import asyncio
 from datetime import datetime
-from multiprocessing import active_children, Process
 
 # Append the 'Analysis/Technical' folder to path and import the needed module
 sys.path.append('Analysis/Technical')
@@ -12,13 +11,20 @@ import config
 # Append the 'Database' folder to path and import the needed module
 sys.path.append('Database')
 import database
+import priceSnapshot
+import asyncFetcher
+# Append the 'Market Monitor' folder to path and import the needed module
+sys.path.append('Market Monitor')
+import orchestrator
 
-def iterate(asset):
+def iterate(asset, asset_price, history=None):
     """
     Update the data for the given asset.
 
     Parameters:
     asset (dict): A dictionary containing the asset data.
+    asset_price (dict): The price of the asset taken from the price snapshot.
+    history (list, optional): The downloaded historical values of an uninitialized asset.
     """
     # Get the current time
     now = datetime.now() 
@@ -27,9 +33,11 @@ def iterate(asset):
     market_close = datetime(now.year, now.month, now.day, config.stock_market_hours['close_hour'], config.stock_market_hours['close_minute'])
     # Check if the current time is within the stock market hours or the asset is a cryptocurrency
     if (((market_open <= now <= market_close) and now.weekday() not in [5, 6]) and (asset['asset_type'] == 'stock')) or (asset['asset_type'] == 'crypto'):
-        # Get the current price of the asset
-        asset_price = indicators.price(asset['asset_name'], asset['asset_type'])['data']
-        update = indicators.update(asset['initialized_asset'], asset['asset_name'], asset['asset_type'], asset_price, asset['timeframe'])
+        # Skip the update if the snapshot has no fresh price for the asset
+        if asset_price['msg'] != 'success':
+            return
+        asset_price = asset_price['data']
+        update = indicators.update(asset['initialized_asset'], asset['asset_name'], asset['asset_type'], asset_price, asset['timeframe'], history)
         if update['msg'] == 'success':
             # Update the asset price in the database
             database.update_by_value('assets', 'asset_id', f'{asset["asset_name"]}{asset["timeframe"]}', ['asset_price'], [str(asset_price)])
@@ -38,33 +46,52 @@ def iterate(asset):
             database.update_by_value('assets', 'asset_id', f'{asset["asset_name"]}{asset["timeframe"]}', ['initialized_asset'], ['true'])
         print(update, asset['initialized_asset'])
 
+async def fetch_cycle(assets):
+    """
+    Refresh the price snapshot and download the history of every uninitialized asset concurrently.
+
+    Parameters:
+    assets (list): The asset dictionaries of this cycle.
+
+    Returns:
+    dict: The downloaded historical values, keyed by asset_id.
+    """
+    new_assets = {asset['asset_id']: asset for asset in assets if asset['initialized_asset'] == 'false'}
+    results = await asyncio.gather(
+        priceSnapshot.refresh(assets),
+        *[asyncFetcher.fetch_json(config.generate_historical_url(asset['asset_name'], asset['asset_type'], asset['timeframe'])['data'], 'values') for asset in new_assets.values()],
+        return_exceptions=True
+    )
+    # Failed downloads are retried on the next cycle
+    return {asset_id: result['values'] for asset_id, result in zip(new_assets, results[1:]) if not isinstance(result, Exception)}
+
+def cycle_jobs(active_assets, histories):
+    """
+    Build the update jobs of a cycle, one per asset_id.
+
+    Parameters:
+    active_assets (list): The asset dictionaries to update.
+    histories (dict): The downloaded historical values, keyed by asset_id.
+
+    Returns:
+    list: The jobs (asset_id, arguments of iterate).
+    """
+    seen = []
+    jobs = []
+    for active_asset in active_assets:
+        # Wait for the history of a new asset before initializing it
+        if active_asset['initialized_asset'] == 'false' and active_asset['asset_id'] not in histories:
+            continue
+        # Check if asset is already being watched
+        if f"{active_asset['asset_name']}{active_asset['timeframe']}" not in seen:
+            # Append asset to the seen list
+            seen.append(f"{active_asset['asset_name']}{active_asset['timeframe']}")
+            jobs.append((active_asset['asset_id'], (active_asset, priceSnapshot.price(active_asset['asset_name'], active_asset['asset_type']), histories.get(active_asset['asset_id']))))
+    return jobs
+
 def main():
-    while True:
-        # Get all assets
-        asset_list = config.get_assets()['data']
-        # Get list of unfinished processes
-        running_processes = [process for process in active_children()]
-        # Get list of cancelled processes
-        cancelled_processes = [process for process in running_processes if process.name not in [asset_list[asset]['asset_id'] for asset in asset_list]]
-        # Cancel cancelled processes
-        for process in cancelled_processes:
-            process.terminate()
-            config.delete_csv_file(process.name)
-        # Isolate assets to be iterated over
-        active_assets = [asset_list[asset] for asset in asset_list if asset_list[asset]['asset_id'] not in [process.name for process in running_processes]]
-        # Iterate over the assets, once
-        seen = []
-        for active_asset in active_assets:
-            # Check if asset is already being watched
-            if f"{active_asset['asset_name']}{active_asset['timeframe']}" not in seen:
-                # Append asset to the seen list
-                seen.append(f"{active_asset['asset_name']}{active_asset['timeframe']}")
-                # Create a new Process object
-                queued_process = Process(target=iterate, name=active_asset['asset_id'], args=(active_asset,))
-                # Start the process
-                queued_process.start()
-        # Wait before running next batch
-        time.sleep(5)
+    # Refresh the data only
+    orchestrator.MarketMonitor(refresh=True, entries=False, exits=False).run()
 
 if __name__ == '__main__': 
     main()
\ No newline at end of file
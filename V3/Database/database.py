@@ -1,7 +1,32 @@
+import ast
+import json
+import math
+import re
 import sqlite3
 import os
+import threading
 
 databaseFile = 'Program Files/database.db'
+# Number of milliseconds a statement waits for a lock held by another process before failing
+busyTimeout = 30000
+# Open connection and cursor of the current process and thread
+local = threading.local()
+
+# Columns of each table in the current schema
+# Numeric columns use REAL affinity, so numbers written as strings are stored as numbers while '' and 'None' are kept as text
+tables = {
+    'assets': ['id TEXT', 'asset TEXT', 'asset_price REAL', 'asset_side TEXT', 'initialized_asset TEXT', 'asset_id TEXT', 'asset_type TEXT', 'amount REAL', 'multiplier REAL', 'timeframe TEXT', 'slippage_percent REAL', 'take_profit_percent REAL', 'gate_bypass TEXT', 'last_iteration TEXT', 'last_action_order_type TEXT', 'last_action_price REAL', 'fundamental_gate TEXT', 'broker_direction TEXT'],
+    'errors': ['datetime TEXT', 'log TEXT'],
+    'signals': ['id INTEGER PRIMARY KEY', 'api_key TEXT', 'asset_id TEXT', 'asset_name TEXT', 'asset_type TEXT', 'flag TEXT', 'order_type TEXT', 'price REAL', 'amount REAL', 'multiplier REAL', 'decision INTEGER', 'status INTEGER', 'check_time TEXT', 'gates TEXT'],
+    'users': ['email TEXT', 'username TEXT', 'password TEXT', 'discord_channels TEXT', 'api_key TEXT', 'priviledge TEXT', 'defi_config TEXT', 'robinhood_config TEXT']
+}
+# Indexes of each table in the current schema, by name
+indexes = {
+    'assets': {'assets_id': 'id', 'assets_asset': 'asset', 'assets_asset_id': 'asset_id'},
+    'errors': {},
+    'signals': {'signals_api_key_id': 'api_key, id', 'signals_asset_id': 'asset_id'},
+    'users': {'users_api_key': 'api_key'}
+}
 
 # Check if a file named "myfile.txt" exists in the current directory
 if not os.path.exists(databaseFile):
@@ -9,6 +34,208 @@ if not os.path.exists(databaseFile):
     with open(databaseFile, 'w') as f:
         pass
 
+def get_cursor():
+    """
+    Get the reusable cursor of the current process and thread, opening the connection on first use.
+    The connection uses WAL journaling so that readers and the writer do not block each other.
+    A connection inherited from a parent process is never reused.
+
+    Returns:
+    A cursor on the shared connection.
+    """
+    if getattr(local, 'pid', None) != os.getpid():
+        conn = sqlite3.connect(databaseFile, timeout=busyTimeout / 1000)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA busy_timeout={busyTimeout}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        local.cursor = conn.cursor()
+        local.pid = os.getpid()
+    return local.cursor
+
+def table_exists(cursor, table_name):
+    """
+    Check whether a table exists in the database.
+
+    Parameters:
+    cursor: A cursor on the database.
+    table_name: The name of the table.
+
+    Returns:
+    True if the table exists.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+    return cursor.fetchone() is not None
+
+def create_indexes(table_name):
+    """
+    Creates the indexes of the current schema on the given table.
+
+    Parameters:
+    table_name: The name of the table.
+    """
+    # Get the shared cursor
+    cursor = get_cursor()
+    # Commit the changes to the database, or roll them back on failure
+    with cursor.connection:
+        for index_name, index_columns in indexes[table_name].items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({index_columns})")
+
+def rebuild_table(cursor, table_name):
+    """
+    Recreates a table with the columns of the current schema, keeping its records in order.
+
+    Parameters:
+    cursor: A cursor on the database, inside the migration transaction.
+    table_name: The name of the table.
+    """
+    cursor.execute(f"ALTER TABLE {table_name} RENAME TO {table_name}_old")
+    cursor.execute(f"CREATE TABLE {table_name} ({', '.join(tables[table_name])})")
+    cursor.execute(f"INSERT INTO {table_name} SELECT * FROM {table_name}_old ORDER BY rowid")
+    cursor.execute(f"DROP TABLE {table_name}_old")
+
+def migration_1(cursor):
+    """
+    Version 1: numeric columns of the assets table and lookup indexes.
+
+    Parameters:
+    cursor: A cursor on the database, inside the migration transaction.
+    """
+    if table_exists(cursor, 'assets'):
+        rebuild_table(cursor, 'assets')
+    for table_name in indexes:
+        if table_exists(cursor, table_name):
+            # Indexes on columns added by later migrations are created by those migrations
+            columns = {column[1] for column in cursor.execute(f"PRAGMA table_info({table_name})").fetchall()}
+            for index_name, index_columns in indexes[table_name].items():
+                if set(index_columns.split(', ')) <= columns:
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({index_columns})")
+
+def compact(value):
+    """
+    Convert the gate details of a data log to plain JSON values: numpy scalars become Python numbers,
+    NaN and infinite numbers become None and anything else that JSON can not hold becomes its text.
+
+    Parameters:
+    value: The value to convert.
+
+    Returns:
+    The converted value.
+    """
+    if isinstance(value, dict):
+        return {str(key): compact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [compact(item) for item in value]
+    if hasattr(value, 'item') and not isinstance(value, (str, bytes)):
+        value = value.item()
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    return str(value)
+
+def signal_record(id, api_key, data_log):
+    """
+    Build the row of the signals table of a data log: the report of the buy side gates or the log of a closed position.
+
+    Parameters:
+    id: The id of the signal, or None to let the database assign it.
+    api_key: The API key of the user the signal belongs to.
+    data_log: The data log of the signal.
+
+    Returns:
+    A list of values in the order of the columns of the signals table.
+    """
+    asset_data = data_log.get('asset_data', {})
+    # The closing price is stored in the data log, the entry price in the asset data
+    price = data_log.get('asset_price', asset_data.get('asset_price'))
+    decision = data_log.get('decision')
+    gates = data_log.get('gates')
+    return [
+        id,
+        api_key,
+        asset_data.get('id'),
+        asset_data.get('asset_name'),
+        asset_data.get('asset_type'),
+        data_log.get('flag'),
+        data_log.get('order_type'),
+        None if price is None else float(price),
+        None if asset_data.get('amount') is None else float(asset_data['amount']),
+        None if asset_data.get('multiplier') is None else float(asset_data['multiplier']),
+        None if decision is None else int(bool(decision)),
+        data_log.get('status'),
+        data_log.get('check_time'),
+        None if gates is None else json.dumps(compact(gates), separators=(',', ':'))
+    ]
+
+def parse_signal_text(text):
+    """
+    Read a data log stored as str(data_log) by schema version 1.
+
+    Parameters:
+    text: The stored text.
+
+    Returns:
+    The data log, or None if the text can not be read.
+    """
+    # numpy scalars were written as np.float64(x) or np.True_, and missing numbers as nan
+    text = re.sub(r"np\.\w+\(([^()]*)\)", r"\1", text)
+    text = re.sub(r"np\.(True|False)_", r"\1", text)
+    text = re.sub(r"\b(nan|inf)\b", "None", text)
+    try:
+        data_log = ast.literal_eval(text)
+        return data_log if isinstance(data_log, dict) else None
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+def migration_2(cursor):
+    """
+    Version 2: signals stored as columns and compact JSON gate details instead of str(data_log).
+    A signal whose text can not be read keeps it under 'unreadable' in its gate details.
+
+    Parameters:
+    cursor: A cursor on the database, inside the migration transaction.
+    """
+    if not table_exists(cursor, 'signals'):
+        return
+    cursor.execute("ALTER TABLE signals RENAME TO signals_old")
+    cursor.execute(f"CREATE TABLE signals ({', '.join(tables['signals'])})")
+    placeholders = ", ".join(["?"] * len(tables['signals']))
+    old = cursor.connection.execute("SELECT id, api_key, signal FROM signals_old ORDER BY id")
+    while True:
+        rows = old.fetchmany(1000)
+        if not rows:
+            break
+        records = []
+        for id, api_key, text in rows:
+            data_log = parse_signal_text(text or '')
+            if data_log is None:
+                records.append(signal_record(id, api_key, {'gates': {'unreadable': text}}))
+            else:
+                records.append(signal_record(id, api_key, data_log))
+        cursor.executemany(f"INSERT INTO signals VALUES ({placeholders})", records)
+    cursor.execute("DROP TABLE signals_old")
+    for index_name, index_columns in indexes['signals'].items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON signals ({index_columns})")
+
+# Migrations in order; the schema version stored in the database is the number of migrations applied
+migrations = [migration_1, migration_2]
+
+def migrate():
+    """
+    Upgrades the database in place to the current schema version.
+    The migrations run in one exclusive transaction, so concurrent processes apply them once.
+    """
+    # Get the shared cursor
+    cursor = get_cursor()
+    if cursor.execute("PRAGMA user_version").fetchone()[0] >= len(migrations):
+        return
+    with cursor.connection:
+        cursor.execute("BEGIN IMMEDIATE")
+        version = cursor.execute("PRAGMA user_version").fetchone()[0]
+        for migration in migrations[version:]:
+            migration(cursor)
+        cursor.execute(f"PRAGMA user_version={len(migrations)}")
+
 def create_table(table_name, columns):
     """
     Creates a table with the given name and columns in the database.
@@ -18,15 +245,12 @@ def create_table(table_name, columns):
     table_name: The name of the table to be created.
     columns: A list of column names and data types, in the format "name data_type".
     """
-    # Connect to the database
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
-    column_str = ", ".join(columns)
-    cursor.execute(f"CREATE TABLE {table_name} ({column_str})")
-    # Commit the changes to the database
-    conn.commit()
-    # Close the connection
-    conn.close()
+    # Get the shared cursor
+    cursor = get_cursor()
+    # Commit the changes to the database, or roll them back on failure
+    with cursor.connection:
+        column_str = ", ".join(columns)
+        cursor.execute(f"CREATE TABLE {table_name} ({column_str})")
 
 def insert_record(table_name, values):
     """
@@ -37,16 +261,12 @@ def insert_record(table_name, values):
     table_name: The name of the table to insert the record into.
     values: A list of values to be inserted, in the same order as the table's columns.
     """
-    # Connect to the database
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
-
-    placeholders = ", ".join(["?"] * len(values))
-    cursor.execute(f"INSERT INTO {table_name} VALUES ({placeholders})", values)
-    # Commit the changes to the database
-    conn.commit()
-    # Close the connection
-    conn.close()
+    # Get the shared cursor
+    cursor = get_cursor()
+    # Commit the changes to the database, or roll them back on failure
+    with cursor.connection:
+        placeholders = ", ".join(["?"] * len(values))
+        cursor.execute(f"INSERT INTO {table_name} VALUES ({placeholders})", values)
 
 def delete_table(table_name):
     """
@@ -56,15 +276,12 @@ def delete_table(table_name):
     conn: A connection object to the database.
     table_name: The name of the table to delete.
     """
-    # Connect to the database
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
-    # Execute command
-    cursor.execute(f"DROP TABLE {table_name}")
-    # Commit the changes to the database
-    conn.commit()
-    # Close the connection
-    conn.close()
+    # Get the shared cursor
+    cursor = get_cursor()
+    # Commit the changes to the database, or roll them back on failure
+    with cursor.connection:
+        # Execute command
+        cursor.execute(f"DROP TABLE {table_name}")
 
 def select_all(table_name):
     """
@@ -75,14 +292,11 @@ def select_all(table_name):
     Returns:
     A list of tuples, where each tuple represents a record in the table.
     """
-    # Connect to the database
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
+    # Get the shared cursor
+    cursor = get_cursor()
     cursor.execute(f"SELECT * FROM {table_name}")
     column_names = [column[0] for column in cursor.description]
     all = [dict(zip(column_names, record)) for record in cursor.fetchall()]
-    # Close the connection
-    conn.close()
     return all
 
 def select_by_value(table_name, column, value):
@@ -98,14 +312,73 @@ def select_by_value(table_name, column, value):
     Returns:
     A list of tuples representing the retrieved records.
     """
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
+    # Get the shared cursor
+    cursor = get_cursor()
     cursor.execute(f"SELECT * FROM {table_name} WHERE {column}=?", (value,))
     column_names = [column[0] for column in cursor.description]
     data = [dict(zip(column_names, record)) for record in cursor.fetchall()]
-    conn.close()
     return data
 
+def select_containing(table_name, column, value):
+    """
+    Retrieves records from the given table whose column contains the given text.
+    
+    Parameters:
+    table_name: The name of the table to retrieve the records from.
+    column: The name of the column to search in.
+    value: The text the column must contain.
+    
+    Returns:
+    A list of dictionaries representing the retrieved records.
+    """
+    # Get the shared cursor
+    cursor = get_cursor()
+    cursor.execute(f"SELECT * FROM {table_name} WHERE instr({column}, ?) > 0", (value,))
+    column_names = [column[0] for column in cursor.description]
+    data = [dict(zip(column_names, record)) for record in cursor.fetchall()]
+    return data
+
+def select_page(table_name, after_id=0, limit=100, column=None, value=None):
+    """
+    Retrieves the records of the given table that follow a rowid, in table order (keyset pagination).
+    Each page is read with a range scan on the rowid, or on an index of (column, rowid) when a column is given,
+    so reading the next page costs the same whatever the size of the table.
+    
+    Parameters:
+    table_name: The name of the table to retrieve the records from.
+    after_id: The rowid after which the records are retrieved (0 for the first page).
+    limit: The maximum number of records to retrieve.
+    column: The name of a column to filter on (optional).
+    value: The value of the column (optional).
+    
+    Returns:
+    A list of dictionaries representing the retrieved records, with their rowid under 'row_id'.
+    """
+    # Get the shared cursor
+    cursor = get_cursor()
+    if column is None:
+        cursor.execute(f"SELECT rowid AS row_id, * FROM {table_name} WHERE rowid > ? ORDER BY rowid LIMIT ?", (after_id, limit))
+    else:
+        cursor.execute(f"SELECT rowid AS row_id, * FROM {table_name} WHERE {column} = ? AND rowid > ? ORDER BY rowid LIMIT ?", (value, after_id, limit))
+    column_names = [column[0] for column in cursor.description]
+    data = [dict(zip(column_names, record)) for record in cursor.fetchall()]
+    return data
+
+def last_rowid(table_name):
+    """
+    Retrieves the highest rowid of the given table, read from the end of the rowid index.
+    
+    Parameters:
+    table_name: The name of the table.
+    
+    Returns:
+    The highest rowid, or 0 if the table is empty.
+    """
+    # Get the shared cursor
+    cursor = get_cursor()
+    cursor.execute(f"SELECT max(rowid) FROM {table_name}")
+    return cursor.fetchone()[0] or 0
+
 def select_by_id(table_name, id):
     """
     Retrieves a single record from the given table by its id column.
@@ -116,14 +389,11 @@ def select_by_id(table_name, id):
     Returns:
     A tuple representing the record with the matching id.
     """
-    # Connect to the database
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
+    # Get the shared cursor
+    cursor = get_cursor()
     cursor.execute(f"SELECT * FROM {table_name} WHERE id=?", (id,))
     column_names = [column[0] for column in cursor.description]
     data = [dict(zip(column_names, record)) for record in cursor.fetchall()]
-    # Close the connection
-    conn.close()
     return data
 
 def update_by_id(table_name, id, columns, values):
@@ -137,15 +407,12 @@ def update_by_id(table_name, id, columns, values):
     columns: A list of column names to be updated.
     values: A list of new values to be set for the columns, in the same order as the columns list.
     """
-    # Connect to the database
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
-    placeholders = ", ".join([f"{column}=?" for column in columns])
-    cursor.execute(f"UPDATE {table_name} SET {placeholders} WHERE id=?", (*values, id))
-    # Commit the changes to the database
-    conn.commit()
-    # Close the connection
-    conn.close()
+    # Get the shared cursor
+    cursor = get_cursor()
+    # Commit the changes to the database, or roll them back on failure
+    with cursor.connection:
+        placeholders = ", ".join([f"{column}=?" for column in columns])
+        cursor.execute(f"UPDATE {table_name} SET {placeholders} WHERE id=?", (*values, id))
 
 def update_by_value(table_name, where_column, where_value, columns, values):
     """
@@ -159,15 +426,12 @@ def update_by_value(table_name, where_column, where_value, columns, values):
     columns: A list of column names to be updated.
     values: A list of new values to be set for the columns, in the same order as the columns list.
     """
-    # Connect to the database
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
-    placeholders = ", ".join([f"{column}=?" for column in columns])
-    cursor.execute(f"UPDATE {table_name} SET {placeholders} WHERE {where_column}=?", (*values, where_value))
-    # Commit the changes to the database
-    conn.commit()
-    # Close the connection
-    conn.close()
+    # Get the shared cursor
+    cursor = get_cursor()
+    # Commit the changes to the database, or roll them back on failure
+    with cursor.connection:
+        placeholders = ", ".join([f"{column}=?" for column in columns])
+        cursor.execute(f"UPDATE {table_name} SET {placeholders} WHERE {where_column}=?", (*values, where_value))
 
 def delete_record_by_value(table_name, column, value):
     """
@@ -179,14 +443,11 @@ def delete_record_by_value(table_name, column, value):
     column: The name of the column to search for.
     value: The value of the column to search for.
     """
-    # Connect to the database
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
-    cursor.execute(f"DELETE FROM {table_name} WHERE {column}=?", (value,))
-    # Commit the changes to the database
-    conn.commit()
-    # Close the connection
-    conn.close()
+    # Get the shared cursor
+    cursor = get_cursor()
+    # Commit the changes to the database, or roll them back on failure
+    with cursor.connection:
+        cursor.execute(f"DELETE FROM {table_name} WHERE {column}=?", (value,))
 
 def delete_record_by_id(table_name, id):
     """
@@ -197,11 +458,10 @@ def delete_record_by_id(table_name, id):
     table_name: The name of the table to delete the record from.
     id: The value of the id column to search for.
     """
-    # Connect to the database
-    conn = sqlite3.connect(databaseFile)
-    cursor = conn.cursor()
-    cursor.execute(f"DELETE FROM {table_name} WHERE id=?", (id,))
-    # Commit the changes to the database
-    conn.commit()
-    # Close the connection
-    conn.close()
\ No newline at end of file
+    # Get the shared cursor
+    cursor = get_cursor()
+    # Commit the changes to the database, or roll them back on failure
+    with cursor.connection:
+        cursor.execute(f"DELETE FROM {table_name} WHERE id=?", (id,))
+# Upgrade the database to the current schema before it is used
+migrate()
@@ -0,0 +1,248 @@
+import atexit
+import hashlib
+import json
+import sys
+import time
+import zlib
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+# append the config file path to sys.path
+sys.path.append('Config Files')
+import config
+
+# One slot per asset: a sequence number (odd while the slot is being written), the key of the asset (see slot_key), its price and the time of the price
+slot_dtype = np.dtype([('seq', '<u8'), ('key', 'S24'), ('price', '<f8'), ('time', '<f8')])
+# Key of a freed slot: lookups probe past it and new assets reuse it (keys are hexadecimal, so no asset has this key)
+tombstone = b'-'
+# Number of times a reader retries a slot that is being written before giving up on the board
+read_retries = 1000
+
+# Shared memory segment and slot array attached by this process
+memory = None
+slots = None
+
+def attach(create=False):
+    """
+    Attach the price board of this machine, creating it if asked to.
+    Only the writer (dataManager) creates the board, so the board is removed when the writer exits.
+
+    Parameters:
+    create (bool, optional): Create the board if it does not exist. Defaults to False.
+
+    Returns:
+    numpy.ndarray: The slots of the board, or None if the board does not exist.
+    """
+    global memory, slots
+    if slots is not None:
+        return slots
+    size = config.price_board['slots'] * slot_dtype.itemsize
+    try:
+        if create:
+            try:
+                memory = shared_memory.SharedMemory(config.price_board['name'], create=True, size=size)
+                np.ndarray((config.price_board['slots'],), dtype=slot_dtype, buffer=memory.buf)[:] = np.zeros(1, dtype=slot_dtype)
+            except FileExistsError:
+                # Take over the board left behind by a previous writer. A writer that died in the middle of a slot
+                # left its sequence number odd, which is made even again so that the slot can be read
+                memory = shared_memory.SharedMemory(config.price_board['name'])
+                sequences = np.ndarray((config.price_board['slots'],), dtype=slot_dtype, buffer=memory.buf)['seq']
+                sequences[sequences % 2 == 1] += 1
+            # Remove the board when the writer exits
+            atexit.register(remove, memory)
+        else:
+            if sys.version_info >= (3, 13):
+                memory = shared_memory.SharedMemory(config.price_board['name'], track=False)
+            else:
+                memory = shared_memory.SharedMemory(config.price_board['name'])
+                # Readers must not remove the board when they exit
+                resource_tracker.unregister(memory._name, 'shared_memory')
+    except FileNotFoundError:
+        return None
+    slots = np.ndarray((config.price_board['slots'],), dtype=slot_dtype, buffer=memory.buf)
+    return slots
+
+def remove(board_memory):
+    """
+    Remove the board from the machine.
+
+    Parameters:
+    board_memory (multiprocessing.shared_memory.SharedMemory): The shared memory segment of the board.
+    """
+    board_memory.close()
+    try:
+        board_memory.unlink()
+    except FileNotFoundError:
+        # Already removed by an earlier attachment of this process
+        pass
+
+def detach():
+    """
+    Forget the attached board, so that the next call attaches the current one.
+    """
+    global memory, slots
+    slots = None
+    memory = None
+
+def slot_key(asset, asset_type):
+    """
+    Get the key of an asset on the board: a hash of its type and name, so that a stock and a cryptocurrency with
+    the same name get different slots and long names are neither truncated to the 24 bytes of the key nor mixed up.
+
+    Parameters:
+    asset (str): The name of the asset.
+    asset_type (str): The type of the asset (e.g. stock, crypto).
+
+    Returns:
+    bytes: The key, 24 hexadecimal characters.
+    """
+    return hashlib.blake2b(f'{asset_type}:{asset}'.encode(), digest_size=12).hexdigest().encode()
+
+def find(board, key, insert=False):
+    """
+    Find the slot of an asset by open addressing, starting at the CRC32 of its name.
+    Freed slots do not end the search, as the asset may have been placed after them.
+
+    Parameters:
+    board (numpy.ndarray): The slots of the board.
+    key (bytes): The key of the asset (see slot_key).
+    insert (bool, optional): Return the first freed or empty slot if the asset has none. Defaults to False.
+
+    Returns:
+    int: The index of the slot, or None if the asset has no slot (and insert is False, or the board is full).
+    """
+    start = zlib.crc32(key) % len(board)
+    freed = None
+    for probe in range(len(board)):
+        index = (start + probe) % len(board)
+        current_key = board[index]['key']
+        if current_key == key:
+            return index
+        if current_key == tombstone:
+            if freed is None:
+                freed = index
+            continue
+        if current_key == b'':
+            if not insert:
+                return None
+            return index if freed is None else freed
+    return freed if insert else None
+
+def write_slot(board, index, key, price, fetched):
+    """
+    Write one slot of the board, with an odd sequence number while it is being written.
+
+    Parameters:
+    board (numpy.ndarray): The slots of the board.
+    index (int): The index of the slot.
+    key (bytes): The key of the asset, or tombstone to free the slot.
+    price (float): The price.
+    fetched (float): The time of the price.
+    """
+    # An odd sequence number tells readers that the slot is being written
+    board['seq'][index] += 1
+    board['key'][index] = key
+    board['price'][index] = price
+    board['time'][index] = fetched
+    board['seq'][index] += 1
+
+def publish(prices):
+    """
+    Write prices to the board and free the slots of the assets that are not in the prices. Must only be called by the single writer.
+
+    Parameters:
+    prices (dict): The price and time of every asset, keyed by (asset name, asset type).
+
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': data returned from the function.
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    try:
+        board = attach(create=True)
+        keys = {asset_key: slot_key(*asset_key) for asset_key in prices}
+        # Free the slots of the removed assets first (also those left by a previous writer), so that new assets can take them
+        used = (board['key'] != b'') & (board['key'] != tombstone)
+        for index in np.flatnonzero(used & ~np.isin(board['key'], np.array(list(keys.values()), dtype=slot_dtype['key']))):
+            write_slot(board, index, tombstone, np.nan, 0.0)
+        missing = []
+        for (asset, asset_type), (price, fetched) in prices.items():
+            key = keys[(asset, asset_type)]
+            index = find(board, key, insert=True)
+            if index is None:
+                missing.append(asset)
+                continue
+            write_slot(board, index, key, price, fetched)
+        if missing:
+            raise OverflowError(f'The price board is full, no slot for {", ".join(missing)}')
+        return {
+            'data': f'{len(prices)} prices published.',
+            'msg': 'success'
+        }
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'priceBoard.py',
+                'function': 'publish',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        config.log_error(json.dumps(error))
+        return error
+
+def quote(asset, asset_type):
+    """
+    Read the price of an asset from the board, with the time of the price.
+
+    Parameters:
+    asset (str): The name of the asset.
+    asset_type (str): The type of the asset (e.g. stock, crypto).
+
+    Returns:
+    tuple: The price and its time, or None if the board does not exist, has no fresh price for the asset or the slot stays busy.
+    """
+    board = attach()
+    if board is None:
+        return None
+    key = slot_key(asset, asset_type)
+    index = find(board, key)
+    if index is None:
+        return None
+    for retry in range(read_retries):
+        seq = board['seq'][index]
+        # Retry while the writer is in the middle of the slot
+        if seq % 2 == 0:
+            current_key = board['key'][index]
+            price = float(board['price'][index])
+            fetched = float(board['time'][index])
+            if board['seq'][index] == seq:
+                break
+        # Let the writer run
+        time.sleep(0)
+    else:
+        # The writer died in the middle of the slot, the caller falls back to the database
+        return None
+    if current_key != key:
+        # The slot was freed, or given to another asset, after it was found
+        return None
+    if time.time() - fetched > config.price_snapshot['stale_after']:
+        # The writer may have been restarted with a new board
+        detach()
+        return None
+    return price, fetched
+
+def read(asset, asset_type):
+    """
+    Read the price of an asset from the board.
+
+    Parameters:
+    asset (str): The name of the asset.
+    asset_type (str): The type of the asset (e.g. stock, crypto).
+
+    Returns:
+    float: The price, or None if the board does not exist, has no fresh price for the asset or the slot stays busy.
+    """
+    board_quote = quote(asset, asset_type)
+    return None if board_quote is None else board_quote[0]
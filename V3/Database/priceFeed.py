@@ -0,0 +1,184 @@
+import json
+import queue
+import socket
+import sys
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+# append the config file path to sys.path
+sys.path.append('Config Files')
+import config
+
+class Subscriber:
+    """
+    A connection to one subscriber of the price feed, with the batches waiting to be sent to it.
+    The batches are sent from a thread of their own, so that a slow subscriber never holds up the publisher.
+
+    Parameters:
+    connection (multiprocessing.connection.Connection): The connection to the subscriber.
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.batches = queue.Queue(maxsize=config.price_feed['max_pending'])
+        self.alive = True
+        threading.Thread(target=self.send, daemon=True).start()
+
+    def send(self):
+        """
+        Send the queued batches until the subscriber goes away or is dropped.
+        """
+        while self.alive:
+            batch = self.batches.get()
+            if batch is None:
+                break
+            try:
+                self.connection.send_bytes(batch)
+            except Exception:
+                break
+        self.close()
+
+    def offer(self, batch):
+        """
+        Queue a batch for the subscriber, dropping the subscriber if it fell too far behind.
+
+        Parameters:
+        batch (bytes): The encoded batch of prices.
+
+        Returns:
+        bool: False if the subscriber is gone.
+        """
+        if not self.alive:
+            return False
+        try:
+            self.batches.put_nowait(batch)
+            return True
+        except queue.Full:
+            self.close()
+            return False
+
+    def close(self):
+        """
+        Stop sending to the subscriber and close its connection. A sender blocked on the connection fails and exits,
+        a sender waiting for a batch gets None and exits.
+        """
+        self.alive = False
+        self.connection.close()
+        try:
+            self.batches.put_nowait(None)
+        except queue.Full:
+            pass
+
+class Publisher:
+    """
+    Local price feed served by dataManager. Subscribers connect to config.price_feed['port'] and receive
+    every published batch of prices as JSON {"asset type:asset name": [price, time]} (see receive). The type is part
+    of the key because some cryptocurrencies share their name with a stock (e.g. SOL, LINK).
+    """
+    def __init__(self):
+        self.listener = Listener(('localhost', config.price_feed['port']), authkey=config.price_feed['authkey'])
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.closed = False
+        # Accept the subscribers in the background
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        """
+        Accept new subscribers until the feed is closed.
+        """
+        while not self.closed:
+            try:
+                connection = self.listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError):
+                # A client that failed the handshake
+                continue
+            except OSError:
+                # The listener was closed
+                break
+            with self.lock:
+                self.subscribers.append(Subscriber(connection))
+
+    def publish(self, prices):
+        """
+        Queue a batch of prices for every subscriber, dropping the subscribers that went away or fell behind.
+        The prices are sent as JSON by the sender thread of each subscriber, so this never blocks.
+
+        Parameters:
+        prices (dict): The price and time of each asset, keyed by (asset name, asset type).
+
+        Returns:
+        dict: a dictionary containing the status of the operation and any relevant data.
+            The dictionary has the following keys:
+                'data': data returned from the function.
+                'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+        """
+        batch = json.dumps({f'{asset_type}:{asset}': quote for (asset, asset_type), quote in prices.items()}).encode()
+        with self.lock:
+            self.subscribers = [subscriber for subscriber in self.subscribers if subscriber.offer(batch)]
+            count = len(self.subscribers)
+        return {
+            'data': f'{len(prices)} prices sent to {count} subscribers.',
+            'msg': 'success'
+        }
+
+    def close(self):
+        """
+        Stop accepting subscribers and disconnect the current ones.
+        """
+        self.closed = True
+        # Closing the listener does not wake a blocked accept, a connection of our own does, and the accept thread then stops
+        try:
+            socket.create_connection(('localhost', config.price_feed['port']), timeout=1).close()
+        except OSError:
+            pass
+        self.listener.close()
+        with self.lock:
+            for subscriber in self.subscribers:
+                subscriber.close()
+            self.subscribers = []
+
+def subscribe():
+    """
+    Connect to the price feed of dataManager.
+
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': the connection to receive the price batches from.
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    try:
+        return {
+            'data': Client(('localhost', config.price_feed['port']), authkey=config.price_feed['authkey']),
+            'msg': 'success'
+        }
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'priceFeed.py',
+                'function': 'subscribe',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        config.log_error(json.dumps(error))
+        return error
+
+def receive(connection):
+    """
+    Receive one batch of prices from the feed. The batches are JSON, never pickles, so a process that connects
+    or listens in place of dataManager can not run code in the subscriber.
+
+    Parameters:
+    connection (multiprocessing.connection.Connection): The connection returned by subscribe.
+
+    Returns:
+    dict: The price and time of each asset, keyed by (asset name, asset type).
+    """
+    prices = {}
+    for key, quote in json.loads(connection.recv_bytes()).items():
+        # Asset types never contain ':', asset names might
+        asset_type, asset = key.split(':', 1)
+        prices[(asset, asset_type)] = tuple(quote)
+    return prices
@@ -0,0 +1,305 @@
+import asyncio
+import json
+import sys
+import time
+
+# append the config file path to sys.path
+sys.path.append('Config Files')
+import config
+# Append the 'Database' folder to path and import the needed module
+sys.path.append('Database')
+import asyncFetcher
+
+# Latest price of every tracked asset, keyed by (asset, asset_type)
+prices = {}
+# Time at which each upstream source was last downloaded
+refreshed = {}
+# Assets whose missing or stale price was already logged, so that each episode is logged once and not on every cycle
+reported = set()
+# Symbols of the stocks listed by the Nasdaq screener and the time they were downloaded, and the download in progress
+stock_symbols = (None, 0.0)
+stock_download = None
+
+def source_of(asset, asset_type):
+    """
+    Get the upstream source that quotes the asset.
+
+    Parameters:
+    asset (str): The name of the asset.
+    asset_type (str): The type of the asset (e.g. stock, crypto).
+
+    Returns:
+    str: The name of the source ('mux', 'coinlore' or 'wsj'), or None if no source quotes the asset.
+    """
+    if asset_type == 'crypto' and asset in config.leveragable_crypto:
+        return 'mux'
+    if asset_type == 'crypto' and asset in config.non_leveragable_crypto:
+        return 'coinlore'
+    if asset_type == 'stock':
+        return 'wsj'
+    return None
+
+async def fetch_mux(assets):
+    """
+    Download the leveraged crypto prices from the Mux liquidity asset list in one request.
+
+    Parameters:
+    assets (list): The names of the assets to price.
+
+    Returns:
+    dict: The price of each asset found, keyed by asset name.
+    """
+    items = (await asyncFetcher.fetch_json(config.crypto['price_url'], 'assets'))['assets']
+    return {item['symbol']: float(item['price']) for item in items if item['symbol'] in assets}
+
+async def fetch_coinlore(assets):
+    """
+    Download the crypto prices from coinlore. The ticker list is downloaded once and indexed by symbol,
+    then the Binance USDT market prices of the wanted coins are requested concurrently.
+
+    Parameters:
+    assets (list): The names of the assets to price.
+
+    Returns:
+    dict: The price of each asset found, keyed by asset name.
+    """
+    coins = (await asyncFetcher.fetch_json('https://api.coinlore.net/api/tickers/?limit=10000', 'data'))['data']
+    coin_ids = {coin['symbol']: coin['id'] for coin in coins if coin['symbol'] in assets}
+    all_markets = await asyncio.gather(
+        *[asyncFetcher.fetch_json('https://api.coinlore.net/api/coin/markets/?id=' + coin_id) for coin_id in coin_ids.values()],
+        return_exceptions=True
+    )
+    data = {}
+    for asset, markets in zip(coin_ids, all_markets):
+        # A coin whose market request failed keeps its previous price
+        if isinstance(markets, Exception):
+            continue
+        for market in markets:
+            if market['name'] == 'Binance' and market['quote'] == 'USDT':
+                data[asset] = float(market['price'])
+    return data
+
+async def fetch_wsj(assets):
+    """
+    Download the stock prices from the WSJ quote API, requesting several stocks per call and the calls concurrently.
+
+    Parameters:
+    assets (list): The names of the assets to price.
+
+    Returns:
+    dict: The price of each asset found, keyed by asset name.
+    """
+    batch_size = config.price_snapshot['stock_batch_size']
+    batches = [assets[start:start + batch_size] for start in range(0, len(assets), batch_size)]
+    all_responses = await asyncio.gather(
+        *[asyncFetcher.fetch_json(
+            'https://api.wsj.net/api/dylan/quotes/v2/comp/quoteByDialect?dialect=official&needed=CompositeTrading|BluegrassChannels&MaxInstrumentMatches=1&accept=application/json&EntitlementToken=cecc4267a0194af89ca343805a3e57af&ckey=cecc4267a0&dialects=Charting&id='
+            + '%2C'.join(f'Stock-US-{asset}' for asset in batch),
+            'InstrumentResponses'
+        ) for batch in batches],
+        return_exceptions=True
+    )
+    data = {}
+    for batch, responses in zip(batches, all_responses):
+        # A batch whose request failed keeps its previous prices
+        if isinstance(responses, Exception):
+            continue
+        # Each response is matched to its stock by the id it echoes back (or the ticker of its match), never by its position,
+        # so that a dropped or reordered instrument can not shift the prices of the other stocks
+        requested = {f'Stock-US-{asset}': asset for asset in batch}
+        for response in responses['InstrumentResponses']:
+            try:
+                match = response['Matches'][0]
+                asset = requested.get(response.get('RequestId')) or requested.get(f"Stock-US-{match['Instrument']['Ticker']}")
+                if asset is not None:
+                    data[asset] = float(match['CompositeTrading']['Last']['Price']['Value'])
+            except (KeyError, IndexError, TypeError, AttributeError):
+                pass
+    return data
+
+fetchers = {
+    'mux': fetch_mux,
+    'coinlore': fetch_coinlore,
+    'wsj': fetch_wsj
+}
+
+async def refresh(assets):
+    """
+    Download every upstream source quoting the given assets once, concurrently, and store the prices in the snapshot.
+    Sources downloaded less than config.price_snapshot['refresh_interval'] seconds ago are skipped.
+
+    Parameters:
+    assets (list): The asset dictionaries (with 'asset_name' and 'asset_type' keys) to price.
+
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': data returned from the function.
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    # Group the distinct assets by the source that quotes them
+    wanted = {}
+    for asset in assets:
+        source = source_of(asset['asset_name'], asset['asset_type'])
+        if source and asset['asset_name'] not in wanted.setdefault(source, []):
+            wanted[source].append(asset['asset_name'])
+    # Forget the prices of the assets that are no longer tracked, so that they are not published anymore
+    tracked = {(asset['asset_name'], asset['asset_type']) for asset in assets}
+    for asset_key in [asset_key for asset_key in prices if asset_key not in tracked]:
+        del prices[asset_key]
+    now = time.time()
+    due = [source for source in wanted if now - refreshed.get(source, 0) >= config.price_snapshot['refresh_interval']]
+    results = await asyncio.gather(*[fetchers[source](wanted[source]) for source in due], return_exceptions=True)
+    failed = []
+    for source, data in zip(due, results):
+        # A failing source keeps its previous prices until they go stale
+        if isinstance(data, Exception):
+            failed.append(f'{source}: {data}')
+            continue
+        asset_type = 'stock' if source == 'wsj' else 'crypto'
+        for name, price in data.items():
+            prices[(name, asset_type)] = (price, now)
+        refreshed[source] = now
+    if failed:
+        error = {
+            'data': {
+                'file': 'priceSnapshot.py',
+                'function': 'refresh',
+                'raise_exception': '; '.join(failed)
+            },
+            'msg': 'error'
+        }
+        config.log_error(json.dumps(error))
+        return error
+    return {
+        'data': f'Price snapshot refreshed for {sum(len(names) for names in wanted.values())} assets.',
+        'msg': 'success'
+    }
+
+def price(asset, asset_type):
+    """
+    Get the price of the asset from the latest snapshot.
+    A missing or stale price is logged once, until the asset has a fresh price again.
+
+    Parameters:
+    asset (str): The name of the asset.
+    asset_type (str): The type of the asset (e.g. stock, crypto).
+
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': data returned from the function.
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    try:
+        if (asset, asset_type) not in prices:
+            raise KeyError(f'No snapshot price for {asset}')
+        price, fetched = prices[(asset, asset_type)]
+        if time.time() - fetched > config.price_snapshot['stale_after']:
+            raise TimeoutError(f'The snapshot price for {asset} is stale')
+        reported.discard((asset, asset_type))
+        return {
+            'data': price,
+            'msg': 'success'
+        }
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'priceSnapshot.py',
+                'function': 'price',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        if (asset, asset_type) not in reported:
+            reported.add((asset, asset_type))
+            config.log_error(json.dumps(error))
+        return error
+
+async def fetch_price(asset, asset_type):
+    """
+    Download the current price of one asset from the upstream source that quotes it, on the shared HTTP session.
+
+    Parameters:
+    asset (str): The name of the asset.
+    asset_type (str): The type of the asset (e.g. stock, crypto).
+
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': data returned from the function.
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    try:
+        source = source_of(asset, asset_type)
+        if source is None:
+            raise ValueError(f'No source quotes {asset}')
+        data = await fetchers[source]([asset])
+        if asset not in data:
+            raise TimeoutError(f'Failed to fetch price for {asset}')
+        prices[(asset, asset_type)] = (data[asset], time.time())
+        return {
+            'data': data[asset],
+            'msg': 'success'
+        }
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'priceSnapshot.py',
+                'function': 'fetch_price',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        config.log_error(json.dumps(error))
+        return error
+
+async def download_stock_symbols():
+    """
+    Download the symbols of the stocks listed by the Nasdaq screener.
+
+    Returns:
+    set: The symbols.
+    """
+    data = await asyncFetcher.fetch_json(
+        'https://api.nasdaq.com/api/screener/stocks?tableonly=true&download=true',
+        'data',
+        request_headers={'origin': 'https://www.nasdaq.com', 'referer': 'https://www.nasdaq.com/'}
+    )
+    return {stock['symbol'] for stock in data['data']['rows']}
+
+async def get_stock_symbols():
+    """
+    Get the symbols of the stocks listed by the Nasdaq screener, downloading them at most once
+    every config.api_server['stock_list_ttl'] seconds. Concurrent callers share one download.
+
+    Returns:
+    dict: a dictionary containing the status of the operation and any relevant data.
+        The dictionary has the following keys:
+            'data': the set of symbols.
+            'msg': a string indicating the status of the operation. It can be either 'success' or 'error'.
+    """
+    global stock_symbols, stock_download
+    try:
+        symbols, downloaded = stock_symbols
+        if symbols is None or time.time() - downloaded >= config.api_server['stock_list_ttl']:
+            if stock_download is None or stock_download.done() or stock_download.get_loop() is not asyncio.get_running_loop():
+                stock_download = asyncio.ensure_future(download_stock_symbols())
+            # A cancelled caller does not cancel the download the other callers wait on
+            symbols = await asyncio.shield(stock_download)
+            stock_symbols = (symbols, time.time())
+        return {
+            'data': symbols,
+            'msg': 'success'
+        }
+    except Exception as e:
+        error = {
+            'data': {
+                'file': 'priceSnapshot.py',
+                'function': 'get_stock_symbols',
+                'raise_exception': str(e)
+            },
+            'msg': 'error'
+        }
+        config.log_error(json.dumps(error))
+        return error
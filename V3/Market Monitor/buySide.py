@@ -1,13 +1,16 @@
 import sys
 import time
 from datetime import datetime
-from multiprocessing import active_children, Process
 import time
 import asyncio
 
 # Append the 'Analysis' folder to path and import the needed module
 sys.path.append('Analysis')
 import gates
+# Append the 'Analysis/Technical' folder to path and import the needed module
+sys.path.append('Analysis/Technical')
+import indicators
+import panelIndicators
 # Append the 'Config Files' folder to path and import the needed module
 sys.path.append('Config Files')
 import config
@@ -17,57 +20,54 @@ import database
 # Append the 'Brokers' folder to path and import the needed module
 sys.path.append('Brokers')
 import orderManager
+# Append the 'Market Monitor' folder to path and import the needed module
+sys.path.append('Market Monitor')
+import orchestrator
 
-def make_decision(asset_data, gate_criteria):
+def make_decision(asset_data, gate_criteria, df=None):
     """Determine whether or not to make a trade based on the output of various gate functions.
     
     Parameters:
     asset_data (str): The data of the asset being traded.
     gate_criteria (str): The criteria for the gate check.
+    df (pandas.DataFrame, optional): The candles of the asset, read from its candle file if not given.
 
     Returns:
     bool: A flag indicating whether or not to make the trade.
     """
-    # Read asset data from CSV file
-    df = config.read_dataframe(config.generate_file_name(asset_data['asset_name'], asset_data['timeframe'])['data'])['data']
+    # Read asset data from the candle file
+    if df is None:
+        df = config.read_dataframe(config.generate_file_name(asset_data['asset_name'], asset_data['timeframe'])['data'])['data']
+    # Calculate each indicator at most once for all of the gates
+    context = indicators.IndicatorContext(df)
     # Get time
     now = datetime.now() 
     human_readable_time = now.strftime('%Y-%m-%d %H:%M:%S')        
-    # List of gate functions to check for trades
-    gate_set1 = [gates.macd_gate, gates.rsi_gate, gates.cci_gate, gates.trend_gate, gates.momentum_gate]
-    gate_set2 = [gates.ichimoku_gate, gates.ema_gate, gates.bollinger_gate, gates.cloud_gate]
-    # Get direction of trade attempt
-    order_type = gates.direction_gate(df)['attempting']
-    # Assume that buy is true until proven otherwise
-    buy = True
+    # Check the gates in the direction of the trade attempt
+    evaluation = gates.evaluate(context, asset_data, gate_criteria)
     # Log data for the final report
     data_log = {}
     data_log['asset_data'] = asset_data
     data_log['flag'] = 'buy'
-    data_log['order_type'] = order_type
+    data_log['order_type'] = evaluation['order_type']
     data_log['check_time'] = human_readable_time
-    # Initialize the gates dictionary which will be filled with gate outputs
-    gates_dictionary = {}
-    # Check if any of the gate functions return false for the specified order type
-    for gate in gate_set1:
-        if gate.__name__ not in asset_data['gate_bypass']:
-            gate_data = gate(df, gate_criteria[gate.__name__])
-            buy = False if gate_data[order_type] == False else buy
-            gates_dictionary[gate.__name__] = {
-                'output': gate_data[order_type],
-                'data': gate_data['data']
-            }
-    for gate in gate_set2:
-        if gate.__name__ not in asset_data['gate_bypass']:
-            gate_data = gate(df, asset_data['asset_price'], gate_criteria[gate.__name__])
-            buy = False if gate_data[order_type] == False else buy
-            gates_dictionary[gate.__name__] = {
-                'output': gate_data[order_type],
-                'data': gate_data['data']
-            }
-    # Update iteration data_log
-    data_log['gates'] = gates_dictionary
-    data_log['decision'] = buy
+    data_log['gates'] = evaluation['gates']
+    data_log['decision'] = evaluation['decision']
+    return handle_decision(asset_data, data_log, df)
+
+def handle_decision(asset_data, data_log, df):
+    """Open the position if the gates decided to buy, log the signal and record the iteration.
+
+    Parameters:
+    asset_data (dict): The data of the asset being traded.
+    data_log (dict): The report of the gate evaluation, with the 'order_type' and the 'decision'.
+    df (pandas.DataFrame): The candles of the asset.
+
+    Returns:
+    dict: The report of the gate evaluation, with the 'status' of the order if one was sent.
+    """
+    buy = data_log['decision']
+    order_type = data_log['order_type']
     # Confirm that position can be opened (long crypto, short crypto, long stock)
     if buy and not (order_type == 'short' and asset_data['asset_type'] == 'stock'):
         if asyncio.run(orderManager.handle_order(data_log))['msg'] == 'success':
@@ -82,21 +82,84 @@ def make_decision(asset_data, gate_criteria):
         else:
             # Update status to fail (1)  
             data_log['status'] = 1
-            # Update the side of the asset and reset
-            database.update_by_value('assets', 'id', asset_data['id'], ['asset_side'], ['reset'])
-            config.reset(df, asset_data['last_action_order_type'], asset_data['asset_name'], asset_data['timeframe'])
-            database.update_by_value('assets', 'id', asset_data['id'], ['asset_side'], ['buy'])
+            # Hold the asset back from new entries until the MACD turns away from the failed order (see reset_over)
+            database.update_by_value(
+                'assets', 'id', asset_data['id'], 
+                ['asset_side', 'last_action_order_type'], 
+                ['reset', data_log['order_type']]
+            )
         # Print data to logging file
-        database.insert_record('signals', [None, asset_data['id'].split('-')[1], str(data_log)])
+        database.insert_record('signals', database.signal_record(None, asset_data['id'].split('-')[1], data_log))
     # Update csv column to reflect latest iteration
     database.update_by_value('assets', 'id', asset_data['id'], ['last_iteration'], [time.ctime(time.time())])
     return data_log
 
-def run(asset_data):
-    """Continuously check the asset price and make a decision based on the updated data.
+def make_decisions(asset_list, gate_criteria, frames):
+    """Determine whether or not to trade many assets of one timeframe, evaluating the gates of all of them at once.
+    The outcome for each asset is the same as make_decision.
 
     Parameters:
-    asset (str): The asset to be monitored.
+    asset_list (list): The data of the assets being traded.
+    gate_criteria (dict): The criteria for the gate check.
+    frames (dict): The candles of each asset, keyed by asset['id'].
+
+    Returns:
+    list: The report of the gate evaluation of each asset.
+    """
+    # Calculate the indicators and check the gates of every asset in one pass
+    panel = gates.evaluate_panel(frames, {asset_data['id']: asset_data['asset_price'] for asset_data in asset_list}, gate_criteria)
+    positions = {key: position for position, key in enumerate(panel['keys'])}
+    human_readable_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    gate_names = [gate.__name__ for gate in gates.gate_set1 + gates.gate_set2]
+    data_logs = []
+    for asset_data in asset_list:
+        position = positions[asset_data['id']]
+        order_type = str(panel['attempting'][position])
+        buy = True
+        gates_dictionary = {}
+        for gate_name in gate_names:
+            if gate_name not in asset_data['gate_bypass']:
+                output = bool(panel['gates'][gate_name][order_type][position])
+                buy = False if output == False else buy
+                gates_dictionary[gate_name] = {
+                    'output': output,
+                    'data': panelIndicators.column(panel['gates'][gate_name]['data'], position)
+                }
+        data_log = {
+            'asset_data': asset_data,
+            'flag': 'buy',
+            'order_type': order_type,
+            'check_time': human_readable_time,
+            'gates': gates_dictionary,
+            'decision': buy
+        }
+        data_logs.append(handle_decision(asset_data, data_log, frames[asset_data['id']]))
+    return data_logs
+
+def reset_over(asset_data, df):
+    """Check if an asset that is resetting may look for entries again, which is once the MACD histogram
+    no longer points in the direction of its last order (the condition config.reset waits for).
+
+    Parameters:
+    asset_data (dict): The data of the asset, with asset_side 'reset'.
+    df (pandas.DataFrame): The candles of the asset.
+
+    Returns:
+    bool: True if the reset is over.
+    """
+    # calculate_macd adds its columns to the frame, which may be shared
+    histogram = indicators.calculate_macd(df.copy())['histogram']
+    order_type = asset_data['last_action_order_type']
+    return not ((order_type == 'long' and histogram > 0) or (order_type == 'short' and histogram < 0))
+
+def tradeable_now(asset_data):
+    """Check if the asset can be traded at this time.
+
+    Parameters:
+    asset_data (dict): The data of the asset.
+
+    Returns:
+    bool: True if the stock market is open for a stock, always True for a cryptocurrency.
     """
     # Get the current time
     now = datetime.now() 
@@ -104,9 +167,29 @@ def run(asset_data):
     market_open = datetime(now.year, now.month, now.day, config.stock_market_hours['open_hour'], config.stock_market_hours['open_minute'])
     market_close = datetime(now.year, now.month, now.day, config.stock_market_hours['close_hour'], config.stock_market_hours['close_minute'])
     # Check if the current time is within the stock market hours or the asset is a cryptocurrency
-    if (((market_open <= now <= market_close) and now.weekday() not in [5, 6]) and (asset_data['asset_type'] == 'stock')) or (asset_data['asset_type'] == 'crypto'):
+    return (((market_open <= now <= market_close) and now.weekday() not in [5, 6]) and (asset_data['asset_type'] == 'stock')) or (asset_data['asset_type'] == 'crypto')
+
+def run(asset_data, df=None):
+    """Continuously check the asset price and make a decision based on the updated data.
+
+    Parameters:
+    asset (str): The asset to be monitored.
+    df (pandas.DataFrame, optional): The candles of the asset, read from its candle file if not given.
+    """
+    if tradeable_now(asset_data):
         # Update the asset data and make a decision based on the updated data
-        make_decision(asset_data, config.gate_settings)
+        make_decision(asset_data, config.gate_settings, df)
+
+def run_panel(asset_list, frames):
+    """Make a decision for every tradeable asset of one timeframe in a single batch.
+
+    Parameters:
+    asset_list (list): The data of the assets to be monitored.
+    frames (dict): The candles of each asset, keyed by asset['id'].
+    """
+    asset_list = [asset_data for asset_data in asset_list if tradeable_now(asset_data)]
+    if asset_list:
+        make_decisions(asset_list, config.gate_settings, frames)
 
 def db_initializer(assets, signals, users, errors, admins):
     """Initialize the specified database tables.
@@ -134,29 +217,8 @@ def db_initializer(assets, signals, users, errors, admins):
 def main():
     # Purify the database
     db_initializer(True, True, True, True, True)
-    # Create loop to consistently check
-    while True:
-        # Get all assets
-        asset_list = config.get_assets()['data']
-        # Get list of unfinished processes
-        running_processes = [process for process in active_children()]
-        # Get list of cancelled processes
-        cancelled_processes = [process for process in running_processes if process.name not in [asset_list[asset]['id'] for asset in asset_list]]
-        # Cancel cancelled processes
-        for process in cancelled_processes:
-            process.terminate()
-        # Isolate assets to be iterated over
-        active_assets = [asset_list[asset] for asset in asset_list if asset_list[asset]['id'] not in [process.name for process in running_processes]]
-        # Iterate over the assets
-        for active_asset in active_assets:
-            # Check if asset has been initialized by csvUpdater
-            if active_asset['initialized_asset'] == 'true' and active_asset['asset_side'] == 'buy':
-                # Create a new Process object
-                queued_process = Process(target=run, name=active_asset['id'], args=(active_asset,))
-                # Start the process
-                queued_process.start()
-        # Wait before running next batch
-        time.sleep(10)
+    # Evaluate the entries only
+    orchestrator.MarketMonitor(refresh=False, entries=True, exits=False).run()
 
 if __name__ == '__main__': 
     main()
\ No newline at end of file
@@ -0,0 +1,221 @@
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Append the 'Config Files' folder to path and import the needed module
+sys.path.append('Config Files')
+import config
+# Append the 'Database' folder to path and import the needed module
+sys.path.append('Database')
+import asyncFetcher
+import candleStore
+import database
+import dataManager
+import priceBoard
+import priceFeed
+import priceSnapshot
+# Append the 'Market Monitor' folder to path and import the needed module
+sys.path.append('Market Monitor')
+import buySide
+import sellSide
+import workerPool
+
+class MarketMonitor:
+    """
+    Run the data refresh, the entry evaluations and the exit management as cooperating asyncio tasks,
+    over one asset table and one candle cache shared by the three.
+    The gate evaluations run on the buy side worker processes and the blocking database and file work on a thread pool.
+
+    Parameters:
+    refresh (bool, optional): Refresh the prices and candles (dataManager). Defaults to True.
+    entries (bool, optional): Evaluate the buy side gates (buySide). Defaults to True.
+    exits (bool, optional): Manage the open positions (sellSide). Defaults to True.
+    """
+    def __init__(self, refresh=True, entries=True, exits=True):
+        self.refresh = refresh
+        self.entries = entries
+        self.exits = exits
+        # Convert the CSV files of the assets initialized before the candle files
+        config.convert_csv_files()
+        # Start the gate workers (from a fork server, see workerPool.context)
+        self.pool = workerPool.WorkerPool(
+            buySide.run_panel if config.market_monitor['panel_entries'] else buySide.run,
+            config.worker_pools['buySide'], 'buySide', config.market_monitor['entry_job_timeout']
+        ) if entries else None
+        # Serve the prices to the monitors running in other processes
+        self.feed = priceFeed.Publisher() if refresh else None
+        self.io = ThreadPoolExecutor(max_workers=config.market_monitor['io_workers'])
+        self.engine = sellSide.ExitEngine() if exits else None
+        # Shared asset table, keyed by asset['id'], and the time it was read
+        self.assets = {}
+        self.assets_read = 0.0
+        # Shared candle cache, keyed by asset_id and cleared whenever the candles may have changed
+        self.cache = {}
+        # Latest prices, and the event telling the exit task that new prices arrived
+        self.quotes = {}
+        self.quotes_ready = None
+
+    def candles(self, asset_name, timeframe):
+        """
+        Get the candles of an asset from the cache, reading its candle file once per refresh.
+
+        Parameters:
+        asset_name (str): The name of the asset.
+        timeframe (str): The timeframe of the asset.
+
+        Returns:
+        pandas.DataFrame: The candles of the asset.
+        """
+        asset_id = f'{asset_name}{timeframe}'
+        if asset_id not in self.cache:
+            self.cache[asset_id] = config.read_dataframe(config.generate_file_name(asset_name, timeframe)['data'])['data']
+        return self.cache[asset_id]
+
+    async def load_assets(self):
+        """
+        Reload the shared asset table, keeping the previous one if the database cannot be read.
+        """
+        loop = asyncio.get_running_loop()
+        read_at = time.time()
+        asset_list = await loop.run_in_executor(self.io, config.get_assets)
+        if asset_list['msg'] == 'success':
+            self.assets = asset_list['data']
+            self.assets_read = read_at
+
+    async def watch_assets(self):
+        """
+        Reload the asset table and drop the cached candles periodically, when no refresh task does it.
+        """
+        while True:
+            await asyncio.sleep(config.market_monitor['refresh_interval'])
+            await self.load_assets()
+            self.cache = {}
+
+    async def refresh_data(self):
+        """
+        Refresh the prices and the candles of every asset, publish the prices and wake the exit task.
+        """
+        loop = asyncio.get_running_loop()
+        known = set()
+        while True:
+            started = time.time()
+            await self.load_assets()
+            active_assets = list(self.assets.values())
+            # Delete the candles of the removed assets
+            live = {asset['asset_id'] for asset in active_assets}
+            for asset_id in known - live:
+                await loop.run_in_executor(self.io, config.delete_csv_file, f'{asset_id}{candleStore.extension}')
+            known = live
+            # Download each price source once and the missing histories, all at the same time
+            histories = await dataManager.fetch_cycle(active_assets)
+            # Publish the snapshot prices to the monitors through the price board and the price feed
+            quotes = dict(priceSnapshot.prices)
+            priceBoard.publish(quotes)
+            self.feed.publish(quotes)
+            # Fold the prices into the candles
+            await asyncio.gather(*[loop.run_in_executor(self.io, dataManager.iterate, *args) for asset_id, args in dataManager.cycle_jobs(active_assets, histories)])
+            self.cache = {}
+            # Wake the exit task
+            self.quotes = quotes
+            self.quotes_ready.set()
+            await asyncio.sleep(max(0, config.market_monitor['refresh_interval'] - (time.time() - started)))
+
+    def entry_jobs(self):
+        """
+        Build the gate evaluation jobs of the initialized buy side assets.
+        The resetting assets whose MACD turned are handed back to the buy side first.
+
+        Returns:
+        list: The jobs (asset['id'], arguments of buySide.run), or one job (timeframe, arguments of buySide.run_panel)
+            per timeframe when the entries are evaluated in batches.
+        """
+        assets = list(self.assets.values())
+        for asset in assets:
+            if asset['initialized_asset'] == 'true' and asset['asset_side'] == 'reset' and buySide.reset_over(asset, self.candles(asset['asset_name'], asset['timeframe'])):
+                database.update_by_value('assets', 'id', asset['id'], ['asset_side'], ['buy'])
+                asset['asset_side'] = 'buy'
+        asset_list = [
+            asset for asset in assets
+            if asset['initialized_asset'] == 'true' and asset['asset_side'] == 'buy'
+        ]
+        if not config.market_monitor['panel_entries']:
+            return [(asset['id'], (asset, self.candles(asset['asset_name'], asset['timeframe']))) for asset in asset_list]
+        # Group the assets by timeframe, the candles of one batch share their bucket times
+        batches = {}
+        for asset in asset_list:
+            batches.setdefault(asset['timeframe'], []).append(asset)
+        return [
+            (timeframe, (batch, {asset['id']: self.candles(asset['asset_name'], asset['timeframe']) for asset in batch}))
+            for timeframe, batch in batches.items()
+        ]
+
+    async def manage_entries(self):
+        """
+        Hand the buy side assets to the gate workers, cancelling the evaluations of removed assets and the ones that run too long.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            read_at = self.assets_read
+            jobs = await loop.run_in_executor(self.io, self.entry_jobs)
+            # A batch job lives as long as its timeframe has assets. An asset whose last evaluation ended after the
+            # asset table was read waits for the next read, as that evaluation may have opened a position or started a reset
+            self.pool.sync(set(self.assets) | {key for key, args in jobs}, jobs, read_at)
+            await asyncio.sleep(config.market_monitor['entry_interval'])
+
+    async def manage_exits(self):
+        """
+        Evaluate the exit rules of the open positions whenever new prices arrive.
+        """
+        loop = asyncio.get_running_loop()
+        last_sync = 0
+        while True:
+            if time.time() - last_sync >= config.market_monitor['exit_sync_interval']:
+                self.engine.sync(self.assets)
+                # Prices come from dataManager when it runs in another process
+                if not self.refresh:
+                    await loop.run_in_executor(self.io, self.engine.connect)
+                last_sync = time.time()
+            timeout = max(0, config.market_monitor['exit_sync_interval'] - (time.time() - last_sync))
+            if self.refresh:
+                try:
+                    await asyncio.wait_for(self.quotes_ready.wait(), timeout)
+                except asyncio.TimeoutError:
+                    continue
+                self.quotes_ready.clear()
+                prices = self.quotes
+            else:
+                prices = await loop.run_in_executor(self.io, self.engine.receive, timeout)
+            await loop.run_in_executor(self.io, self.engine.evaluate, prices, self.candles)
+
+    async def main(self):
+        """
+        Run the enabled tasks until the process exits.
+        """
+        self.quotes_ready = asyncio.Event()
+        await self.load_assets()
+        tasks = [self.refresh_data() if self.refresh else self.watch_assets()]
+        if self.entries:
+            tasks.append(self.manage_entries())
+        if self.exits:
+            tasks.append(self.manage_exits())
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # Close the pooled HTTP session while its event loop is still running
+            await asyncFetcher.close()
+
+    def run(self):
+        """
+        Run the market monitor.
+        """
+        asyncio.run(self.main())
+
+def main():
+    # Purify the database
+    buySide.db_initializer(True, True, True, True, True)
+    # Refresh the data, evaluate the entries and manage the exits in this process
+    MarketMonitor().run()
+
+if __name__ == '__main__':
+    main()
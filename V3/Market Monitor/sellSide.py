@@ -1,9 +1,8 @@
 import json
 import sys
 import time
+import threading
 from datetime import datetime
-from multiprocessing import active_children, Process
-import time
 import asyncio 
 
 # Append the 'Analysis/Technical' folder to path and import the needed module
@@ -15,87 +14,94 @@ import config
 # Append the 'Database' folder to path and import the needed module
 sys.path.append('Database')
 import database
+import priceBoard
+import priceFeed
 # Append the 'Brokers' folder to path and import the needed module
 sys.path.append('Brokers')
 import orderManager
+# Append the 'Market Monitor' folder to path and import the needed module
+sys.path.append('Market Monitor')
+import orchestrator
 
-def make_decision(asset_data):
-    api_key = asset_data['id'].split('-')[1]
-    # Get time
-    now = datetime.now() 
-    human_readable_time = now.strftime('%Y-%m-%d %H:%M:%S')      
-    # Initialize data_log dictionary
-    data_log = {}
-    data_log['asset_data'] = asset_data
-    data_log['flag'] = 'sell'
-    data_log['order_type'] = asset_data['last_action_order_type']
-    data_log['check_time'] = human_readable_time
-    # Continuously update data and calculate indicator values
-    while True:
-        # Periodically wait to not overload the server
-        time.sleep(3)
-        # Read data from file and get number of rows
-        df = config.read_dataframe(config.generate_file_name(asset_data['asset_name'], asset_data['timeframe'])['data'])['data']
-        # Get time
-        now = datetime.now() 
-        human_readable_time = now.strftime('%Y-%m-%d %H:%M:%S')        
-        data_log['check_time'] = human_readable_time
-        # Get current asset price and update data
-        asset_price = indicators.db_price(asset_data['asset_name'])
-        # Calculate EMA, and MACD direction
-        assetEMA = indicators.calculate_ema_dema(df)['ema']
+class Position:
+    """
+    The trailing take-profit and EMA stop rules of one open position, evaluated on every price tick.
+
+    Parameters:
+    asset_data (dict): The asset data containing the asset name, type, order type, amount, multiplier, timeframe, take profit percent, action price, id, and slippage percent.
+    """
+    def __init__(self, asset_data):
+        self.asset_data = asset_data
+        # Initialize data_log dictionary
+        self.data_log = {}
+        self.data_log['asset_data'] = asset_data
+        self.data_log['flag'] = 'sell'
+        self.data_log['order_type'] = asset_data['last_action_order_type']
+        self.data_log['check_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         # Set variables
-        slippage_percent = asset_data['slippage_percent'] if asset_data['last_action_order_type'] == 'short' else asset_data['slippage_percent'] - (asset_data['slippage_percent'] * 2)
+        self.slippage_percent = asset_data['slippage_percent'] if asset_data['last_action_order_type'] == 'short' else asset_data['slippage_percent'] - (asset_data['slippage_percent'] * 2)
         take_profit_percent = asset_data['take_profit_percent'] if asset_data['last_action_order_type'] == 'long' else asset_data['take_profit_percent'] - (asset_data['take_profit_percent'] * 2)
-        profit_target = ((100 + take_profit_percent) * asset_data['last_action_price']) / 100.0
-        data_log['profit_target'] = profit_target
-        # Check if the order is a short or long order
-        if asset_data['last_action_order_type'] == 'short' and asset_price < profit_target:
-            # calculate the slippage target
-            slippage_target = ((100 + slippage_percent) * profit_target) / 100.0
-            # Wait for the most profitable price
-            while asset_price <= slippage_target:
-                # update the profit target
-                if asset_price <= profit_target:
-                    profit_target = asset_price
-                # calculate the new slippage target
-                slippage_target = ((100 + slippage_percent) * profit_target) / 100.0
-                # read the dataframe
-                df = config.read_dataframe(config.generate_file_name(asset_data['asset_name'], asset_data['timeframe'])['data'])['data']
-                # get the current asset price
-                asset_price = indicators.db_price(asset_data['asset_name'])
-                # sleep for 3 seconds
-                time.sleep(3)
-            # Update data_log and exit loop
-            data_log['status'] = 0
-            break
-        if asset_data['last_action_order_type'] == 'long' and asset_price > profit_target:
-            # calculate the slippage target
-            slippage_target = ((100 + slippage_percent) * profit_target) / 100.0
-            # Wait for the most profitable price
-            while asset_price >= slippage_target:
+        self.profit_target = ((100 + take_profit_percent) * asset_data['last_action_price']) / 100.0
+        self.data_log['profit_target'] = self.profit_target
+        # The slippage target is set once the profit target has been reached
+        self.slippage_target = None
+        self.asset_price = None
+
+    def on_tick(self, asset_price, ema):
+        """
+        Evaluate the exit rules at a new price.
+
+        Parameters:
+        asset_price (float): The new price of the asset.
+        ema (float): The current EMA of the asset. Only used before the profit target is reached.
+
+        Returns:
+        bool: True if the position must be closed at this price.
+        """
+        self.data_log['check_time'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.asset_price = asset_price
+        order_type = self.asset_data['last_action_order_type']
+        # Wait for the most profitable price once the profit target has been reached
+        if self.slippage_target is not None:
+            if (order_type == 'short' and asset_price <= self.slippage_target) or (order_type == 'long' and asset_price >= self.slippage_target):
                 # update the profit target
-                if asset_price >= profit_target:
-                    profit_target = asset_price
+                if (order_type == 'short' and asset_price <= self.profit_target) or (order_type == 'long' and asset_price >= self.profit_target):
+                    self.profit_target = asset_price
                 # calculate the new slippage target
-                slippage_target = ((100 + slippage_percent) * profit_target) / 100.0
-                # read the dataframe
-                df = config.read_dataframe(config.generate_file_name(asset_data['asset_name'], asset_data['timeframe'])['data'])['data']
-                # get the current asset price
-                asset_price = indicators.db_price(asset_data['asset_name'])
-                # sleep for 3 seconds
-                time.sleep(3)
-            # Update data_log and exit loop
-            data_log['status'] = 0
-            break
+                self.slippage_target = ((100 + self.slippage_percent) * self.profit_target) / 100.0
+                return False
+            # The price turned past the slippage target
+            self.data_log['status'] = 0
+            return True
+        # Check if the profit target has been reached
+        if (order_type == 'short' and asset_price < self.profit_target) or (order_type == 'long' and asset_price > self.profit_target):
+            # calculate the slippage target and trail the price from this tick on
+            self.slippage_target = ((100 + self.slippage_percent) * self.profit_target) / 100.0
+            return self.on_tick(asset_price, ema)
         # Check if the stop loss conditions are met
-        if (
-            (asset_data['last_action_order_type'] == 'long' and asset_price < assetEMA and asset_data['fundamental_gate'] == 'false') or 
-            (asset_data['last_action_order_type'] == 'short' and asset_price >= assetEMA and asset_data['fundamental_gate'] == 'true')
-        ):
-            break
+        return (
+            (order_type == 'long' and asset_price < ema and self.asset_data['fundamental_gate'] == 'false') or 
+            (order_type == 'short' and asset_price >= ema and self.asset_data['fundamental_gate'] == 'true')
+        )
+
+def close_position(position):
+    """
+    Place the closing order of a position and hand the asset back to the buy side.
+
+    Parameters:
+    position (Position): The position to close, after its exit rules fired.
+
+    Returns:
+    dict: The data log of the position.
+    """
+    asset_data = position.asset_data
+    data_log = position.data_log
+    asset_price = position.asset_price
+    api_key = asset_data['id'].split('-')[1]
     # Update data_log with current asset price
     data_log['asset_price'] = asset_price
+    # Hand the asset back to the buy side, which waits for the MACD to turn before looking for entries (see buySide.reset_over).
+    # The side changes in one update, so the asset is never seen as an open position again
     if asyncio.run(orderManager.handle_order(data_log))['msg'] == 'success':
         # Update status to success (0)  
         data_log['status'] = 0
@@ -103,24 +109,24 @@ def make_decision(asset_data):
         database.update_by_value(
             'assets', 'id', asset_data['id'], 
             ['asset_side', 'last_action_order_type', 'last_action_price'], 
-            ['sell', asset_data['last_action_order_type'], asset_price]
+            ['reset', asset_data['last_action_order_type'], asset_price]
         )
     else:
         # Update status to fail (1)  
         data_log['status'] = 1
+        database.update_by_value('assets', 'id', asset_data['id'], ['asset_side'], ['reset'])
     # Print data to logging file
-    database.insert_record('signals', [None, api_key, str(data_log)])
-    # Change asset variables
-    database.update_by_value('assets', 'id', asset_data['id'], ['asset_side'], ['reset'])
-    config.reset(df, asset_data['last_action_order_type'], asset_data['asset_name'], asset_data['timeframe'])
-    database.update_by_value('assets', 'id', asset_data['id'], ['asset_side'], ['buy'])
+    database.insert_record('signals', database.signal_record(None, api_key, data_log))
     return data_log
 
-def run(asset_data):
-    """Continuously check the asset price and make a decision based on the updated data.
+def tradeable(asset_data):
+    """Check whether a position can be managed now.
 
     Parameters:
-    asset_data (dict): The asset data containing the asset name, type, order type, amount, multiplier, timeframe, take profit percent, action price, id, and slippage percent.
+    asset_data (dict): The asset data of the position.
+
+    Returns:
+    bool: True during the stock market hours for stocks, always for cryptocurrencies.
     """
     # Get the current time
     now = datetime.now() 
@@ -130,34 +136,185 @@ def run(asset_data):
     # Get asset type 
     asset_type = asset_data['asset_type']
     # Check if the current time is within the stock market hours or the asset is a cryptocurrency
-    if ((market_open <= now <= market_close) and (asset_type == 'stock')) or (asset_type == 'crypto'):
-        # Make a decision based on the updated data
-        make_decision(asset_data)
+    return ((market_open <= now <= market_close) and (asset_type == 'stock')) or (asset_type == 'crypto')
+
+class ExitEngine:
+    """
+    Manage every open position in one process, evaluating the exit rules as soon as dataManager publishes a price.
+    """
+    def __init__(self):
+        # Open positions, keyed by asset['id']
+        self.positions = {}
+        # Threads closing positions, keyed by asset['id']
+        self.closing = {}
+        # Ids of the closed positions whose asset still showed as open in the asset table when their close finished
+        self.closed = set()
+        # Ids of the positions whose close failed with an error, which are tracked again
+        self.failed = set()
+        # Price read from the database for each position polled without the feed, and the time it was first read
+        self.polled = {}
+        # Time of the last price evaluated for each position
+        self.seen = {}
+        self.feed = None
+
+    def sync(self, asset_list):
+        """
+        Track the new open positions and drop the removed ones.
+        A closed position is only tracked again once the asset table has shown that it was closed,
+        as the table may have been read before the close.
+
+        Parameters:
+        asset_list (dict): All assets, keyed by asset['id'].
+        """
+        for closed_id in [asset_id for asset_id, thread in self.closing.items() if not thread.is_alive()]:
+            del self.closing[closed_id]
+            if closed_id in self.failed:
+                # The asset may still be open, track it again from the asset table
+                self.failed.discard(closed_id)
+            else:
+                self.closed.add(closed_id)
+        # Forget the closes that the asset table caught up with
+        self.closed = {asset_id for asset_id in self.closed if asset_id in asset_list and asset_list[asset_id]['asset_side'] == 'sell'}
+        # Cancel the positions of removed assets
+        for asset_id in list(self.positions):
+            if asset_id not in asset_list or asset_list[asset_id]['asset_side'] != 'sell':
+                del self.positions[asset_id]
+        self.seen = {asset_id: fetched for asset_id, fetched in self.seen.items() if asset_id in self.positions}
+        # Track the initialized sell assets
+        for asset_id, asset_data in asset_list.items():
+            if asset_id in self.positions or asset_id in self.closing or asset_id in self.closed:
+                continue
+            if asset_data['initialized_asset'] == 'true' and asset_data['asset_side'] == 'sell' and tradeable(asset_data):
+                self.positions[asset_id] = Position(asset_data)
+
+    def receive(self, timeout):
+        """
+        Wait for the next prices from the feed, or poll them when the feed is not available.
+
+        Parameters:
+        timeout (float): The maximum number of seconds to wait.
+
+        Returns:
+        dict: The price and time of each asset, keyed by (asset name, asset type).
+        """
+        if self.feed is None:
+            # Without the feed, poll the prices every 3 seconds like before
+            time.sleep(min(timeout, 3))
+            return self.poll()
+        prices = {}
+        try:
+            if self.feed.poll(timeout):
+                # Merge every batch waiting in the feed, the latest price wins
+                while self.feed.poll(0):
+                    prices.update(priceFeed.receive(self.feed))
+        except (EOFError, OSError):
+            self.feed = None
+        return prices
+
+    def poll(self):
+        """
+        Read the price of every position once, from the price board or else from its asset record, without waiting.
+        The age of a database price is unknown, so it only counts as a new price once it differs from the first one read.
+        The assets without a price are skipped.
+
+        Returns:
+        dict: The price and time of each asset, keyed by (asset name, asset type).
+        """
+        prices = {}
+        polled = {}
+        for asset_id, position in list(self.positions.items()):
+            asset_key = (position.asset_data['asset_name'], position.asset_data['asset_type'])
+            if asset_key in prices:
+                continue
+            board_quote = priceBoard.quote(*asset_key)
+            if board_quote is not None:
+                prices[asset_key] = board_quote
+                continue
+            try:
+                asset_price = float(database.select_by_value('assets', 'id', asset_id)[0]['asset_price'])
+            except (IndexError, TypeError, ValueError):
+                # The asset was removed or has no price yet
+                continue
+            previous = self.polled.get(asset_key)
+            if previous is None:
+                polled[asset_key] = (asset_price, 0.0)
+            elif previous[0] != asset_price:
+                polled[asset_key] = (asset_price, time.time())
+            else:
+                polled[asset_key] = previous
+            prices[asset_key] = polled[asset_key]
+        self.polled = polled
+        return prices
+
+    def close(self, asset_id, position):
+        """
+        Close a position, marking it as failed if the close raises so that it is tracked again.
+
+        Parameters:
+        asset_id (str): The id of the asset.
+        position (Position): The position to close.
+        """
+        try:
+            close_position(position)
+        except Exception as e:
+            self.failed.add(asset_id)
+            error = {
+                'data': {
+                    'file': 'sellSide.py',
+                    'function': 'close',
+                    'raise_exception': str(e)
+                },
+                'msg': 'error'
+            }
+            config.log_error(json.dumps(error))
+
+    def evaluate(self, prices, candles=None):
+        """
+        Evaluate the exit rules of the positions whose asset has a new price, and close the positions whose rules fired.
+
+        Parameters:
+        prices (dict): The price and time of each asset, keyed by (asset name, asset type).
+        candles (function, optional): Returns the candles of an asset name and timeframe. Defaults to reading the candle file.
+        """
+        emas = {}
+        for asset_id, position in list(self.positions.items()):
+            name = position.asset_data['asset_name']
+            # Some cryptocurrencies share their name with a stock, so the prices are keyed by type too
+            asset_key = (name, position.asset_data['asset_type'])
+            if asset_key not in prices:
+                continue
+            asset_price, fetched = prices[asset_key]
+            if fetched <= self.seen.get(asset_id, 0):
+                continue
+            self.seen[asset_id] = fetched
+            # The EMA is only needed before the profit target is reached, and computed once per asset and timeframe
+            ema = None
+            if position.slippage_target is None:
+                key = (name, position.asset_data['timeframe'])
+                if key not in emas:
+                    if candles is None:
+                        df = config.read_dataframe(config.generate_file_name(name, position.asset_data['timeframe'])['data'])['data']
+                    else:
+                        df = candles(name, position.asset_data['timeframe'])
+                    emas[key] = indicators.calculate_ema_dema(df)['ema']
+                ema = emas[key]
+            if position.on_tick(asset_price, ema):
+                del self.positions[asset_id]
+                # The closing order runs aside so the other positions keep being evaluated
+                self.closing[asset_id] = threading.Thread(target=self.close, args=(asset_id, position), daemon=True)
+                self.closing[asset_id].start()
+
+    def connect(self):
+        """
+        Subscribe to the price feed of dataManager if not subscribed yet.
+        """
+        if self.feed is None:
+            subscription = priceFeed.subscribe()
+            self.feed = subscription['data'] if subscription['msg'] == 'success' else None
 
 def main(): 
-    # Create loop to consistently check
-    while True:
-        # Get all assets
-        asset_list = config.get_assets()['data']
-        # Get list of unfinished processes
-        running_processes = [process for process in active_children()]
-        # Get list of cancelled processes
-        cancelled_processes = [process for process in running_processes if process.name not in [asset_list[asset]['id'] for asset in asset_list]]
-        # Cancel cancelled processes
-        for process in cancelled_processes:
-            process.terminate()
-        # Isolate assets to be iterated over
-        active_assets = [asset_list[asset] for asset in asset_list if asset_list[asset]['id'] not in [process.name for process in running_processes]]
-        # Iterate over the assets
-        for active_asset in active_assets:
-            # Check if asset has been initialized by csvUpdater
-            if active_asset['initialized_asset'] == 'true' and active_asset['asset_side'] == 'sell':
-                # Create a new Process object
-                queued_process = Process(target=run, name=active_asset['id'], args=(active_asset,))
-                # Start the process
-                queued_process.start()
-        # Wait before running next batch
-        time.sleep(10)
+    # Manage the exits only, from the prices published by dataManager
+    orchestrator.MarketMonitor(refresh=False, entries=False, exits=True).run()
 
 if __name__ == '__main__': 
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,202 @@
+import json
+import multiprocessing
+import queue
+import sys
+import time
+
+# Append the 'Config Files' folder to path and import the needed module
+sys.path.append('Config Files')
+import config
+
+# Workers are started by a fork server (or spawned where there is none) and never forked from the monitor itself:
+# the monitor runs threads (database, candle files, HTTP) whose locks a forked child could inherit in a held state
+context = multiprocessing.get_context('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+def work(target, inbox, outbox, name):
+    """
+    Run asset jobs received on the inbox until the worker is terminated.
+
+    Parameters:
+    target (function): The function run for every job.
+    inbox (multiprocessing.Queue): The queue the jobs (key, args) are received on.
+    outbox (multiprocessing.Queue): The queue the worker reports finished jobs (name, key) on.
+    name (str): The name of the worker.
+    """
+    while True:
+        key, args = inbox.get()
+        try:
+            target(*args)
+        except Exception as e:
+            error = {
+                'data': {
+                    'file': 'workerPool.py',
+                    'function': target.__name__,
+                    'raise_exception': f'{key}: {e}'
+                },
+                'msg': 'error'
+            }
+            config.log_error(json.dumps(error))
+        outbox.put((name, key))
+
+class WorkerPool:
+    """
+    A fixed number of long-lived worker processes running asset jobs.
+    Each job is identified by a key (e.g. asset['id']) and at most one job per key runs at a time.
+
+    Parameters:
+    target (function): The function run for every job.
+    size (int): The number of worker processes.
+    name (str): The prefix of the worker process names.
+    timeout (float, optional): The number of seconds a job may run before its worker is replaced. Defaults to no limit.
+    """
+    def __init__(self, target, size, name, timeout=None):
+        self.target = target
+        self.name = name
+        self.timeout = timeout
+        self.outbox = context.Queue()
+        # Worker name -> (process, inbox)
+        self.workers = {}
+        # Worker name -> key of the job it is running, and the time it was handed the job
+        self.running = {}
+        self.started = {}
+        # Key -> time its last job was seen finished (or abandoned)
+        self.finished = {}
+        # Jobs (key, args) waiting for an idle worker
+        self.pending = []
+        # Key -> number of the dispatch that last ran it, so that every key gets its turn
+        self.dispatched = {}
+        self.dispatches = 0
+        for number in range(size):
+            self.start(f'{name}-{number}')
+
+    def start(self, worker_name):
+        """
+        Start (or replace) the worker with the given name.
+
+        Parameters:
+        worker_name (str): The name of the worker.
+        """
+        inbox = context.Queue()
+        process = context.Process(target=work, name=worker_name, args=(self.target, inbox, self.outbox, worker_name), daemon=True)
+        process.start()
+        self.workers[worker_name] = (process, inbox)
+        self.running.pop(worker_name, None)
+
+    def restart(self, worker_name):
+        """
+        Terminate a worker, abandoning its job, and start a fresh one in its place.
+
+        Parameters:
+        worker_name (str): The name of the worker.
+        """
+        process, _ = self.workers[worker_name]
+        process.terminate()
+        process.join()
+        self.start(worker_name)
+
+    def collect(self):
+        """
+        Mark the workers that reported a finished job as idle and replace the workers that died.
+        """
+        while True:
+            try:
+                worker_name, key = self.outbox.get_nowait()
+            except queue.Empty:
+                break
+            if self.running.get(worker_name) == key:
+                del self.running[worker_name]
+            self.finished[key] = time.time()
+        for worker_name, (process, _) in list(self.workers.items()):
+            if not process.is_alive():
+                self.start(worker_name)
+
+    def expire(self):
+        """
+        Replace the workers whose job ran longer than the timeout, so that one stuck job does not hold a worker.
+
+        Returns:
+        list: The keys of the abandoned jobs.
+        """
+        expired = []
+        if self.timeout is None:
+            return expired
+        for worker_name, key in list(self.running.items()):
+            if time.time() - self.started[worker_name] > self.timeout:
+                error = {
+                    'data': {
+                        'file': 'workerPool.py',
+                        'function': 'expire',
+                        'raise_exception': f'{key}: {self.target.__name__} ran longer than {self.timeout}s, {worker_name} was restarted'
+                    },
+                    'msg': 'error'
+                }
+                config.log_error(json.dumps(error))
+                self.restart(worker_name)
+                self.finished[key] = time.time()
+                expired.append(key)
+        return expired
+
+    def busy(self):
+        """
+        Get the keys of the jobs currently running.
+
+        Returns:
+        set: The keys of the running jobs.
+        """
+        return set(self.running.values())
+
+    def cancel(self, live_keys):
+        """
+        Cancel the running jobs whose key is no longer live, replacing their workers.
+
+        Parameters:
+        live_keys (set): The keys of every asset that still exists.
+
+        Returns:
+        list: The keys of the cancelled jobs.
+        """
+        cancelled = []
+        for worker_name, key in list(self.running.items()):
+            if key not in live_keys:
+                self.restart(worker_name)
+                cancelled.append(key)
+        return cancelled
+
+    def sync(self, live_keys, jobs, read_at=None):
+        """
+        Bring the pool in line with the latest asset list. Running jobs whose key is no longer live
+        or that ran past the timeout are cancelled, the pending jobs are replaced by the given jobs that are not already running,
+        and pending jobs are handed to idle workers, the jobs that ran least recently first.
+
+        Parameters:
+        live_keys (set): The keys of every asset that still exists.
+        jobs (list): The jobs (key, args) wanted in this cycle, in order.
+        read_at (float, optional): The time the arguments of the jobs were read. A job whose key finished after it is held back,
+            since its arguments predate what that run wrote (e.g. the asset side). Defaults to no hold back.
+
+        Returns:
+        list: The keys of the cancelled jobs.
+        """
+        self.collect()
+        cancelled = self.cancel(live_keys) + self.expire()
+        self.dispatched = {key: number for key, number in self.dispatched.items() if key in live_keys}
+        self.finished = {key: finished for key, finished in self.finished.items() if key in live_keys}
+        # Queue the latest version of every job that is not running yet
+        running_keys = self.busy()
+        self.pending = [
+            (key, args) for key, args in jobs
+            if key not in running_keys and (read_at is None or self.finished.get(key, 0) < read_at)
+        ]
+        self.pending.sort(key=lambda job: self.dispatched.get(job[0], -1))
+        # Hand the pending jobs to the idle workers
+        for worker_name, (_, inbox) in self.workers.items():
+            if not self.pending:
+                break
+            if worker_name not in self.running:
+                key, args = self.pending.pop(0)
+                inbox.put((key, args))
+                self.running[worker_name] = key
+                self.started[worker_name] = time.time()
+                self.dispatches += 1
+                self.dispatched[key] = self.dispatches
+        return cancelled
@@ -2,7 +2,9 @@ from discord.ext import commands
 from datetime import datetime
 import discord
 import asyncio
+import json
 import sys
+import time
 
 # Append the 'Config Files' folder to path and import the needed module
 sys.path.append('Config Files')
@@ -12,6 +14,16 @@ intents = discord.Intents.default()
 intents.message_content = True
 client = commands.Bot(command_prefix='$', intents=intents)
 
+# Id of the latest signal handled; only signals after it are read
+high_water_mark = None
+# Discord channel id of each API key, and the time the map was read
+channels = {}
+channels_loaded = 0.0
+# Earliest time the next message may be sent
+next_send = 0.0
+# on_ready runs again after every reconnect, the notifier loop must only start once
+started = False
+
 async def generateEmbed(asset, asset_type, flag, type, amount, multiplier, price):
     embed = discord.Embed(
         title='New Transaction',
@@ -24,51 +36,141 @@ async def generateEmbed(asset, asset_type, flag, type, amount, multiplier, price
     # embed.set_footer(text='Vulcan Asset Management | vam.network', icon_url='Program Files/Images/discord_message_icon.png')
     return embed
 
+def log_error(function, e):
+    """
+    Log an error of the notifier.
+
+    Parameters:
+    function (str): The name of the function the error happened in.
+    e (Exception): The error.
+    """
+    error = {
+        'data': {
+            'file': 'discordNotifier.py',
+            'function': function,
+            'raise_exception': str(e)
+        },
+        'msg': 'error'
+    }
+    config.log_error(json.dumps(error))
+
+async def get_channels():
+    """
+    Get the Discord channel of each API key, reading the users again once the map is older than config.discord_notifier['channel_ttl'].
+    If the users can not be read, the previous map is kept.
+
+    Returns:
+    dict: The Discord channel id of each API key that has one.
+    """
+    global channels, channels_loaded
+    if time.monotonic() - channels_loaded >= config.discord_notifier['channel_ttl']:
+        users = await asyncio.to_thread(config.get_users)
+        if users['msg'] == 'success':
+            # Discord channel ids have at least 18 digits
+            channels = {api_key: int(rows[0]['discord_channels']) for api_key, rows in users['data'].items() if len(rows[0]['discord_channels'] or '') >= 18}
+            channels_loaded = time.monotonic()
+    return channels
+
+async def pace():
+    """
+    Wait until the next message may be sent, so that at most config.discord_notifier['messages_per_second'] messages are sent per second.
+    """
+    global next_send
+    now = time.monotonic()
+    wait = next_send - now
+    next_send = max(now, next_send) + 1.0 / config.discord_notifier['messages_per_second']
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+async def send_embeds(channel_id, embeds):
+    """
+    Send embeds to a channel, as few messages as possible.
+
+    Parameters:
+    channel_id (int): The id of the Discord channel.
+    embeds (list): The embeds to send.
+    """
+    channel = client.get_channel(channel_id)
+    if channel is None:
+        log_error('send_embeds', ValueError(f'Discord channel {channel_id} not found.'))
+        return
+    size = config.discord_notifier['embeds_per_message']
+    for start in range(0, len(embeds), size):
+        await pace()
+        try:
+            await channel.send(embeds=embeds[start:start + size])
+        except Exception as e:
+            log_error('send_embeds', e)
+
+async def notify_new_signals():
+    """
+    Send the signals added since the last check to the Discord channels of their users.
+    The signals are read in pages after the high-water mark, and the signals of one channel are sent together.
+    When the signals table was recreated (buySide.db_initializer drops it on startup), its ids start again from 1,
+    so a latest id below the high-water mark resets the mark to the start of the table.
+
+    Returns:
+    int: The number of signals read.
+    """
+    global high_water_mark
+    read = 0
+    last_signal = await asyncio.to_thread(config.get_last_signal_id)
+    if last_signal['msg'] != 'success':
+        return read
+    if last_signal['data'] < high_water_mark:
+        high_water_mark = 0
+    while True:
+        page = await asyncio.to_thread(config.get_signals, high_water_mark, config.discord_notifier['batch_size'])
+        if page['msg'] != 'success':
+            return read
+        signals = page['data']['items']
+        if not signals:
+            return read
+        user_channels = await get_channels()
+        # Group the embeds by channel, in signal order
+        batches = {}
+        for signal in signals:
+            if signal['api_key'] in user_channels:
+                embed = await generateEmbed(
+                    signal['asset_name'],
+                    signal['asset_type'],
+                    signal['flag'],
+                    signal['order_type'],
+                    signal['amount'],
+                    signal['multiplier'],
+                    signal['price']
+                )
+                batches.setdefault(user_channels[signal['api_key']], []).append(embed)
+        for channel_id, embeds in batches.items():
+            await send_embeds(channel_id, embeds)
+        high_water_mark = signals[-1]['id']
+        read += len(signals)
+        if page['data']['next_after_id'] is None:
+            return read
+
 @client.event
 async def on_ready():
+    global high_water_mark, started
     # Update the bot's presence to indicate that it is watching the Market
     await client.change_presence(activity=discord.Activity(type=discord.ActivityType.watching, name='the Market'))
-    # Fetch all signals from the database
-    allSignals = config.get_signals()['data']
-    oldSignals = []
-    # Add all signals to the oldSignals list
-    for key in allSignals.keys():
-        signal = allSignals[key]
-        if signal not in oldSignals:
-            oldSignals.append(signal)
+    if started:
+        return
+    started = True
+    # Only the signals added from now on are sent
+    while high_water_mark is None:
+        last_signal = await asyncio.to_thread(config.get_last_signal_id)
+        if last_signal['msg'] == 'success':
+            high_water_mark = last_signal['data']
+        else:
+            await asyncio.sleep(config.discord_notifier['poll_interval'])
     # Continuously check for new signals
     while True:
-        allSignals = config.get_signals()['data']
-        for key in allSignals.keys():
-            signal = allSignals[key]            
-            # If a new signal is found, add it to the oldSignals list and send the signal to the user's discord channel
-            if signal not in oldSignals:
-                oldSignals.append(signal)
-                # Convert the signal data from a string to a JSON object
-                signal_data = config.string_to_json(signal[0]['signal'])['data']
-                # Get the api_key of the user associated with the signal
-                signal_api_key = signal[0]['api_key']
-                # Fetch all users from the database
-                users = config.get_users()['data']
-                for user in users:
-                    # If the user's api_key matches the signal's api_key and they have at least 18 discord channels
-                    if users[user][0]['api_key'] == signal_api_key and len(users[user][0]['discord_channels']) >= 18:
-                        # Get the discord channel id
-                        channel_id = int(users[user][0]['discord_channels'])
-                        channel = client.get_channel(channel_id)
-                        # Send the signal data to the discord channel in the form of an embed
-                        await channel.send(
-                            embed = await generateEmbed(
-                                signal_data['asset_data']['asset_name'], 
-                                signal_data['asset_data']['asset_type'], 
-                                signal_data['flag'], 
-                                signal_data['order_type'], 
-                                signal_data['asset_data']['amount'], 
-                                signal_data['asset_data']['multiplier'], 
-                                signal_data['asset_data']['asset_price']
-                            )
-                        )
-        # Sleep for 5 seconds before checking for new signals again
-        await asyncio.sleep(5)
+        try:
+            await notify_new_signals()
+        except Exception as e:
+            log_error('on_ready', e)
+        # Sleep before checking for new signals again
+        await asyncio.sleep(config.discord_notifier['poll_interval'])
 
-client.run(config.api_keys['discord'])
+if __name__ == '__main__':
+    client.run(config.api_keys['discord'])
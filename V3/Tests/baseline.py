@@ -0,0 +1,164 @@
+import sys
+import numpy as np
+
+# Append the 'Config Files' folder to path and import the needed module
+sys.path.append('Config Files')
+import config
+
+# The indicator implementations as they were before they were vectorized, kept unchanged
+# so that the tests can check the new ones against them and the benchmarks can time both
+
+def calculate_macd(df):
+    """
+    Calculate the MACD for the given DataFrame, walking the rows to find the direction and the last turn.
+
+    Args:
+    df (pandas.DataFrame): The DataFrame to calculate the MACD for.
+
+    Returns:
+    dict: The same dictionary as indicators.calculate_macd.
+    """
+    # get the number of rows in the DataFrame
+    num_rows = df.shape[0]
+    # Calculate the MACD
+    df['macd'] = df['close'].ewm(span=12).mean() - df['close'].ewm(span=26).mean()
+    # Calculate the MACD signal
+    df['macd_signal'] = df['macd'].ewm(span=9).mean()
+    # Calculate the MACD histogram
+    df['macd_hist'] = df['macd'] - df['macd_signal']
+
+    # Initialize variables to track the MACD direction and turn time
+    turned = ''
+    final_dir = ''
+    values = []
+    # Iterate through the rows of the DataFrame
+    for _, row in df.iterrows():
+        # If the MACD is greater than or equal to the MACD signal
+        if row['macd'] >= row['macd_signal']:
+            # If the final direction is not positive
+            if final_dir != 'long':
+                # Reset the values and update the turned and final direction variables
+                values = []
+                turned = row['datetime']
+                final_dir = 'long'
+            else:
+                # Append the MACD value to the values list
+                values.append(row['macd'])
+        # If the MACD is less than the MACD signal
+        if row['macd'] < row['macd_signal']:
+            # If the final direction is not negative
+            if final_dir != 'short':
+                # Reset the values and update the turned and final direction variables
+                values = []
+                turned = row['datetime']
+                final_dir = 'short'
+            else:
+                # Append the MACD value to the values list
+                values.append(row['macd'])
+    return {
+        'macd': df['macd'][num_rows - 1],
+        'macdSignal': df['macd_signal'][num_rows - 1],
+        'histogram': df['macd_hist'][num_rows - 1],
+        'macdDirection': final_dir,
+        'turnTime': turned,
+        'periodSinceTurn': config.string_to_epoch(turned),
+        'values': values,
+        'df': df
+    }
+
+def calculate_trend(df):
+    """
+    Calculate the personal values for the given DataFrame, counting the rows above and below the EMA again for every window size.
+
+    Args:
+    df (pandas.DataFrame): The DataFrame to calculate the personal values for.
+
+    Returns:
+    dict: The same dictionary as indicators.calculate_trend.
+    """
+    # Calculate the EMA for the closing price
+    df['ema'] = df['open'].ewm(span=200).mean()
+    greater_count = 0
+    less_count = 0
+    dft = 0
+    for x in range(1, len(df)):
+        dft = df.tail(x)
+        greater_count = dft.loc[dft['close'] > dft['ema']].shape[0]
+        less_count = dft.loc[dft['close'] < dft['ema']].shape[0]
+        if greater_count > 0 and less_count > 0:
+            if (abs(greater_count - less_count) / greater_count) * 100.0 >= 50 and x >= 200:
+                break
+    return {
+        'dftLen': len(dft),
+        'greaterCount': greater_count,
+        'lessCount': less_count,
+        'df': df
+    }
+
+def calculate_atr(df):
+    """
+    Calculate the ATR for the given DataFrame, with the true range of each row computed by a Python call per row.
+
+    Args:
+    df (pandas.DataFrame): The DataFrame to calculate the ATR for.
+
+    Returns:
+    dict: The same dictionary as indicators.calculate_atr.
+    """
+    # get the number of rows in the DataFrame
+    num_rows = df.shape[0]
+    # Calculate the true range of each row
+    df['true_range'] = df[['high', 'low', 'close']].apply(lambda x: max(x) - min(x), axis=1)
+    # Calculate the average true range using the specified window
+    df['avg_true_range'] = df['true_range'].rolling(window=12).mean().iloc[-1]
+    return {
+        'atr': float(df['avg_true_range'][num_rows - 1]),
+        'df': df
+    }
+
+def calculate_adx(df):
+    """
+    Calculate the ADX for the given DataFrame, with the true range and the zero guard of the sum computed by a Python call per row.
+
+    Args:
+    df (pandas.DataFrame): The DataFrame to calculate the ADX for.
+
+    Returns:
+    float: The same value as indicators.calculate_adx.
+    """
+    dilen=14 
+    adxlen=14
+    # get the number of rows in the DataFrame
+    num_rows = df.shape[0]
+    # calculate plus and minus directional indices
+    df['up'] = df['high'].diff()
+    df['down'] = df['low'].diff()
+    df['plusDM'] = np.where((df['up'] > df['down']) & (df['up'] > 0), df['up'], 0)
+    df['minusDM'] = np.where((df['down'] > df['up']) & (df['down'] > 0), df['down'], 0)
+    df['truerange'] = df[['high', 'low', 'close']].apply(lambda x: x.max() - x.min(), axis=1)
+    df['plus'] = 100 * df['plusDM'].rolling(dilen).mean() / df['truerange'].rolling(dilen).mean()
+    df['minus'] = 100 * df['minusDM'].rolling(dilen).mean() / df['truerange'].rolling(dilen).mean()
+    # calculate ADX
+    df['sum'] = df['plus'] + df['minus']
+    df['adx'] = 100 * np.abs(df['plus'] - df['minus']).rolling(adxlen).mean() / df['sum'].apply(lambda x: 1 if x == 0 else x).rolling(adxlen).mean()
+    return df['adx'][num_rows - 1]
+
+def calculate_cci(df):
+    """
+    Calculate the CCI for the given DataFrame, with the deviation of each window computed by a Python call per window.
+
+    Args:
+    df (pandas.DataFrame): The DataFrame to calculate the CCI for.
+
+    Returns:
+    dict: The same dictionary as indicators.calculate_cci.
+    """
+    # get the number of rows in the DataFrame
+    num_rows = df.shape[0]
+    # calculate the simple moving average and CCI
+    df['sma'] = df['close'].rolling(window=20).mean()
+    df['cci'] = (df['close'] - df['sma']) / (0.015 * df['close'].rolling(window=20).apply(lambda x: np.std(x, ddof=1), raw=True))
+    return {
+        'cci': float(df['cci'][num_rows - 1]),
+        'df': df
+    }
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+def random_candles(rows, seed=0, start=100.0, step='1min'):
+    """
+    Generate random walk candles in the format of the candle files.
+
+    Args:
+    rows (int): The number of candles.
+    seed (int, optional): The seed of the random walk. Defaults to 0.
+    start (float, optional): The first open price. Defaults to 100.0.
+    step (str, optional): The time between two candles. Defaults to '1min'.
+
+    Returns:
+    pandas.DataFrame: The candles, with the datetime, high, low, open and close columns.
+    """
+    generator = np.random.default_rng(seed)
+    close = start * np.exp(np.cumsum(generator.normal(0, 0.002, rows)))
+    open = np.concatenate(([start], close[:-1]))
+    spread = np.abs(generator.normal(0, 0.001, rows)) * close
+    return pd.DataFrame({
+        'datetime': pd.date_range('2023-01-01', periods=rows, freq=step).strftime('%Y-%m-%d %H:%M:%S'),
+        'high': np.maximum(open, close) + spread,
+        'low': np.minimum(open, close) - spread,
+        'open': open,
+        'close': close
+    })
+
+def balanced_candles(rows, start=100.0):
+    """
+    Generate candles that close above and below their open in turn, so that no window is dominated
+    by either side of the EMA and calculate_trend has to look at every window.
+
+    Args:
+    rows (int): The number of candles.
+    start (float, optional): The open price of every candle. Defaults to 100.0.
+
+    Returns:
+    pandas.DataFrame: The candles, with the datetime, high, low, open and close columns.
+    """
+    df = random_candles(rows)
+    df['open'] = start
+    df['close'] = np.where(np.arange(rows) % 2 == 0, start * 1.001, start * 0.999)
+    df['high'] = start * 1.002
+    df['low'] = start * 0.998
+    return df
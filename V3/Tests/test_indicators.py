@@ -0,0 +1,145 @@
+import sys
+import numpy as np
+import pytest
+
+# Run from the V3 folder: python -m pytest Tests
+# Append the 'Analysis' folders to path and import the needed modules
+sys.path.append('Analysis')
+sys.path.append('Analysis/Technical')
+import gates
+import indicators
+import baseline
+from candles import random_candles, balanced_candles
+
+def macd_cases():
+    # Random walks of different lengths
+    for rows in (1, 2, 35, 500, 3000):
+        for seed in range(3):
+            yield f'walk-{rows}-{seed}', random_candles(rows, seed)
+    # Flat prices, where the MACD equals its signal on every row
+    flat = random_candles(300)
+    flat[['high', 'low', 'open', 'close']] = 100.0
+    yield 'flat', flat
+    # Missing closes, where the MACD is NaN and the rows do not change the direction
+    gaps = random_candles(500, 7)
+    gaps.loc[[0, 1, 250, 251, 499], 'close'] = np.nan
+    yield 'gaps', gaps
+
+@pytest.mark.parametrize('name, df', list(macd_cases()))
+def test_calculate_macd_matches_baseline(name, df):
+    expected = baseline.calculate_macd(df.copy())
+    result = indicators.calculate_macd(df.copy())
+    for key in ('macdDirection', 'turnTime', 'periodSinceTurn'):
+        assert result[key] == expected[key], key
+    for key in ('macd', 'macdSignal', 'histogram'):
+        np.testing.assert_array_equal(result[key], expected[key])
+    np.testing.assert_array_equal(result['values'], expected['values'])
+
+def trend_cases():
+    # Random walks, where a dominant window is usually found soon after 200 rows
+    for rows in (2, 150, 201, 1000, 3000):
+        for seed in range(3):
+            yield f'walk-{rows}-{seed}', random_candles(rows, seed)
+    # A trend that reverses, so that the dominant window is far back
+    reversal = random_candles(1500, 3)
+    reversal['close'] = reversal['open'] * np.where(np.arange(1500) < 1000, 1.01, 0.995)
+    yield 'reversal', reversal
+    # No dominant window at all, so every window is checked
+    yield 'balanced', balanced_candles(800)
+
+@pytest.mark.parametrize('name, df', list(trend_cases()))
+def test_calculate_trend_matches_baseline(name, df):
+    expected = baseline.calculate_trend(df.copy())
+    result = indicators.calculate_trend(df.copy())
+    for key in ('dftLen', 'greaterCount', 'lessCount'):
+        assert result[key] == expected[key], key
+
+def true_range_cases():
+    # Random walks of different lengths
+    for rows in (1, 14, 40, 1000):
+        for seed in range(3):
+            yield f'walk-{rows}-{seed}', random_candles(rows, seed)
+    # Constant highs and lows, where both directional movements are 0 and the ADX divides by the guarded sum
+    still = random_candles(200, 5)
+    still['high'] = 101.0
+    still['low'] = 99.0
+    still['close'] = np.clip(still['close'], 99.0, 101.0)
+    yield 'still', still
+
+@pytest.mark.parametrize('name, df', list(true_range_cases()))
+def test_calculate_atr_and_adx_match_baseline(name, df, monkeypatch):
+    monkeypatch.setitem(indicators.config.indicator_settings, 'wilder_true_range', False)
+    np.testing.assert_array_equal(indicators.calculate_atr(df.copy())['atr'], baseline.calculate_atr(df.copy())['atr'])
+    np.testing.assert_array_equal(indicators.calculate_adx(df.copy()), baseline.calculate_adx(df.copy()))
+
+@pytest.mark.parametrize('name, df', list(true_range_cases()))
+def test_wilder_true_range_uses_previous_close(name, df):
+    previous_close = df['close'].shift(1)
+    expected = np.maximum(df['high'], previous_close.fillna(df['high'])) - np.minimum(df['low'], previous_close.fillna(df['low']))
+    np.testing.assert_allclose(indicators.calculate_true_range(df, wilder=True), expected, rtol=0, atol=1e-12)
+
+def cci_cases():
+    # Random walks, some shorter than the 20 row window
+    for rows in (1, 19, 20, 21, 1000):
+        for seed in range(3):
+            yield f'walk-{rows}-{seed}', random_candles(rows, seed)
+    # Prices far below 1, where running sums would lose precision
+    yield 'small', random_candles(1000, 4, start=1e-6)
+    # Flat windows, where the deviation is 0 and the CCI is not defined
+    flat = random_candles(300, 5)
+    flat.loc[100:160, 'close'] = 100.0
+    yield 'flat', flat
+    # Missing closes at the head and in the middle, which make every window holding them NaN
+    gaps = random_candles(300, 6)
+    gaps.loc[:24, 'close'] = np.nan
+    gaps.loc[150, 'close'] = np.nan
+    yield 'gaps', gaps
+
+@pytest.mark.parametrize('name, df', list(cci_cases()))
+def test_rolling_std_matches_rolling_apply(name, df):
+    expected = df['close'].rolling(window=20).apply(lambda x: np.std(x, ddof=1), raw=True)
+    result = indicators.rolling_std(df['close'], 20)
+    np.testing.assert_array_equal(np.isnan(result), np.isnan(expected))
+    np.testing.assert_allclose(result, expected, rtol=1e-12, atol=0)
+
+@pytest.mark.parametrize('name, df', list(cci_cases()))
+def test_calculate_cci_matches_baseline(name, df):
+    expected = baseline.calculate_cci(df.copy())
+    result = indicators.calculate_cci(df.copy())
+    np.testing.assert_allclose(result['cci'], expected['cci'], rtol=1e-9, atol=0)
+    np.testing.assert_allclose(result['df']['cci'], expected['df']['cci'], rtol=1e-9, atol=0)
+
+def panel_cases():
+    # Histories of mixed lengths in one panel, from a single candle to more than the 500 candles of a candle file
+    lengths = (1, 2, 14, 30, 52, 60, 150, 201, 250, 501, 800)
+    yield 'mixed', {f'A{number}': random_candles(rows, number) for number, rows in enumerate(lengths)}
+    # Only frames shorter than the longest indicator windows
+    yield 'short', {f'S{rows}': random_candles(rows, rows) for rows in (1, 3, 9, 20, 26, 40)}
+    # Prices far below 1 and a flat tail, where the deviations and ranges are 0
+    small = {f'P{number}': random_candles(300, 20 + number, start=1e-4) for number in range(3)}
+    small['P0'].loc[260:, ['high', 'low', 'open', 'close']] = small['P0'].loc[260, 'close']
+    yield 'small', small
+
+@pytest.mark.parametrize('name, frames', list(panel_cases()))
+@pytest.mark.parametrize('include_atr', [False, True])
+def test_evaluate_panel_matches_gates(name, frames, include_atr, monkeypatch):
+    gate_criteria = {gate: dict(settings) for gate, settings in gates.config.gate_settings.items()}
+    gate_criteria['ema_gate']['long_criteria'] = include_atr
+    gate_criteria['ema_gate']['short_criteria'] = include_atr
+    generator = np.random.default_rng(len(frames))
+    # Prices around the last close, so that the price gates go both ways
+    asset_prices = {key: float(df['close'].iloc[-1] * (1 + generator.normal(0, 0.01))) for key, df in frames.items()}
+    panel = gates.evaluate_panel({key: df.copy() for key, df in frames.items()}, asset_prices, gate_criteria)
+    for position, key in enumerate(panel['keys']):
+        context = indicators.IndicatorContext(frames[key].copy())
+        expected = gates.evaluate(context, {'asset_price': asset_prices[key], 'gate_bypass': ''}, gate_criteria)
+        assert panel['attempting'][position] == expected['order_type'], key
+        for gate in gates.gate_set1 + gates.gate_set2:
+            # Both directions of every gate, not only the one attempted
+            if gate in gates.gate_set1:
+                gate_data = gate(context, gate_criteria[gate.__name__])
+            else:
+                gate_data = gate(context, asset_prices[key], gate_criteria[gate.__name__])
+            for direction in ('long', 'short'):
+                assert bool(panel['gates'][gate.__name__][direction][position]) == bool(gate_data[direction]), (key, gate.__name__, direction)
+            assert expected['gates'][gate.__name__]['output'] == gate_data[expected['order_type']], (key, gate.__name__)
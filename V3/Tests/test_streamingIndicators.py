@@ -0,0 +1,81 @@
+import math
+import sys
+import numpy as np
+import pytest
+
+# Run from the V3 folder: python -m pytest Tests
+# Append the 'Analysis' folders to path and import the needed modules
+sys.path.append('Analysis')
+sys.path.append('Analysis/Technical')
+import gates
+import indicators
+import streamingIndicators
+from candles import random_candles
+
+indicator_names = ['macd', 'ema_dema', 'trend', 'cci', 'atr', 'ichimoku', 'rsi', 'bollinger_bands', 'adx', 'momentum', 'vortex']
+
+def assert_close(result, expected, name, absolute=0.0):
+    """
+    Check a streaming value against the batch value, with a relative tolerance of 1e-9
+    (and the given absolute tolerance). NaN and infinite values must match exactly.
+    """
+    if isinstance(result, str) or isinstance(expected, str):
+        assert result == expected, name
+        return
+    result = float(result)
+    expected = float(expected)
+    if math.isnan(expected) or math.isinf(expected):
+        assert result == expected or (math.isnan(result) and math.isnan(expected)), name
+        return
+    assert abs(result - expected) <= max(1e-9 * max(1.0, abs(expected)), absolute), (name, result, expected)
+
+def assert_indicator(result, expected, name):
+    # pandas computes the rolling std of the Bollinger Bands online, so it is only exact to about 1e-6
+    absolute = 1e-6 if name == 'bollinger_bands' else 0.0
+    if not isinstance(expected, dict):
+        assert_close(result, expected, name, absolute)
+        return
+    for key, value in result.items():
+        if key == 'valuesCount':
+            assert value == len(expected['values']), name
+        elif key == 'valuesMean':
+            assert_close(value, np.mean(expected['values']) if expected['values'] else math.nan, name)
+        elif isinstance(value, dict):
+            assert_indicator(value, expected[key], name)
+        else:
+            assert_close(value, expected[key], f'{name}.{key}', absolute)
+
+def stream_cases():
+    # Random walks, checked after every candle from the first one
+    for seed in range(2):
+        yield f'walk-{seed}', random_candles(260, seed), 1
+    # A longer walk, where the 200 candle averages and the trend window are full
+    yield 'long', random_candles(700, 2), 9
+    # A flat stretch, where the deviations, ranges and directional movements are 0
+    flat = random_candles(220, 3)
+    flat.loc[80:130, ['high', 'low', 'open', 'close']] = flat.loc[80, 'close']
+    yield 'flat', flat, 1
+
+@pytest.mark.parametrize('name, df, every', list(stream_cases()))
+def test_streaming_indicators_match_batch(name, df, every):
+    stream = streamingIndicators.StreamingIndicators()
+    last = len(df) - 1
+    for row, candle in enumerate(df.to_dict('records')):
+        stream.append(candle)
+        if row % every and row != last:
+            continue
+        context = indicators.IndicatorContext(df.iloc[:row + 1].copy())
+        for indicator in indicator_names:
+            assert_indicator(getattr(stream, indicator)(), getattr(context, indicator)(), f'{indicator} at row {row}')
+        for column in ('macd', 'macd_hist', 'mom'):
+            assert_close(stream.average_magnitude(column, 200), context.average_magnitude(column, 200), f'{column} average at row {row}')
+        assert stream.extremes(30) == context.extremes(30), row
+        # Every gate gives the same flags from the streaming state as from the candles
+        for gate in gates.gate_set1:
+            expected = gate(context, gates.config.gate_settings[gate.__name__])
+            result = gate(stream, gates.config.gate_settings[gate.__name__])
+            assert (result['long'], result['short']) == (expected['long'], expected['short']), (gate.__name__, row)
+        for gate in gates.gate_set2:
+            expected = gate(context, candle['close'], gates.config.gate_settings[gate.__name__])
+            result = gate(stream, candle['close'], gates.config.gate_settings[gate.__name__])
+            assert (result['long'], result['short']) == (expected['long'], expected['short']), (gate.__name__, row)
@@ -1,5 +1,9 @@
-from fastapi import FastAPI, Form
+from fastapi import FastAPI, Form, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import sys
 import uvicorn
 import cloudscraper
@@ -15,6 +19,10 @@ import indicators
 # Append the 'Database' folder to path and import the needed module
 sys.path.append('Database')
 import recommendations
+import authCache
+import asyncDatabase
+import asyncFetcher
+import priceSnapshot
 
 scraper = cloudscraper.create_scraper()
 
@@ -31,6 +39,15 @@ tags_metadata = [
     {"name": "User Management"}
 ]
 
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Close the shared HTTP session and stop the database threads when the server shuts down.
+    """
+    yield
+    await asyncFetcher.close()
+    asyncDatabase.shutdown()
+
 app = FastAPI(
     title="VAM Network API",
     description=description,
@@ -42,9 +59,98 @@ app = FastAPI(
         "email": "nangafor@u.rochester.edu",
     },
     openapi_url = "/Data-Schema",
-    openapi_tags=tags_metadata
+    openapi_tags=tags_metadata,
+    lifespan=lifespan
 )
 
+def admin_api_key(api_key: str) -> bool:
+    """
+    Dependency checking the API key in the path of an administrator-only request against the cached admin keys,
+    without reading the database.
+
+    Parameters:
+    api_key (str): API key used to authenticate the request.
+
+    Returns:
+    True if the API key belongs to an administrator.
+    """
+    return authCache.is_admin(api_key)
+
+def admin_api_key_form(api_key: str = Form(...)) -> bool:
+    """
+    Dependency checking the API key in the form of an administrator-only request against the cached admin keys,
+    without reading the database.
+
+    Parameters:
+    api_key (str): API key used to authenticate the request.
+
+    Returns:
+    True if the API key belongs to an administrator.
+    """
+    return authCache.is_admin(api_key)
+
+def page_size(limit):
+    """
+    Clamp the number of rows asked for in a page to the limits of config.api_server.
+
+    Parameters:
+    limit (int): The number of rows asked for, or None for the default.
+
+    Returns:
+    The number of rows in the page.
+    """
+    return max(1, min(limit or config.api_server['page_limit'], config.api_server['page_limit_max']))
+
+async def ndjson_rows(function, *args, after_id=None):
+    """
+    Read the rows returned by a paginated config.get_* function one page at a time and yield them as NDJSON lines,
+    so that only one page is held in memory whatever the size of the table.
+
+    Parameters:
+    function (function): The config.get_* function.
+    *args: The arguments of the function before after_id and limit.
+    after_id (int, optional): The rowid after which the rows are streamed. Defaults to the start of the table.
+
+    Returns:
+    An asynchronous generator of NDJSON lines. A failed read ends the stream with an error line.
+    """
+    while True:
+        page = await asyncDatabase.call(function, *args, after_id=after_id, limit=config.api_server['stream_batch'])
+        if page['msg'] != 'success':
+            yield json.dumps(config.error_message(page['data'])) + '\n'
+            return
+        for row in page['data']['items']:
+            yield json.dumps(row) + '\n'
+        after_id = page['data']['next_after_id']
+        if after_id is None:
+            return
+
+async def table_response(function, *args, after_id=None, limit=None, stream=False):
+    """
+    Respond with the rows returned by a config.get_* function: a stream of NDJSON lines if asked for,
+    one page of rows (keyset pagination) if after_id or limit is given, and the whole table otherwise.
+
+    Parameters:
+    function (function): The config.get_* function.
+    *args: The arguments of the function before after_id and limit.
+    after_id (int, optional): The rowid after which the rows start.
+    limit (int, optional): The number of rows in the page.
+    stream (bool, optional): Stream the rows as NDJSON. Defaults to False.
+
+    Returns:
+    The response of the endpoint.
+    """
+    if stream:
+        return StreamingResponse(ndjson_rows(function, *args, after_id=after_id), media_type='application/x-ndjson')
+    if after_id is None and limit is None:
+        data = await asyncDatabase.call(function, *args)
+    else:
+        data = await asyncDatabase.call(function, *args, after_id=after_id, limit=page_size(limit))
+    if data['msg'] == 'success': 
+        return config.success_message(data['data'])
+    else:
+        return config.error_message(data['data'])
+
 origins = ["*"]
 
 app.add_middleware(
@@ -56,14 +162,14 @@ app.add_middleware(
 )
 
 @app.get("/", tags=["System Health Check"])
-def read_root():
+async def read_root():
     """
     The root endpoint of the API. Returns a simple "Hello World" message.
     """
     return {"Hello": "World"}
 
 @app.get("/system_diagnostic/{api_key}", tags=["System Health Check", "Administrator Only"])
-def system_query(api_key):
+async def system_query(api_key, admin: bool = Depends(admin_api_key)):
     """
     Performs a diagnostic check of the system.
 
@@ -75,15 +181,15 @@ def system_query(api_key):
         the results of the diagnostic check. "msg" is a string indicating the status
         of the request ("success" or "error").
     """
-    if api_key in config.get_all_admin_api_keys():
+    if admin:
         return config.success_message(True)
     else:
         return config.error_message('Authentication error.')
 
 @app.post("/run_command", tags=["System Health Check", "Administrator Only"])
-def system_query(
+async def system_query(
         command: str = Form(...),
-        api_key: str = Form(...)
+        admin: bool = Depends(admin_api_key_form)
     ):
     """
     Runs a command in the system shell.
@@ -97,16 +203,16 @@ def system_query(
         the output of the command. "msg" is a string indicating the status
         of the request ("success" or "error").
     """
-    if api_key in config.get_all_admin_api_keys():
+    if admin:
         try:
-            return config.success_message(subprocess.getoutput(command))
+            return config.success_message(await asyncio.to_thread(subprocess.getoutput, command))
         except  Exception as e:
             return config.error_message(str(e))
     else:
         return config.error_message('Authentication error.')
 
 @app.post("/add_asset", tags=["Asset Management"])
-def database_modification(
+async def database_modification(
         api_key: str = Form(...), 
         asset_name: str = Form(...), 
         asset_type: str = Form(...), 
@@ -140,19 +246,29 @@ def database_modification(
     # Check if inputs are valid
     sanitizer_result = config.sanitize_inputs(asset_name=asset_name, asset_type=asset_type, amount=amount, multiplier=multiplier, slippage_percent=slippage_percent, take_profit_percent=take_profit_percent, timeframe=timeframe, broker_direction=broker_direction, gate_bypass=gate_bypass)
     if sanitizer_result['msg'] == 'success':
+        asset_name = sanitizer_result['data']['asset_name']
+        multiplier = sanitizer_result['data']['multiplier']
         # Check if the asset's price is less than the definition of a penny stock
-        asset_price = indicators.price(sanitizer_result['data']['asset_name'], sanitizer_result['data']['asset_type'])
+        asset_price = await priceSnapshot.fetch_price(asset_name, sanitizer_result['data']['asset_type'])
         if asset_price['msg'] == 'success':
-            if indicators.price(sanitizer_result['data']['asset_name'], sanitizer_result['data']['asset_type'])['data'] < config.penny_stock_definition:
-                return config.error_message(f"{sanitizer_result['data']['asset_name']} is less than the system classification of a penny stock / crypto ({config.penny_stock_definition}). Please add a different asset.") 
+            if asset_price['data'] < config.penny_stock_definition:
+                return config.error_message(f"{asset_name} is less than the system classification of a penny stock / crypto ({config.penny_stock_definition}). Please add a different asset.") 
             else:  
                 # Check if multiplier is greater tha nor equal to 1
-                if sanitizer_result['data']['multiplier'] >= 1:
-                    # Check if asset is tradable
-                    if (sanitizer_result['data']['multiplier'] == 1 and sanitizer_result['data']['asset_name'] in config.leveragable_crypto + config.non_leveragable_crypto + config.get_all_stocks()) or (sanitizer_result['data']['multiplier'] > 1 and sanitizer_result['data']['asset_name'] in config.leveragable_crypto):
-                        data = config.add_asset(api_key, sanitizer_result['data']['asset_name'], sanitizer_result['data']['asset_type'], sanitizer_result['data']['amount'], sanitizer_result['data']['multiplier'], sanitizer_result['data']['timeframe'], sanitizer_result['data']['slippage_percent'], sanitizer_result['data']['take_profit_percent'], sanitizer_result['data']['gate_bypass'])
+                if multiplier >= 1:
+                    # Check if asset is tradable, only downloading the stock list for an asset that is not a known crypto
+                    if multiplier == 1 and asset_name not in config.leveragable_crypto + config.non_leveragable_crypto:
+                        stocks = await priceSnapshot.get_stock_symbols()
+                        if stocks['msg'] != 'success':
+                            return config.error_message('Unable to fetch the stock list.')
+                        tradable = asset_name in stocks['data']
+                    else:
+                        tradable = multiplier == 1 or asset_name in config.leveragable_crypto
+                    if tradable:
+                        # Adding the asset may download the fear and greed index, so it runs on the default threads instead of the database threads
+                        data = await asyncio.to_thread(config.add_asset, api_key, asset_name, sanitizer_result['data']['asset_type'], sanitizer_result['data']['amount'], multiplier, sanitizer_result['data']['timeframe'], sanitizer_result['data']['slippage_percent'], sanitizer_result['data']['take_profit_percent'], sanitizer_result['data']['gate_bypass'], sanitizer_result['data']['broker_direction'])
                         if data['msg'] == 'success': 
-                            return config.success_message(f"{sanitizer_result['data']['asset_name']} added")
+                            return config.success_message(f"{asset_name} added")
                         else:
                             return config.error_message(data['data'])
                     else:
@@ -165,7 +281,7 @@ def database_modification(
         return config.error_message("Inputs. did not pass the sanitizer check. Please check all fields before submitting.")
 
 @app.post("/remove_asset", tags=["Asset Management"])
-def database_modification(
+async def database_modification(
         api_key: str = Form(...),
         asset_name: str = Form(...),
         timeframe: str = Form(...),
@@ -186,7 +302,7 @@ def database_modification(
         # Check if inputs are valid
     sanitizer_result = config.sanitize_inputs(asset_name=asset_name, timeframe=timeframe)
     if sanitizer_result['msg'] == 'success':
-        data = config.remove_asset(api_key, sanitizer_result['data']['asset_name'], sanitizer_result['data']['timeframe'])
+        data = await asyncDatabase.call(config.remove_asset, api_key, sanitizer_result['data']['asset_name'], sanitizer_result['data']['timeframe'])
         if data['msg'] == 'success': 
             return config.success_message(f'{asset_name} removed')
         else:
@@ -195,29 +311,28 @@ def database_modification(
         return config.error_message("Inputs. did not pass the sanitizer check. Please check all fields before submitting.")
 
 @app.get("/get_all_assets/{api_key}", tags=["Asset Management", "Administrator Only"])
-def database_query(api_key):
+async def database_query(api_key, after_id: int = None, limit: int = None, stream: bool = False, admin: bool = Depends(admin_api_key)):
     """
     Retrieves a list of all assets in the database.
 
     Parameters:
     api_key (str): API key used to authenticate the request.
+    after_id (int, optional): Return the rows after this row id (keyset pagination).
+    limit (int, optional): Return a page of at most this many rows, with the row id to pass as after_id for the next page.
+    stream (bool, optional): Stream every row as one JSON object per line (NDJSON) instead.
 
     Returns:
     A dictionary with two keys: "data" and "status". "data" contains
         dictionaries with the asset names and their associated data. "status" is a
         string indicating the status of the request ("success" or "error").
     """
-    if api_key in config.get_all_admin_api_keys():
-        data = config.get_assets()
-        if data['msg'] == 'success': 
-            return config.success_message(data['data'])
-        else:
-            return config.error_message(data['data'])
+    if admin:
+        return await table_response(config.get_assets, after_id=after_id, limit=limit, stream=stream)
     else:
         return config.error_message('Authentication error.')
 
 @app.get("/get_asset/{api_key}", tags=["Asset Management"])
-def database_query(api_key):
+async def database_query(api_key):
     """
     Retrieves a list of all assets in the database.
 
@@ -229,55 +344,53 @@ def database_query(api_key):
         dictionaries with the asset names and their associated data. "status" is a
         string indicating the status of the request ("success" or "error").
     """
-    data = config.get_asset(api_key)
+    data = await asyncDatabase.call(config.get_asset, api_key)
     if data['msg'] == 'success': 
         return config.success_message(data['data'])
     else:
         return config.error_message(data['data'])
 
 @app.get("/get_all_signals/{api_key}", tags=["Signal Management", "Administrator Only"])
-def database_query(api_key):
+async def database_query(api_key, after_id: int = None, limit: int = None, stream: bool = False, admin: bool = Depends(admin_api_key)):
     """
     Retrieves a list of all signals in the database.
 
     Parameters:
     api_key (str): API key used to authenticate the request.
+    after_id (int, optional): Return the rows after this row id (keyset pagination).
+    limit (int, optional): Return a page of at most this many rows, with the row id to pass as after_id for the next page.
+    stream (bool, optional): Stream every row as one JSON object per line (NDJSON) instead.
 
     Returns:
     A dictionary with two keys: "data" and "status". "data" contains
         dictionaries with the signal data. "status" is a string indicating the status
         of the request ("success" or "error").
     """
-    if api_key in config.get_all_admin_api_keys():
-        data = config.get_signals()
-        if data['msg'] == 'success': 
-            return config.success_message(data['data'])
-        else:
-            return config.error_message(data['data'])
+    if admin:
+        return await table_response(config.get_signals, after_id=after_id, limit=limit, stream=stream)
     else:
         return config.error_message('Authentication error.')
 
 @app.get("/get_signal/{api_key}", tags=["Signal Management"])
-def database_query(api_key):
+async def database_query(api_key, after_id: int = None, limit: int = None, stream: bool = False):
     """
     Retrieves a list of slect signals in the database.
 
     Parameters:
     api_key (str): API key used to authenticate the request.
+    after_id (int, optional): Return the rows after this row id (keyset pagination).
+    limit (int, optional): Return a page of at most this many rows, with the row id to pass as after_id for the next page.
+    stream (bool, optional): Stream every row as one JSON object per line (NDJSON) instead.
 
     Returns:
     A dictionary with two keys: "data" and "status". "data" contains
         dictionaries with the signal data. "status" is a string indicating the status
         of the request ("success" or "error").
     """
-    data = config.get_signal(api_key)
-    if data['msg'] == 'success': 
-        return config.success_message(data['data'])
-    else:
-        return config.error_message(data['data'])
+    return await table_response(config.get_signal, api_key, after_id=after_id, limit=limit, stream=stream)
 
 @app.get("/crypto_recommendations", tags=["Global Request"])
-def information_query():
+async def information_query():
     """
     Retrieves a list of cryptocurrency recommendations.
 
@@ -286,14 +399,14 @@ def information_query():
         the recommended cryptocurrencies. "status" is a string indicating the status
         of the request ("success" or "error").
     """
-    data = recommendations.get_cryptos()
+    data = await asyncio.to_thread(recommendations.get_cryptos)
     if data['msg'] == 'success': 
         return config.success_message(data['data'])
     else:
         return config.error_message(data['data'])
 
 @app.get("/stock_recommendations/{data}", tags=["Global Request"])
-def information_query(data):
+async def information_query(data):
     """
     Retrieves a list of stock recommendations based on given filters.
 
@@ -316,14 +429,14 @@ def information_query(data):
         marketcap_max = float(data.split('marketcap_max=')[1].split('&')[0])
     except  Exception as e:
         return config.error_message(str(e))
-    data = recommendations.get_stocks(min_volume, min_price, min_sector_average, marketcap_min, marketcap_max)
+    data = await asyncio.to_thread(recommendations.get_stocks, min_volume, min_price, min_sector_average, marketcap_min, marketcap_max)
     if data['msg'] == 'success': 
         return config.success_message(data['data'])
     else:
         return config.error_message(data['data'])
 
 @app.post("/add_user", tags=["User Management"])
-def database_modification(
+async def database_modification(
         email: str = Form(...),
         username: str = Form(...),
         password: str = Form(...),
@@ -343,14 +456,14 @@ def database_modification(
     """
     sanitizer_result = config.sanitize_inputs(email=email, username=username)
     priviledge = '1'
-    data = config.add_user(sanitizer_result['data']['email'], sanitizer_result['data']['username'], password, priviledge)
+    data = await asyncDatabase.call(config.add_user, sanitizer_result['data']['email'], sanitizer_result['data']['username'], password, priviledge)
     if data['msg'] == 'success': 
         return config.success_message(data['data'])
     else:
         return config.error_message(data['data'])
 
 @app.post("/remove_user", tags=["User Management"])
-def database_modification(
+async def database_modification(
         api_key: str = Form(...),
     ):
     """
@@ -364,14 +477,14 @@ def database_modification(
         a message indicating the result of the operation. "msg" is a string indicating
         the status of the request ("success" or "error").
     """
-    data = config.remove_user(api_key)
+    data = await asyncDatabase.call(config.remove_user, api_key)
     if data['msg'] == 'success': 
         return config.success_message(data['data'])
     else:
         return config.error_message(data['data'])
 
 @app.get("/get_all_users/{api_key}", tags=["User Management", "Administrator Only"])
-def database_query(api_key):
+async def database_query(api_key, admin: bool = Depends(admin_api_key)):
     """
     Retrieves a list of all users in the database.
     
@@ -383,8 +496,8 @@ def database_query(api_key):
         dictionaries with the asset names and their associated data. "status" is a
         string indicating the status of the request ("success" or "error").
     """
-    if api_key in config.get_all_admin_api_keys():
-        data = config.get_users()
+    if admin:
+        data = await asyncDatabase.call(config.get_users)
         if data['msg'] == 'success': 
             return config.success_message(data['data'])
         else:
@@ -393,7 +506,7 @@ def database_query(api_key):
         return config.error_message('Authentication error.')
 
 @app.get("/get_user/{api_key}", tags=["User Management"])
-def database_query(api_key):
+async def database_query(api_key, admin: bool = Depends(admin_api_key)):
     """
     Retrieves a user from the database.
     
@@ -405,8 +518,8 @@ def database_query(api_key):
         dictionaries with the asset names and their associated data. "status" is a
         string indicating the status of the request ("success" or "error").
     """
-    if api_key in config.get_all_admin_api_keys():
-        data = config.get_user(api_key)
+    if admin:
+        data = await asyncDatabase.call(config.get_user, api_key)
         if data['msg'] == 'success': 
             return config.success_message(data['data'])
         else:
@@ -415,29 +528,28 @@ def database_query(api_key):
         return config.error_message('Authentication error.')
 
 @app.get("/get_all_errors/{api_key}", tags=["User Management", "Administrator Only"])
-def database_query(api_key):
+async def database_query(api_key, after_id: int = None, limit: int = None, stream: bool = False, admin: bool = Depends(admin_api_key)):
     """
     Retrieves a list of all errors in the database.
     
     Parameters:
     api_key (str): API key used to authenticate the request.
+    after_id (int, optional): Return the rows after this row id (keyset pagination).
+    limit (int, optional): Return a page of at most this many rows, with the row id to pass as after_id for the next page.
+    stream (bool, optional): Stream every row as one JSON object per line (NDJSON) instead.
 
     Returns:
     A dictionary with two keys: "data" and "status". "data" contains
         dictionaries with the errors and their associated data. "status" is a
         string indicating the status of the request ("success" or "error").
     """
-    if api_key in config.get_all_admin_api_keys():
-        data = config.get_errors()
-        if data['msg'] == 'success': 
-            return config.success_message(data['data'])
-        else:
-            return config.error_message(data['data'])
+    if admin:
+        return await table_response(config.get_errors, after_id=after_id, limit=limit, stream=stream)
     else:
         return config.error_message('Authentication error.')
 
 @app.post("/set_discord_config", tags=["User Management"])
-def database_modification(
+async def database_modification(
         api_key: str = Form(...),
         discord_channel: str = Form(...),
     ):
@@ -453,14 +565,14 @@ def database_modification(
         a message indicating the result of the operation. "msg" is a string indicating
         the status of the request ("success" or "error").
     """
-    data = config.update_discord_channel(api_key, discord_channel)
+    data = await asyncDatabase.call(config.update_discord_channel, api_key, discord_channel)
     if data['msg'] == 'success': 
         return config.success_message(data['data'])
     else:
         return config.error_message(data['data'])
 
 @app.post("/set_defi_config", tags=["User Management"])
-def database_modification(
+async def database_modification(
         api_key: str = Form(...),
         wss_node: str = Form(...),
         mnemonic: str = Form(...),
@@ -480,14 +592,14 @@ def database_modification(
         a message indicating the result of the operation. "msg" is a string indicating
         the status of the request ("success" or "error").
     """
-    data = config.update_defi_config(api_key, wss_node, mnemonic, wallet_address)
+    data = await asyncDatabase.call(config.update_defi_config, api_key, wss_node, mnemonic, wallet_address)
     if data['msg'] == 'success': 
         return config.success_message(data['data'])
     else:
         return config.error_message(data['data'])
 
 @app.post("/set_robinhood_config", tags=["User Management"])
-def database_modificationn(
+async def database_modificationn(
         api_key: str = Form(...),
         username: str = Form(...),
         password: str = Form(...),
@@ -505,7 +617,7 @@ def database_modificationn(
         a message indicating the result of the operation. "msg" is a string indicating
         the status of the request ("success" or "error").
     """
-    data = config.update_robinhood_config(api_key, username, password)
+    data = await asyncDatabase.call(config.update_robinhood_config, api_key, username, password)
     if data['msg'] == 'success': 
         return config.success_message(data['data'])
     else: